@@ -1,11 +1,12 @@
 from django.contrib import admin
 
+from base.backend.projections import ProjectedAdmin
 from base.models import State, Transaction, TransactionType, UserIdentity
 
 
 # Register your models here.
 @admin.register(State)
-class StateAdmin(admin.ModelAdmin):
+class StateAdmin(ProjectedAdmin):
     """
     state admin site
     """
@@ -14,16 +15,17 @@ class StateAdmin(admin.ModelAdmin):
 
 
 @admin.register(TransactionType)
-class TransactionTypeAdmin(admin.ModelAdmin):
+class TransactionTypeAdmin(ProjectedAdmin):
     """
     TransactionType admin site
     """
     list_display = ('name', 'description', 'simple_name', 'state', 'date_modified', 'date_created')
     search_fields = ('name',)
+    list_select_related = ('state',)
 
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(ProjectedAdmin):
     """
     Transaction admin site
     """
@@ -31,10 +33,11 @@ class TransactionAdmin(admin.ModelAdmin):
     'transaction_type', 'request', 'message', 'response_code', 'response', 'state', 'date_modified', 'date_created')
     search_fields = ('transaction_type',)
     list_filter = ('transaction_type', 'state')
+    list_select_related = ('transaction_type', 'state')
 
 
 @admin.register(UserIdentity)
-class UserIdentityAdmin(admin.ModelAdmin):
+class UserIdentityAdmin(ProjectedAdmin):
     """
     Transaction admin site
     """
@@ -42,3 +45,4 @@ class UserIdentityAdmin(admin.ModelAdmin):
     'token', 'user', 'source_ip', 'state')
     search_fields = ('token',)
     list_filter = ('source_ip', 'state')
+    list_select_related = ('user', 'state')
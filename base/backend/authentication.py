@@ -3,12 +3,13 @@ import logging
 import token
 
 from django.contrib.auth import authenticate, login
-from django.http import JsonResponse
 from django.urls import re_path
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
 from base.backend.service import UserIdentityService, StateService
+from base.backend.serviceregistry import get_service
+from base.backend.utils.codec import JsonResponse
 from base.backend.utils.utilities import get_request_data
 
 lgr = logging.getLogger(__name__)
@@ -35,11 +36,11 @@ class Authentication(object):
                 return JsonResponse({'code': "500.000.301", "message": "user login failed"})
             # check token
             login(request, user)
-            user_auth = UserIdentityService().filter(
+            user_auth = get_service(UserIdentityService).filter(
                 user=user, expires_at__gt=timezone.now(), state__name="Active").order_by('-date_created').first()
             if not user_auth:
-                state_activation_pending = StateService().get(name="Activation Pending")
-                user_auth = UserIdentityService().create(
+                state_activation_pending = get_service(StateService).get(name="Activation Pending")
+                user_auth = get_service(UserIdentityService).create(
                     user=user, source_ip=request_data.get('source_ip', None),
                     state=state_activation_pending)
             if user_auth:
@@ -62,7 +63,7 @@ class Authentication(object):
         if not expired_token:
             authorization_header = request.META.get('HTTP_AUTHORIZATION')
             _, expired_token = authorization_header.split(' ')
-        user_auth = UserIdentityService().filter(token=expired_token).first()
+        user_auth = get_service(UserIdentityService).filter(token=expired_token).first()
         user_auth.extend()
         user_auth.refresh_from_db()
         return JsonResponse({
@@ -0,0 +1,98 @@
+"""
+Routing of read-only administration methods to a read replica.
+Methods decorated with read_replica read from settings.READ_REPLICA_ALIAS, everything else, and every write,
+uses the primary (default) database. Once a request writes, its later reads stay on the primary so that it
+reads its own writes despite the replication lag. The scope of a request is opened by ReplicaRoutingMiddleware.
+"""
+import contextvars
+import functools
+import inspect
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+_pinned = contextvars.ContextVar('pinned_to_primary', default=False)
+
+
+def get_replica_alias():
+    """
+    :return: the replica alias if one is configured, None otherwise
+    :rtype: str | None
+    """
+    alias = getattr(settings, 'READ_REPLICA_ALIAS', None)
+    return alias if alias and alias in connections.settings else None
+
+
+def read_replica(func):
+    """
+    Marks an administration method as read-only so that its queries may be served by the replica.
+    e.g.
+        @read_replica
+        def get_books(self, request, **kwargs):
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            token = _replica_reads.set(True)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _replica_reads.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    return wrapper
+
+
+def pin_to_primary():
+    """ Sends the remaining reads of the current request to the primary """
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@contextmanager
+def routing_scope():
+    """
+    Opens the routing scope of a request, a write pins the reads made inside it to the primary
+    """
+    replica_token, pinned_token = _replica_reads.set(False), _pinned.set(False)
+    try:
+        yield
+    finally:
+        _pinned.reset(pinned_token)
+        _replica_reads.reset(replica_token)
+
+
+class ReplicaRouter(object):
+    """
+    Database router sending the reads of read_replica methods to the replica until the request writes
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and not _pinned.get():
+            return get_replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,265 @@
+"""
+Request counters and latency histograms exported in the Prometheus text format.
+Every process keeps its figures in memory and, when settings.METRICS_DIR is set, writes them to its own
+file in that directory at most every METRICS_FLUSH_INTERVAL seconds. The export sums the files of all
+processes, so any gunicorn worker can serve /api/metrics. The file of a process that is no longer running is
+folded into metrics-aggregate.json, so that the summed counters never go down.
+"""
+import atexit
+import bisect
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from base.backend.utils.utilities import process_running
+
+lgr = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUESTS_METRIC = 'library_http_requests_total'
+DURATION_METRIC = 'library_http_request_duration_seconds'
+LABELS = ('view', 'code')
+AGGREGATE_FILE = 'metrics-aggregate.json'
+
+
+class MetricsRegistry(object):
+    """
+    In-process counters and histograms keyed by label values.
+    observe() only takes a lock and updates a few list slots, the file write is done by one request per
+    flush interval.
+    """
+
+    def __init__(self, metrics_dir=None, flush_interval=5.0, buckets=DURATION_BUCKETS):
+        """
+        :param metrics_dir: directory shared by the worker processes, None keeps the figures in memory only
+        :type metrics_dir: str | Path | None
+        :param flush_interval: seconds between writes of this process' file
+        :type flush_interval: float
+        :param buckets: upper bounds of the latency histogram buckets in seconds
+        :type buckets: tuple
+        """
+        self.metrics_dir = str(metrics_dir) if metrics_dir else None
+        self.flush_interval = float(flush_interval)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        """ (Re)initialise the per process figures. Called again in a forked child. """
+        self._pid = os.getpid()
+        # a new process may reuse the pid of a dead worker, the token keeps their files apart
+        self._token = uuid.uuid4().hex[:8]
+        self._series = {}
+        self._last_flush = time.monotonic()
+        if self.metrics_dir:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            self.fold_dead_processes()
+
+    def observe(self, view, code, duration):
+        """
+        Records one request
+        :param view: the view name
+        :param code: the response code e.g. 100.000.000
+        :param duration: the request duration in seconds
+        """
+        if self._pid != os.getpid():
+            self._reset()
+        key = (str(view), str(code))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # count, sum, then one slot per bucket and +Inf
+                series = self._series[key] = [0, 0.0] + [0] * (len(self.buckets) + 1)
+            series[0] += 1
+            series[1] += duration
+            series[2 + bisect.bisect_left(self.buckets, duration)] += 1
+        if self.metrics_dir and time.monotonic() - self._last_flush >= self.flush_interval:
+            if self._flush_lock.acquire(blocking=False):
+                try:
+                    self.flush()
+                finally:
+                    self._flush_lock.release()
+
+    def snapshot(self):
+        """
+        :return: copy of this process' series, label values -> [count, sum, bucket counts...]
+        :rtype: dict
+        """
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    def _path(self, pid=None, token=None):
+        return os.path.join(self.metrics_dir, f"metrics-{pid or self._pid}-{token or self._token}.json")
+
+    @staticmethod
+    def _read(path):
+        with open(path, encoding='utf-8') as metrics_file:
+            data = json.load(metrics_file)
+        return tuple(data.get('buckets', ())), {tuple(row[:2]): row[2:] for row in data.get('series', [])}
+
+    def _write(self, path, series):
+        """ Writes series to path, replacing the previous version atomically """
+        data = {'buckets': list(self.buckets), 'series': [list(key) + values for key, values in series.items()]}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as metrics_file:
+            json.dump(data, metrics_file)
+        os.replace(tmp_path, path)
+
+    def _is_dead(self, name):
+        """ Whether the file name is that of a process which is no longer running """
+        parts = name[:-len('.json')].split('-')
+        if len(parts) != 3 or not parts[1].isdigit():
+            return False
+        pid, token = int(parts[1]), parts[2]
+        if pid == self._pid:
+            return token != self._token
+        return not process_running(pid)
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """ Holds the lock of the metrics directory, taken to fold the files of dead processes and to read them """
+        with open(os.path.join(self.metrics_dir, 'metrics.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def fold_dead_processes(self):
+        """
+        Adds the figures of the processes that are no longer running to the aggregate file and removes their
+        files, under a file lock so that two workers never fold the same file
+        :return: the number of files folded
+        :rtype: int
+        """
+        if not self.metrics_dir:
+            return 0
+        try:
+            with self._file_lock():
+                return self._fold_dead_processes()
+        except Exception as e:
+            lgr.exception(f"MetricsRegistry fold exception: {e}")
+        return 0
+
+    def _fold_dead_processes(self):
+        """ fold_dead_processes, call it holding the file lock """
+        dead = [
+            os.path.join(self.metrics_dir, name) for name in os.listdir(self.metrics_dir)
+            if name.startswith('metrics-') and name.endswith('.json') and self._is_dead(name)]
+        if not dead:
+            return 0
+        aggregate_path = os.path.join(self.metrics_dir, AGGREGATE_FILE)
+        aggregate = {}
+        if os.path.exists(aggregate_path):
+            buckets, aggregate = self._read(aggregate_path)
+            if buckets != self.buckets:
+                aggregate = {}
+        for path in dead:
+            try:
+                buckets, series = self._read(path)
+            except (OSError, ValueError):
+                buckets, series = None, {}
+            if buckets == self.buckets:
+                add_series(aggregate, series)
+        self._write(aggregate_path, aggregate)
+        for path in dead:
+            os.remove(path)
+        return len(dead)
+
+    def flush(self):
+        """ Writes this process' figures to its file, replacing the previous version atomically """
+        if not self.metrics_dir:
+            return
+        self._last_flush = time.monotonic()
+        try:
+            self._write(self._path(), self.snapshot())
+        except Exception as e:
+            lgr.exception(f"MetricsRegistry flush exception: {e}")
+
+    def collect(self):
+        """
+        Sums the series of every process, this process' in-memory figures replace its file
+        :return: label values -> [count, sum, bucket counts...]
+        :rtype: dict
+        """
+        totals = {}
+        add_series(totals, self.snapshot())
+        if self.metrics_dir:
+            # read under the fold lock, a file being folded would otherwise be counted in the aggregate too
+            with self._file_lock():
+                try:
+                    self._fold_dead_processes()
+                except Exception as e:
+                    lgr.exception(f"MetricsRegistry fold exception: {e}")
+                own_file = os.path.basename(self._path())
+                for name in os.listdir(self.metrics_dir):
+                    if not name.startswith('metrics-') or not name.endswith('.json') or name == own_file:
+                        continue
+                    try:
+                        buckets, series = self._read(os.path.join(self.metrics_dir, name))
+                    except (OSError, ValueError):
+                        continue
+                    if buckets == self.buckets:
+                        add_series(totals, series)
+        return totals
+
+    def render(self):
+        """
+        :return: the Prometheus text exposition of the collected figures
+        :rtype: str
+        """
+        series = sorted(self.collect().items())
+        lines = [
+            f"# HELP {REQUESTS_METRIC} Requests by view and response code.", f"# TYPE {REQUESTS_METRIC} counter"]
+        for key, values in series:
+            lines.append(f"{REQUESTS_METRIC}{{{format_labels(key)}}} {values[0]}")
+        lines += [
+            f"# HELP {DURATION_METRIC} Request duration by view and response code.",
+            f"# TYPE {DURATION_METRIC} histogram"]
+        for key, values in series:
+            labels = format_labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values[2:]):
+                cumulative += count
+                lines.append(f'{DURATION_METRIC}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{DURATION_METRIC}_sum{{{labels}}} {values[1]}")
+            lines.append(f"{DURATION_METRIC}_count{{{labels}}} {values[0]}")
+        return '\n'.join(lines) + '\n'
+
+
+def add_series(totals, series):
+    """ Adds series (label values -> [count, sum, bucket counts...]) to totals in place """
+    for key, values in series.items():
+        total = totals.setdefault(key, [0] * len(values))
+        for index, value in enumerate(values):
+            total[index] += value
+
+
+def format_labels(values):
+    escaped = [str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values]
+    return ','.join(f'{name}="{value}"' for name, value in zip(LABELS, escaped))
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry():
+    """
+    Returns the process wide registry, creating it from settings on first use.
+    @rtype: MetricsRegistry
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry(
+                    metrics_dir=getattr(settings, 'METRICS_DIR', None),
+                    flush_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0))
+    return _registry
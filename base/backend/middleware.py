@@ -0,0 +1,129 @@
+"""
+Request middleware
+"""
+import json
+import logging
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from base.backend.dbrouter import routing_scope
+from base.backend.metrics import get_metrics_registry
+from base.backend.querycounter import QueryCounter
+
+lgr = logging.getLogger(__name__)
+
+RESPONSE_CODE = re.compile(rb'"code":\s*"?([\w.]+)')
+
+
+class HybridMiddleware(object):
+    """
+    Base of the middleware running in the event loop under ASGI and in the request thread under WSGI.
+    Subclasses implement __acall__ for the async chain.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process(request)
+
+    def process(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+class QueryCountMiddleware(HybridMiddleware):
+    """
+    Records the statements each request runs. The count and the database time in milliseconds are
+    returned in the X-DB-Queries and X-DB-Time headers and logged as one JSON line per request, along with
+    the statements that ran more than once. Requests running QUERY_COUNT_WARN statements or more are logged
+    as warnings. Statements run while a streamed response is being sent are not counted.
+    Under ASGI the async ORM runs the statements of every request on one shared thread, so they cannot be told
+    apart and async requests are passed through without counting, their responses carry no X-DB-Queries and
+    X-DB-Time headers.
+    """
+
+    def __init__(self, get_response):
+        super(QueryCountMiddleware, self).__init__(get_response)
+        self.headers = getattr(settings, 'QUERY_COUNT_HEADERS', True)
+        self.warn_queries = getattr(settings, 'QUERY_COUNT_WARN', 50)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process(self, request):
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+        if self.headers:
+            response['X-DB-Queries'] = str(counter.count)
+            response['X-DB-Time'] = f'{counter.duration * 1000:.3f}'
+        level = logging.WARNING if counter.count >= self.warn_queries else logging.INFO
+        if lgr.isEnabledFor(level):
+            match = getattr(request, 'resolver_match', None)
+            lgr.log(level, json.dumps(dict(
+                counter.summary(), method=request.method, path=request.path,
+                view=getattr(match, 'view_name', None), status=response.status_code)))
+        return response
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Records the duration of every request under its view name and the code field of the JSON response,
+    see base.backend.metrics. Only the start of the body is searched for the code; streamed responses are
+    recorded with code "stream".
+    """
+
+    def __init__(self, get_response):
+        super(MetricsMiddleware, self).__init__(get_response)
+        self.registry = get_metrics_registry()
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        return self.observe(request, response, time.perf_counter() - start)
+
+    def process(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        return self.observe(request, response, time.perf_counter() - start)
+
+    def observe(self, request, response, duration):
+        try:
+            match = getattr(request, 'resolver_match', None)
+            self.registry.observe(getattr(match, 'view_name', None) or 'unmatched', self.response_code(response), duration)
+        except Exception as e:
+            lgr.exception(f"MetricsMiddleware exception: {e}")
+        return response
+
+    @staticmethod
+    def response_code(response):
+        if getattr(response, 'streaming', False):
+            return 'stream'
+        code = RESPONSE_CODE.search(response.content[:256])
+        return code.group(1).decode('ascii') if code else str(response.status_code)
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    """
+    Opens the read replica routing scope of each request (see base/backend/dbrouter.py), so that a request
+    starts reading from the replica and the primary pin of a previous request on the same thread is dropped
+    """
+
+    async def __acall__(self, request):
+        with routing_scope():
+            return await self.get_response(request)
+
+    def process(self, request):
+        with routing_scope():
+            return self.get_response(request)
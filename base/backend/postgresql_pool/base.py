@@ -0,0 +1,76 @@
+"""
+PostgreSQL backend serving connections from a psycopg_pool pool kept per process and database alias.
+Django closes the connection of a request when it finishes (CONN_MAX_AGE 0), with this backend closing hands
+the connection back to the pool, so requests skip the connect and authentication round-trips.
+Requires psycopg 3 and psycopg_pool, configured through DATABASE_POOL (see library_manager/database.py)
+e.g.
+    'ENGINE': 'base.backend.postgresql_pool',
+    'OPTIONS': {'pool': {'min_size': 2, 'max_size': 10, 'timeout': 30}},
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:  # pragma: no cover
+    ConnectionPool = None
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        """
+        The pool of this database alias, opened on first use
+        :rtype: ConnectionPool
+        """
+        pool = self._pools.get(self.alias)
+        if pool is not None:
+            return pool
+        if ConnectionPool is None or not base.is_psycopg3:
+            raise ImproperlyConfigured('The pooled PostgreSQL backend requires psycopg 3 and psycopg_pool')
+        with self._pools_lock:
+            if self.alias not in self._pools:
+                options = dict(self.settings_dict['OPTIONS'].get('pool') or {})
+                if self.settings_dict.get('CONN_HEALTH_CHECKS') and hasattr(ConnectionPool, 'check_connection'):
+                    options.setdefault('check', ConnectionPool.check_connection)
+                self._pools[self.alias] = ConnectionPool(
+                    kwargs=self.get_connection_params(), name=self.alias, open=True, **options)
+            return self._pools[self.alias]
+
+    def get_connection_params(self):
+        conn_params = super(DatabaseWrapper, self).get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = base.IsolationLevel(
+                base.IsolationLevel.READ_COMMITTED if isolation_level is None else isolation_level)
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {isolation_level} specified. Use one of the "
+                f"psycopg.IsolationLevel values.")
+        connection = self.pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # the pool rolls back an open transaction before lending the connection again
+                self.pool.putconn(self.connection)
+
+    @classmethod
+    def close_pools(cls):
+        """ Closes the pools e.g. at worker shutdown """
+        with cls._pools_lock:
+            for pool in cls._pools.values():
+                pool.close()
+            cls._pools.clear()
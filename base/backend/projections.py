@@ -0,0 +1,33 @@
+"""
+Projections of the admin changelists. A listing declares the related rows it displays (list_select_related,
+read in the same query) and the columns it displays (list_only), so that a changelist costs the same number
+of queries whatever the number of rows and does not read columns it never shows.
+The change form keeps reading full records, only the changelist is projected.
+"""
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+
+
+class ProjectedChangeList(ChangeList):
+    """ ChangeList restricting its queryset to the list_only columns of the admin """
+
+    def get_queryset(self, request):
+        queryset = super(ProjectedChangeList, self).get_queryset(request)
+        if self.model_admin.list_only:
+            queryset = queryset.only(*self.model_admin.list_only)
+        return queryset
+
+
+class ProjectedAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin whose changelist reads list_select_related and list_only.
+    e.g.
+        list_display = ('book', 'member', 'returned')
+        list_select_related = ('book__author', 'member')
+        list_only = ('returned', 'book__title', 'book__author__first_name', 'member__first_name')
+    A relation followed by list_select_related must be kept by list_only, naming one of its columns keeps it.
+    """
+    list_only = ()
+
+    def get_changelist(self, request, **kwargs):
+        return ProjectedChangeList
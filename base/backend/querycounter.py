@@ -0,0 +1,71 @@
+"""
+Counting of the SQL statements run by a block of code, used by QueryCountMiddleware and the query_budget
+pytest fixture
+"""
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import connections
+
+
+class QueryCounter(object):
+    """
+    Context manager recording the number of statements, the time spent in the database and the statements
+    run more than once (usually an N+1 loop) on the current thread's connections.
+    e.g.
+        with QueryCounter() as counter:
+            BooksAdministration().get_books(request)
+        counter.count, counter.duration, counter.duplicates
+    """
+
+    def __init__(self, using=None):
+        """
+        :param using: database alias to watch, all configured databases if None
+        :type using: str | None
+        """
+        self.aliases = [using] if using else list(connections)
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in self.aliases:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stack.close()
+        self._stack = None
+        return False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        """
+        Statements run more than once, the parameters are not part of the SQL so the same lookup for
+        different rows counts as a duplicate
+        :return: dict of sql -> times run, most repeated first
+        :rtype: dict
+        """
+        return {sql: count for sql, count in self.statements.most_common() if count > 1}
+
+    def summary(self, max_duplicates=5):
+        """
+        :return: the recorded figures, db_time in milliseconds
+        :rtype: dict
+        """
+        return {
+            'queries': self.count, 'db_time': round(self.duration * 1000, 3),
+            'duplicates': [
+                {'sql': sql, 'count': count} for sql, count in list(self.duplicates.items())[:max_duplicates]]}
@@ -0,0 +1,188 @@
+"""
+Caching of administration read responses in Django's cache framework (settings.RESPONSE_CACHE_ALIAS).
+Entries are keyed by the method, its parameters and the current version of every model the response is
+read from. Saving or deleting a row of one of those models bumps the model's version (see the receivers in
+books/signals.py and base/signals.py), so the entries built from the old rows are no longer looked up and
+expire after RESPONSE_CACHE_TIMEOUT seconds. Writes which do not send signals, e.g. queryset update() and
+bulk_create(), must call bump_model_version() themselves.
+A response is not stored when one of its models changed while it was read, nor when it may have been read
+from the read replica less than REPLICA_LAG_SECONDS after a change, the replica may not have the change yet
+and the stale rows would be cached under the new version.
+"""
+import functools
+import hashlib
+import inspect
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from base.backend.dbrouter import get_replica_alias, is_pinned
+from base.backend.utils import codec
+
+lgr = logging.getLogger(__name__)
+
+VERSION_PREFIX = 'response-version'
+RESPONSE_PREFIX = 'response'
+# request parameters which do not change the response
+IGNORED_PARAMETERS = ('token',)
+KEY_TYPES = (str, int, float, bool, type(None), uuid.UUID)
+
+
+def get_response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def model_label(model):
+    """
+    :param model: model class, instance or label e.g. books.Books
+    :rtype: str
+    """
+    return model if isinstance(model, str) else model._meta.label
+
+
+def version_key(label):
+    return f'{VERSION_PREFIX}:{label}'
+
+
+def get_model_versions(labels):
+    """
+    Returns the current version of each model. A version missing from the cache, e.g. after an eviction,
+    is started from the clock so that it never matches the version of an entry written before.
+    :param labels: model labels
+    :return: the versions in the order of labels
+    :rtype: list
+    """
+    cache = get_response_cache()
+    keys = [version_key(label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(model):
+    """
+    Gives the model a new version, invalidating the cached responses read from it. The version is bumped
+    again when the current transaction commits since responses cached before the commit may have read the
+    old rows.
+    :param model: model class, instance or label
+    """
+    label = model_label(model)
+
+    def bump():
+        try:
+            get_response_cache().set(version_key(label), time.time_ns(), timeout=None)
+        except Exception as e:
+            lgr.exception(f"bump_model_version {label} exception: {e}")
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def response_key(name, versions, args, kwargs):
+    """
+    :return: the cache key of the response or None if the parameters cannot be part of a key
+    :rtype: str | None
+    """
+    try:
+        parameters = codec.dumps([
+            [arg for arg in args if isinstance(arg, KEY_TYPES)],
+            sorted([key, value] for key, value in kwargs.items() if key not in IGNORED_PARAMETERS)])
+    except TypeError:
+        return None
+    digest = hashlib.sha1(parameters).hexdigest()
+    return f"{RESPONSE_PREFIX}:{name}:{'.'.join(str(version) for version in versions)}:{digest}"
+
+
+def may_be_stale(labels, versions):
+    """
+    Whether a response read at versions may hold old rows
+    :param labels: the model labels the response is read from
+    :param versions: the versions of the models before the response was read
+    :rtype: bool
+    """
+    if get_model_versions(labels) != versions:
+        return True
+    if get_replica_alias() is None or is_pinned():
+        return False
+    # the versions are the times of the changes, see bump_model_version
+    lag = getattr(settings, 'REPLICA_LAG_SECONDS', 5) * 1e9
+    now = time.time_ns()
+    return any(now - version < lag for version in versions)
+
+
+def is_cacheable(response):
+    """ Errors and streamed listings are not cached """
+    if not isinstance(response, dict) or response.get('code') == '999.999.999':
+        return False
+    data = response.get('data')
+    return data is None or isinstance(data, (list, dict))
+
+
+def cached_response(*models):
+    """
+    Caches the dict responses of an administration read method until one of models changes.
+    Positional arguments other than str, number, UUID and None (self, the request) are not part of the key.
+    Coroutine functions are supported, the cache is read and written in the event loop.
+    e.g.
+        @cached_response('books.Books', 'base.State')
+        def get_books(self, request, **kwargs):
+    :param models: labels of the models the response is read from
+    """
+    labels = [model_label(model) for model in models]
+
+    def decorator(func):
+        name = func.__qualname__
+
+        def lookup(args, kwargs):
+            """
+            :return: the key, the model versions and the cached response, (None, None, None) when the response
+            cannot be cached
+            """
+            if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+                return None, None, None
+            key = versions = None
+            try:
+                versions = get_model_versions(labels)
+                key = response_key(name, versions, args, kwargs)
+                return key, versions, get_response_cache().get(key) if key else None
+            except Exception as e:
+                lgr.exception(f"cached_response {name} lookup exception: {e}")
+            return key, versions, None
+
+        def store(key, versions, response):
+            if key and is_cacheable(response):
+                try:
+                    if not may_be_stale(labels, versions):
+                        get_response_cache().set(
+                            key, response, timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+                except Exception as e:
+                    lgr.exception(f"cached_response {name} store exception: {e}")
+            return response
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key, versions, response = lookup(args, kwargs)
+                if response is not None:
+                    return response
+                return store(key, versions, await func(*args, **kwargs))
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key, versions, response = lookup(args, kwargs)
+            if response is not None:
+                return response
+            return store(key, versions, func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
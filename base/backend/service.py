@@ -1,4 +1,5 @@
 from base.backend.servicebase import ServiceBase
+from base.backend.stateregistry import StateRegistry
 from base.models import State, TransactionType, Transaction, UserIdentity
 
 
@@ -6,6 +7,16 @@ class StateService(ServiceBase):
     """ Service class for state"""
     manager = State.objects
 
+    def get(self, *args, **kwargs):
+        """
+        Resolves lookups by name alone from the in-process StateRegistry,
+        anything else falls through to the database.
+        """
+        if not args and list(kwargs) == ['name']:
+            return StateRegistry.get(name=kwargs['name'])
+        return super(StateService, self).get(*args, **kwargs)
+
+
 class TransactionTypeService(ServiceBase):
     """ Service for Transaction type"""
     manager = TransactionType.objects
@@ -16,4 +27,6 @@ class TransactionService(ServiceBase):
 
 class UserIdentityService(ServiceBase):
     """ Service for transaction """
-    manager = UserIdentity.objects
\ No newline at end of file
+    manager = UserIdentity.objects
+    # token authentication and login use the user of the identity
+    select_related = ('user',)
@@ -6,13 +6,37 @@ import logging
 lgr = logging.getLogger(__name__)
 
 
+class ProjectedManager(object):
+    """
+    Stands in for the manager of a service with locking, projections or annotations. Every attribute access
+    builds a fresh queryset from the manager so that a service instance shared between threads never mutates
+    a queryset another caller is using (create and bulk_create mark their queryset for write).
+    """
+
+    def __init__(self, manager, build):
+        self._manager = manager
+        self._build = build
+
+    @property
+    def model(self):
+        return self._manager.model
+
+    def __getattr__(self, name):
+        return getattr(self._build(self._manager.all()), name)
+
+
 class ServiceBase(object):
     """
     Handles CRUD methods
     """
     manager = None
+    batch_size = 500
+    # default projections of the records read through the service, e.g. ('author', 'category') and
+    # ('title', 'author__first_name'). A field followed by select_related must not be left out of only.
+    select_related = ()
+    only = ()
 
-    def __int__(self, lock_for_update=False, *args, **annotations):
+    def __init__(self, lock_for_update=False, *args, **annotations):
         """
          Initialize service to ensure if transaction is locked if need be.
         :param lock_for_update: determines whether to lock model
@@ -22,18 +46,30 @@ class ServiceBase(object):
         :return:
         """
         super(ServiceBase, self).__init__()
-        if lock_for_update and self.manager:
-            self.manager = self.manager.select_for_update()
-            if args:  # set up ordered tuples
-                for arg in args:
-                    if isinstance(args, tuple):
-                        try:
-                            data_dict = {'%s' % arg[0]: arg[1]}
-                            self.manager = self.manager.annotate(**data_dict)
-                        except Exception as e:
-                            lgr.warning(f"Initialization of args error {e}")
-            if annotations:
-                self.manager = self.manager.annotate(**annotations)
+        if self.manager is None:
+            return
+        ordered = [{'%s' % arg[0]: arg[1]} for arg in args if isinstance(arg, tuple)]  # set up ordered tuples
+        if lock_for_update or self.select_related or self.only or ordered or annotations:
+            self.manager = ProjectedManager(
+                self.manager, lambda queryset: self._project(queryset, lock_for_update, ordered, annotations))
+
+    def _project(self, queryset, lock_for_update, ordered, annotations):
+        """
+        Applies the locking, default projections and annotations of the service to a fresh queryset.
+        :rtype: QuerySet
+        """
+        if lock_for_update:
+            # FOR UPDATE would lock the joined rows of select_related too
+            queryset = queryset.select_for_update()
+        elif self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.only:
+            queryset = queryset.only(*self.only)
+        for data_dict in ordered:
+            queryset = queryset.annotate(**data_dict)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
 
     def get(self, *args, **kwargs):
         """
@@ -43,7 +79,7 @@ class ServiceBase(object):
         :return: return an instance of manager
         """
         try:
-            if self.manager:
+            if self.manager is not None:
                 return self.manager.get(*args, **kwargs)
         except Exception as e:
             lgr.exception(f"{self.manager.model.__name__} service get exception: {e}")
@@ -57,7 +93,7 @@ class ServiceBase(object):
         :return: Queryset | None
         """
         try:
-            if self.manager:
+            if self.manager is not None:
                 return self.manager.filter(*args, **kwargs)
         except self.manager.model.DoesNotExist as e:
             lgr.exception(f"{self.manager.model.__name__} service filter exception: {e}")
@@ -72,7 +108,7 @@ class ServiceBase(object):
         :return: Created obj
         """
         try:
-            if self.manager:
+            if self.manager is not None:
                 return self.manager.create(**kwargs)
         except Exception as e:
             lgr.exception(f"{self.manager.model.__name__} service filter General  exception: {e}")
@@ -96,3 +132,133 @@ class ServiceBase(object):
         except Exception as e:
             lgr.exception(f"{self.manager.model.__name__} service update General  exception: {e}")
         return None
+
+    def _build(self, objs):
+        """
+        Turns dicts into unsaved model instances, model instances are passed through
+        :param objs: iterable of dicts or model instances
+        :return: list of model instances
+        """
+        return [self.manager.model(**obj) if isinstance(obj, dict) else obj for obj in objs]
+
+    def bulk_create(self, objs, batch_size=None, **kwargs):
+        """
+        Creates many records with batched INSERTs. save() and the model signals are not called.
+        :param objs: iterable of dicts or unsaved model instances
+        :param batch_size: number of rows per INSERT, defaults to the service batch_size
+        :param kwargs: other arguments to pass to bulk_create e.g. ignore_conflicts
+        :return: list of created objects
+        :rtype: list | None
+        """
+        try:
+            if self.manager is not None:
+                return self.manager.bulk_create(self._build(objs), batch_size=batch_size or self.batch_size, **kwargs)
+        except Exception as e:
+            lgr.exception(f"{self.manager.model.__name__} service bulk_create exception: {e}")
+        return None
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        """
+        Updates the given fields of many records with batched UPDATEs
+        :param objs: iterable of model instances carrying the new values
+        :param fields: names of the fields to write
+        :param batch_size: number of rows per UPDATE, defaults to the service batch_size
+        :return: number of rows updated
+        :rtype: int | None
+        """
+        try:
+            if self.manager is not None:
+                return self.manager.bulk_update(list(objs), fields, batch_size=batch_size or self.batch_size)
+        except Exception as e:
+            lgr.exception(f"{self.manager.model.__name__} service bulk_update exception: {e}")
+        return None
+
+    def update_where(self, *args, **kwargs):
+        """
+        Updates every record matching the filters with a single UPDATE, without loading them
+        e.g. BookService().update_where({'category': category}, status=state)
+        :param args: dicts of lookups or Q objects to filter by
+        :param kwargs: the values to set, use F() expressions for values relative to the row
+        :return: number of rows updated
+        :rtype: int | None
+        """
+        try:
+            if self.manager is not None:
+                filters = [arg for arg in args if not isinstance(arg, dict)]
+                lookups = {k: v for arg in args if isinstance(arg, dict) for k, v in arg.items()}
+                return self.manager.filter(*filters, **lookups).update(**kwargs)
+        except Exception as e:
+            lgr.exception(f"{self.manager.model.__name__} service update_where exception: {e}")
+        return None
+
+    def upsert(self, objs, unique_fields, update_fields, batch_size=None):
+        """
+        Inserts the records, updating update_fields of those that conflict on unique_fields
+        :param objs: iterable of dicts or unsaved model instances
+        :param unique_fields: fields of the unique constraint to match existing records on
+        :param update_fields: fields to overwrite on existing records
+        :param batch_size: number of rows per statement, defaults to the service batch_size
+        :return: list of the objects passed
+        :rtype: list | None
+        """
+        try:
+            if self.manager is not None:
+                return self.manager.bulk_create(
+                    self._build(objs), batch_size=batch_size or self.batch_size, update_conflicts=True,
+                    unique_fields=unique_fields, update_fields=update_fields)
+        except Exception as e:
+            lgr.exception(f"{self.manager.model.__name__} service upsert exception: {e}")
+        return None
+
+    async def aget(self, *args, **kwargs):
+        """
+        Async variant of get, retrieves a single record through the async ORM
+        :return: the record or None
+        """
+        try:
+            if self.manager is not None:
+                return await self.manager.aget(*args, **kwargs)
+        except Exception as e:
+            lgr.exception(f"{self.manager.model.__name__} service aget exception: {e}")
+        return None
+
+    async def afilter(self, *args, **kwargs):
+        """
+        Async variant of filter. The records are read with async iteration, chain on filter() and iterate
+        with async for when the queryset needs more than filters e.g. annotations or values()
+        :return: list of the records matching the filters
+        :rtype: list | None
+        """
+        try:
+            if self.manager is not None:
+                return [record async for record in self.manager.filter(*args, **kwargs)]
+        except Exception as e:
+            lgr.exception(f"{self.manager.model.__name__} service afilter exception: {e}")
+        return None
+
+    async def acreate(self, **kwargs):
+        """
+        Async variant of create
+        :return: Created obj
+        """
+        try:
+            if self.manager is not None:
+                return await self.manager.acreate(**kwargs)
+        except Exception as e:
+            lgr.exception(f"{self.manager.model.__name__} service acreate exception: {e}")
+        return None
+
+    async def aupdate_where(self, *args, **kwargs):
+        """
+        Async variant of update_where
+        :return: number of rows updated
+        :rtype: int | None
+        """
+        try:
+            if self.manager is not None:
+                filters = [arg for arg in args if not isinstance(arg, dict)]
+                lookups = {k: v for arg in args if isinstance(arg, dict) for k, v in arg.items()}
+                return await self.manager.filter(*filters, **lookups).aupdate(**kwargs)
+        except Exception as e:
+            lgr.exception(f"{self.manager.model.__name__} service aupdate_where exception: {e}")
+        return None
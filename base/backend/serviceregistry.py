@@ -0,0 +1,48 @@
+"""
+Process-wide service instances. A service keeps no state between calls, so the administration classes share
+one instance per service class and locking mode instead of constructing a service for every query.
+The default projections of a service are its select_related and only attributes (see ServiceBase).
+"""
+import threading
+
+
+class ServiceRegistry(object):
+    """
+    Map of (service class, lock_for_update) -> service instance, created on first use.
+    """
+    _lock = threading.Lock()
+    _services = {}
+
+    @classmethod
+    def get(cls, service_class, lock_for_update=False):
+        """
+        Retrieves the shared instance of a service.
+        :param service_class: the ServiceBase subclass
+        :type service_class: type
+        :param lock_for_update: whether the instance locks the rows it reads (select_for_update)
+        :type lock_for_update: bool
+        :return: the service instance
+        :rtype: ServiceBase
+        """
+        key = (service_class, bool(lock_for_update))
+        service = cls._services.get(key)
+        if service is not None:
+            return service
+        with cls._lock:
+            if key not in cls._services:
+                cls._services[key] = service_class(lock_for_update=bool(lock_for_update))
+            return cls._services[key]
+
+    @classmethod
+    def clear(cls):
+        """ Drops the instances, e.g. after the projections of a service class changed """
+        with cls._lock:
+            cls._services = {}
+
+
+def get_service(service_class, lock_for_update=False):
+    """
+    :return: the shared instance of service_class
+    :rtype: ServiceBase
+    """
+    return ServiceRegistry.get(service_class, lock_for_update)
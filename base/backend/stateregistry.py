@@ -0,0 +1,64 @@
+"""
+In-process registry of State records so that lookups by name do not hit the database on every call
+"""
+import logging
+import threading
+
+lgr = logging.getLogger(__name__)
+
+
+class StateRegistry(object):
+    """
+    Process-wide name -> State map. All states are loaded with a single query on first use and
+    kept until a State is saved or deleted (see base.signals).
+    """
+    _lock = threading.Lock()
+    _by_name = None
+    _by_id = None
+
+    @classmethod
+    def _load(cls):
+        """
+        Loads every state into memory if not already loaded.
+        :return: tuple of (name map, id map)
+        :rtype: tuple
+        """
+        by_name, by_id = cls._by_name, cls._by_id
+        if by_name is not None:
+            return by_name, by_id
+        with cls._lock:
+            if cls._by_name is None:
+                from base.models import State
+                states = list(State.objects.all())
+                cls._by_id = {str(state.id): state for state in states}
+                cls._by_name = {state.name: state for state in states}
+            return cls._by_name, cls._by_id
+
+    @classmethod
+    def get(cls, name=None, pk=None):
+        """
+        Retrieves a state by name or primary key.
+        :param name: the name of the state e.g. Active
+        :type name: str | None
+        :param pk: the unique identifier of the state
+        :return: the State or None if not found
+        :rtype: State | None
+        """
+        try:
+            by_name, by_id = cls._load()
+            if name is not None:
+                return by_name.get(name)
+            if pk is not None:
+                return by_id.get(str(pk))
+        except Exception as e:
+            lgr.exception(f"StateRegistry get exception: {e}")
+        return None
+
+    @classmethod
+    def invalidate(cls, **kwargs):
+        """
+        Drops the loaded states so that the next lookup reloads them. Accepts signal kwargs.
+        """
+        with cls._lock:
+            cls._by_name = None
+            cls._by_id = None
@@ -0,0 +1,135 @@
+"""
+Token validation for user_login_required backed by a bounded, in-process TTL cache
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from base.backend.service import UserIdentityService
+from base.backend.serviceregistry import get_service
+from base.backend.utils.utilities import token_expiry
+
+lgr = logging.getLogger(__name__)
+
+
+class TokenCache(object):
+    """
+    LRU map of token -> (identity id, user, expires_at, cached at). Entries live for at most
+    TOKEN_CACHE_TTL_SECONDS so that revocations made by other processes are picked up.
+    """
+    _lock = threading.Lock()
+    _entries = OrderedDict()
+
+    @classmethod
+    def get(cls, token):
+        """
+        :param token: the access token
+        :return: the cached entry or None if missing or stale
+        :rtype: dict | None
+        """
+        with cls._lock:
+            entry = cls._entries.get(token)
+            if entry is None:
+                return None
+            if time.monotonic() - entry['cached_at'] > getattr(settings, 'TOKEN_CACHE_TTL_SECONDS', 30):
+                del cls._entries[token]
+                return None
+            cls._entries.move_to_end(token)
+            return entry
+
+    @classmethod
+    def set(cls, token, identity_id, user, expires_at):
+        with cls._lock:
+            cls._entries[token] = {
+                'identity_id': identity_id, 'user': user, 'expires_at': expires_at, 'cached_at': time.monotonic()}
+            cls._entries.move_to_end(token)
+            while len(cls._entries) > getattr(settings, 'TOKEN_CACHE_MAX_SIZE', 10000):
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def discard(cls, token, **kwargs):
+        with cls._lock:
+            cls._entries.pop(token, None)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+
+
+def authenticate_token(token):
+    """
+    Validates the token and slides its expiry forward.
+    The expiry is only written once TOKEN_EXTEND_THRESHOLD of the token lifetime has been used up.
+    @param token: the access token sent by the client
+    @type token: str
+    @return: the user owning the token or None if the token is invalid or expired
+    @rtype: User | None
+    """
+    now = timezone.now()
+    entry = TokenCache.get(token)
+    if entry is None:
+        user_auth = next(iter(identity_lookup(token, now)), None)
+        if not user_auth:
+            return None
+        TokenCache.set(token, user_auth.id, user_auth.user, user_auth.expires_at)
+        entry = TokenCache.get(token)
+    if entry is None or entry['expires_at'] <= now:
+        TokenCache.discard(token)
+        return None
+    if should_extend(entry, now):
+        expires_at = token_expiry()
+        try:
+            get_service(UserIdentityService).filter(id=entry['identity_id']).update(expires_at=expires_at, date_modified=now)
+            entry['expires_at'] = expires_at
+        except Exception as e:
+            lgr.exception(f"authenticate_token extend exception: {e}")
+    return entry['user']
+
+
+async def aauthenticate_token(token):
+    """
+    Async variant of authenticate_token for async views, the identity is read and extended through the async ORM
+    @param token: the access token sent by the client
+    @type token: str
+    @return: the user owning the token or None if the token is invalid or expired
+    @rtype: User | None
+    """
+    now = timezone.now()
+    entry = TokenCache.get(token)
+    if entry is None:
+        user_auth = next(iter([identity async for identity in identity_lookup(token, now)]), None)
+        if not user_auth:
+            return None
+        TokenCache.set(token, user_auth.id, user_auth.user, user_auth.expires_at)
+        entry = TokenCache.get(token)
+    if entry is None or entry['expires_at'] <= now:
+        TokenCache.discard(token)
+        return None
+    if should_extend(entry, now):
+        expires_at = token_expiry()
+        if await get_service(UserIdentityService).aupdate_where(
+                {'id': entry['identity_id']}, expires_at=expires_at, date_modified=now) is not None:
+            entry['expires_at'] = expires_at
+    return entry['user']
+
+
+def identity_lookup(token, now):
+    """
+    :return: the queryset of the unexpired identity owning the token, with its user
+    :rtype: QuerySet
+    """
+    return get_service(UserIdentityService).filter(
+        token=token, expires_at__gt=now, user__isnull=False).order_by()[:1]
+
+
+def should_extend(entry, now):
+    """ Whether TOKEN_EXTEND_THRESHOLD of the token lifetime has been used up """
+    lifetime = timedelta(seconds=settings.TOKEN_EXPIRY_SECONDS)
+    threshold = getattr(settings, 'TOKEN_EXTEND_THRESHOLD', 0.5)
+    return entry['expires_at'] - now <= lifetime * (1 - threshold)
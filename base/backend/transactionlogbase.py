@@ -2,13 +2,25 @@
 Transaction logs
 """
 import logging
+
+from django.conf import settings
 from django.db import transaction
 from base.backend.service import StateService, TransactionService, TransactionTypeService
+from base.backend.serviceregistry import get_service
+from base.backend.transactionlogwriter import get_transaction_log_writer
 from base.backend.utils.utilities import get_request_data
 
 lgr = logging.getLogger(__name__)
 
 
+def log_asynchronously():
+    """
+    Whether transactions are queued to the TransactionLogWriter instead of written inline.
+    @rtype: bool
+    """
+    return getattr(settings, 'TRANSACTION_LOG_ASYNC', False)
+
+
 class TransactionLogBase(object):
     """
     The class for logging transactions.
@@ -25,12 +37,36 @@ class TransactionLogBase(object):
         """
         try:
             if 'state' not in kwargs:
-                kwargs['state'] = StateService().get(name='Completed')
-            return TransactionService().update(transactions.id, **kwargs)
+                kwargs['state'] = get_service(StateService).get(name='Completed')
+            if log_asynchronously():
+                return get_transaction_log_writer().update(transactions, **kwargs)
+            return get_service(TransactionService).update(transactions.id, **kwargs)
         except Exception as e:
             lgr.exception('complete_transaction Exception: %s', e)
         return None
 
+    @staticmethod
+    def complete_transaction_atomically(transactions, **kwargs):
+        """
+        Marks the transaction object as complete as part of the atomic block making the change it records.
+        Unlike complete_transaction errors are raised, so that the change is rolled back when its audit entry
+        cannot be written. With the asynchronous writer the update is queued once the block commits.
+        :param transactions: Transaction obj we are updating
+        :type transactions: Transaction
+        :param kwargs: arguments to pass during updating
+        :return: The transaction updated
+        :rtype: Transaction
+        """
+        if 'state' not in kwargs:
+            kwargs['state'] = get_service(StateService).get(name='Completed')
+        if log_asynchronously():
+            transaction.on_commit(lambda: get_transaction_log_writer().update(transactions, **kwargs))
+            return transactions
+        for key, value in kwargs.items():
+            setattr(transactions, key, value)
+        transactions.save(update_fields=list(kwargs) + ['date_modified'])
+        return transactions
+
     @staticmethod
     def log_transaction(transaction_type, **kwargs):
         """
@@ -42,23 +78,40 @@ class TransactionLogBase(object):
         :rtype: Transaction | None
         """
         try:
+            if log_asynchronously():
+                transaction_type = get_service(TransactionTypeService).get(name=transaction_type)
+                if not transaction_type:
+                    return None
+                return get_transaction_log_writer().create(
+                    transaction_type=transaction_type, **TransactionLogBase.__transaction_kwargs(**kwargs))
             with transaction.atomic():
-                transaction_type = TransactionTypeService().get(name=transaction_type)
-                if 'state' not in kwargs:
-                    kwargs['state'] = StateService().get(name="Active")
-                if 'request' in kwargs:
-                    request = kwargs.pop('request', {})
-                    kwargs['user'] = getattr(request, 'user', None)
-                    data = get_request_data(request)
-                    if data:
-                        kwargs['source_ip'] = data.get('source_ip', None)
-                        kwargs['request'] = data
-                return TransactionService().create(transaction_type=transaction_type, **kwargs)
+                transaction_type = get_service(TransactionTypeService).get(name=transaction_type)
+                return get_service(TransactionService).create(
+                    transaction_type=transaction_type, **TransactionLogBase.__transaction_kwargs(**kwargs))
         except Exception as e:
             print(f"error in logs {e}")
             lgr.exception('log_transaction Exception: %s', e)
         return None
 
+    @staticmethod
+    def __transaction_kwargs(**kwargs):
+        """
+        Fills in the default state and the request details for a new transaction.
+        :param kwargs: key value arguments to generate the transaction.
+        :return: the kwargs to create the transaction with
+        :rtype: dict
+        """
+        if 'state' not in kwargs:
+            kwargs['state'] = get_service(StateService).get(name="Active")
+        if 'request' in kwargs:
+            request = kwargs.pop('request', {})
+            kwargs['user'] = getattr(request, 'user', None)
+            data = get_request_data(request)
+            if data:
+                kwargs['source_ip'] = data.get('source_ip', None)
+                kwargs['request'] = data
+        return kwargs
+
     @staticmethod
     def mark_transaction_failed(transaction_obj, **kwargs):
         """
@@ -71,10 +124,12 @@ class TransactionLogBase(object):
         """
         try:
             if kwargs is None:
-                kwargs = {'state': StateService().get(name='Failed')}
+                kwargs = {'state': get_service(StateService).get(name='Failed')}
             else:
-                kwargs['state'] = StateService().get(name='Failed')
-            return TransactionService().update(transaction_obj.id, **kwargs)
+                kwargs['state'] = get_service(StateService).get(name='Failed')
+            if log_asynchronously():
+                return get_transaction_log_writer().update(transaction_obj, **kwargs)
+            return get_service(TransactionService).update(transaction_obj.id, **kwargs)
         except Exception as e:
             lgr.exception('mark_transaction_failed Exception: %s', e)
         return None
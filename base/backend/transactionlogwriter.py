@@ -0,0 +1,373 @@
+"""
+Asynchronous, batched writer for Transaction audit records.
+Enabled with settings.TRANSACTION_LOG_ASYNC, see TransactionLogBase.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+
+from base.backend.utils.utilities import process_running
+from base.models import Transaction
+
+lgr = logging.getLogger(__name__)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_transaction_log_writer():
+    """
+    Returns the process wide writer, creating it from settings on first use.
+    @rtype: TransactionLogWriter
+    """
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = TransactionLogWriter(
+                    batch_size=getattr(settings, 'TRANSACTION_LOG_BATCH_SIZE', 200),
+                    flush_interval=getattr(settings, 'TRANSACTION_LOG_FLUSH_INTERVAL', 2.0),
+                    spill_dir=getattr(settings, 'TRANSACTION_LOG_SPILL_DIR', None),
+                    fsync=getattr(settings, 'TRANSACTION_LOG_SPILL_FSYNC', False),
+                    max_attempts=getattr(settings, 'TRANSACTION_LOG_MAX_ATTEMPTS', 3))
+                _writer.start()
+    return _writer
+
+
+class TransactionLogWriter(object):
+    """
+    Queues Transaction creates/updates in memory and writes them with bulk_create/bulk_update.
+    Every queued record is appended to a spill file before it is acknowledged, the spill segment is
+    removed once its records are in the database. Segments left behind by a crashed process are replayed
+    by recover(). When a batch fails its records are written one at a time. A record which fails while others
+    of its batch are written counts an attempt, after max_attempts it is moved to a dead-letter file
+    (dead-letter-<pid>-<token>.jsonl) instead of being retried forever. When no record can be written, most
+    likely the database is down, every record and its spill segments are kept and the worker backs off, doubling
+    its wait up to max_backoff seconds.
+    The records keep the time they were queued, date_created is the time of the event not of the flush.
+    """
+    max_backoff = 60.0
+
+    def __init__(self, batch_size=200, flush_interval=2.0, spill_dir=None, fsync=False, max_attempts=3):
+        """
+        :param batch_size: number of pending records that triggers a flush, also the bulk batch size
+        :type batch_size: int
+        :param flush_interval: maximum seconds a record waits before being flushed
+        :type flush_interval: float
+        :param spill_dir: directory for the spill files, no spill file is written if None
+        :type spill_dir: str | Path | None
+        :param fsync: whether to fsync the spill file on every record
+        :type fsync: bool
+        :param max_attempts: flushes a record may fail before it is dead-lettered
+        :type max_attempts: int
+        """
+        self.batch_size = int(batch_size)
+        self.flush_interval = float(flush_interval)
+        self.spill_dir = str(spill_dir) if spill_dir else None
+        self.fsync = fsync
+        self.max_attempts = max(int(max_attempts), 1)
+        self._reset()
+
+    def _reset(self):
+        """ (Re)initialise the per process state. Called again in a forked child. """
+        self._pid = os.getpid()
+        self._token = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._segment = 0
+        self._spill = None
+        self._flushing_segments = []
+        self._delay = self.flush_interval
+        self._retry_at = 0.0
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def start(self):
+        """ Starts the background flush worker """
+        if self._pid != os.getpid():
+            self._reset()
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='transaction-log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """ Stops the worker and writes whatever is still pending """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self):
+        self.recover()
+        while not self._stopped.is_set():
+            self._wakeup.wait(self._delay)
+            self._wakeup.clear()
+            if not self._stopped.is_set() and time.monotonic() < self._retry_at:
+                # backing off, a full batch does not bring the retry forward
+                continue
+            self.flush()
+            close_old_connections()
+
+    def create(self, **kwargs):
+        """
+        Queues the creation of a Transaction.
+        :param kwargs: the Transaction fields
+        :return: the unsaved Transaction, its id is already assigned
+        :rtype: Transaction
+        """
+        instance = Transaction(**kwargs)
+        instance.date_created = instance.date_modified = timezone.now()
+        values = {}
+        for field in Transaction._meta.concrete_fields:
+            if not field.primary_key:
+                values[field.attname] = getattr(instance, field.attname)
+        self._enqueue('create', instance.id, values)
+        return instance
+
+    def update(self, instance, **kwargs):
+        """
+        Applies kwargs to the Transaction and queues the update.
+        :param instance: the transaction being updated
+        :type instance: Transaction
+        :param kwargs: the fields to update
+        :return: the updated Transaction
+        :rtype: Transaction
+        """
+        values = {}
+        for key, value in kwargs.items():
+            setattr(instance, key, value)
+            field = Transaction._meta.get_field(key)
+            values[field.attname] = getattr(instance, field.attname)
+        instance.date_modified = timezone.now()
+        values['date_modified'] = instance.date_modified
+        self._enqueue('update', instance.id, values)
+        return instance
+
+    @staticmethod
+    def _serialize(values):
+        """ Converts values to what the column stores so that the record can be spilled as JSON """
+        data = {}
+        for attname, value in values.items():
+            field = Transaction._meta.get_field(attname)
+            if value is None:
+                data[attname] = None
+            elif field.is_relation or isinstance(value, uuid.UUID):
+                data[attname] = str(value)
+            elif attname in ('date_created', 'date_modified'):
+                data[attname] = value.isoformat()
+            else:
+                data[attname] = field.get_prep_value(value)
+        return data
+
+    def _enqueue(self, op, pk, values):
+        if self._pid != os.getpid():
+            self._reset()
+            self.start()
+        record = {'op': op, 'id': str(pk), 'values': self._serialize(values)}
+        with self._lock:
+            self._spill_record(record)
+            self._merge(self._pending, record)
+            size = len(self._pending)
+        if size >= self.batch_size:
+            self._wakeup.set()
+
+    @staticmethod
+    def _merge(pending, record):
+        """ Folds a record into pending, an update of a queued create stays a create """
+        current = pending.get(record['id'])
+        if current is None:
+            pending[record['id']] = {'op': record['op'], 'values': dict(record['values'])}
+        else:
+            if record['op'] == 'create':
+                current['op'] = 'create'
+            current['values'].update(record['values'])
+
+    def _segment_path(self, segment):
+        return os.path.join(self.spill_dir, f"transactions-{self._pid}-{self._token}-{segment}.jsonl")
+
+    def _spill_record(self, record):
+        if not self.spill_dir:
+            return
+        if self._spill is None:
+            self._spill = open(self._segment_path(self._segment), 'a', encoding='utf-8')
+        self._spill.write(json.dumps(record) + '\n')
+        self._spill.flush()
+        if self.fsync:
+            os.fsync(self._spill.fileno())
+
+    def flush(self):
+        """
+        Writes all pending records to the database.
+        :return: the number of records written
+        :rtype: int
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if self._spill is not None:
+                    self._spill.close()
+                    self._spill = None
+                    self._flushing_segments.append(self._segment_path(self._segment))
+                    self._segment += 1
+            if not pending:
+                return 0
+            try:
+                self._write(pending)
+                failed = {}
+            except Exception as e:
+                lgr.exception(f"TransactionLogWriter flush exception: {e}")
+                failed = self._write_each(pending)
+            if failed and len(failed) == len(pending):
+                # nothing could be written, keep every record without counting an attempt and back off
+                self._requeue(pending)
+                self._delay = min(self._delay * 2, self.max_backoff)
+                self._retry_at = time.monotonic() + self._delay
+                lgr.warning(f"TransactionLogWriter could not write {len(pending)} records, retrying in {self._delay}s")
+                return 0
+            self._delay, self._retry_at = self.flush_interval, 0.0
+            retry = self._dead_letter(failed)
+            if retry:
+                # the spill segments are kept until the retried records are written
+                self._requeue(retry)
+                return len(pending) - len(failed)
+            for path in self._flushing_segments:
+                self._remove(path)
+            self._flushing_segments = []
+            return len(pending) - len(failed)
+
+    def _requeue(self, records):
+        """ Puts records back in front of the records queued since the flush started """
+        with self._lock:
+            for pk, record in self._pending.items():
+                self._merge(records, dict(record, id=pk))
+            self._pending = records
+
+    def _write(self, pending, ignore_conflicts=False):
+        """
+        Inserts the queued creates and applies the queued updates grouped by the fields they touch.
+        :param pending: dict of id -> {'op', 'values'}
+        :param ignore_conflicts: skip creates whose id already exists, used when replaying spill files
+        """
+        creates = []
+        updates = {}
+        for pk, record in pending.items():
+            obj = Transaction(id=pk, **record['values'])
+            if record['op'] == 'create':
+                creates.append(obj)
+            else:
+                updates.setdefault(tuple(sorted(record['values'])), []).append(obj)
+        with transaction.atomic():
+            if creates:
+                Transaction.objects.bulk_create(
+                    creates, batch_size=self.batch_size, ignore_conflicts=ignore_conflicts)
+                # bulk_create stamps the dates with the time of the flush, restore the time of the event
+                dated = []
+                for obj in creates:
+                    values = pending[str(obj.pk)]['values']
+                    if values.get('date_created'):
+                        obj.date_created, obj.date_modified = values['date_created'], values['date_modified']
+                        dated.append(obj)
+                if dated:
+                    Transaction.objects.bulk_update(
+                        dated, ['date_created', 'date_modified'], batch_size=self.batch_size)
+            for fields, objs in updates.items():
+                Transaction.objects.bulk_update(objs, fields, batch_size=self.batch_size)
+
+    def _write_each(self, pending, ignore_conflicts=False):
+        """
+        Writes the records of a failed batch one at a time so that a bad record does not hold back the others.
+        :param pending: dict of id -> {'op', 'values', 'attempts'}
+        :return: the records which failed, their attempts incremented
+        :rtype: dict
+        """
+        failed = {}
+        for pk, record in pending.items():
+            try:
+                self._write({pk: record}, ignore_conflicts=ignore_conflicts)
+            except Exception as e:
+                lgr.warning(f"TransactionLogWriter failed to write transaction {pk}: {e}")
+                failed[pk] = dict(record, attempts=record.get('attempts', 0) + 1)
+        return failed
+
+    def _dead_letter(self, failed, attempts=None):
+        """
+        Moves the failed records which used up their attempts to the dead-letter file.
+        :param failed: dict of id -> {'op', 'values', 'attempts'}
+        :param attempts: attempts after which a record is given up, defaults to max_attempts
+        :return: the records left to retry
+        :rtype: dict
+        """
+        attempts = attempts or self.max_attempts
+        retry = {}
+        for pk, record in failed.items():
+            if record['attempts'] < attempts:
+                retry[pk] = record
+                continue
+            lgr.error(f"TransactionLogWriter giving up on transaction {pk} after {record['attempts']} attempts")
+            if self.spill_dir:
+                path = os.path.join(self.spill_dir, f"dead-letter-{self._pid}-{self._token}.jsonl")
+                with open(path, 'a', encoding='utf-8') as dead_letter:
+                    dead_letter.write(json.dumps({'op': record['op'], 'id': pk, 'values': record['values']}) + '\n')
+        return retry
+
+    def recover(self):
+        """
+        Replays spill files left behind by processes that are no longer running.
+        :return: the number of records replayed
+        :rtype: int
+        """
+        if not self.spill_dir:
+            return 0
+        paths = []
+        for name in sorted(os.listdir(self.spill_dir)):
+            parts = name[:-len('.jsonl')].split('-') if name.endswith('.jsonl') else []
+            if len(parts) != 4 or parts[0] != 'transactions':
+                continue
+            pid, token = int(parts[1]), parts[2]
+            if token == self._token or (pid != os.getpid() and process_running(pid)):
+                continue
+            paths.append(os.path.join(self.spill_dir, name))
+        pending = {}
+        for path in sorted(paths, key=os.path.getmtime):
+            with open(path, encoding='utf-8') as spill:
+                for line in spill:
+                    try:
+                        self._merge(pending, json.loads(line))
+                    except ValueError:
+                        lgr.warning(f"TransactionLogWriter skipping corrupt spill line in {path}")
+        failed = {}
+        if pending:
+            try:
+                self._write(pending, ignore_conflicts=True)
+            except Exception as e:
+                lgr.exception(f"TransactionLogWriter recover exception: {e}")
+                failed = self._write_each(pending, ignore_conflicts=True)
+                if len(failed) == len(pending):
+                    # nothing could be written, most likely the database is down, replay on the next start
+                    return 0
+                self._dead_letter(failed, attempts=1)
+        for path in paths:
+            self._remove(path)
+        return len(pending) - len(failed)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,79 @@
+"""
+JSON encoding and decoding for requests and responses.
+orjson is used when it is installed, otherwise the standard library. Both write UUID, Decimal, date,
+time and datetime values natively: Decimals as strings (as DjangoJSONEncoder does) and dates in ISO 8601
+with full precision.
+"""
+import datetime
+import decimal
+import json
+import uuid
+
+from django.http import HttpResponse
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def default(value):
+    """ Serializes the values neither encoder handles itself """
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Promise):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f'Object of type {value.__class__.__name__} is not JSON serializable')
+
+
+_encoder = json.JSONEncoder(default=default, separators=(',', ':'), ensure_ascii=False)
+
+
+def stdlib_dumps(value):
+    return _encoder.encode(value).encode('utf-8')
+
+
+def stdlib_loads(content):
+    return json.loads(content)
+
+
+def orjson_dumps(value):
+    return orjson.dumps(value, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps(value):
+    """
+    :return: the JSON document
+    :rtype: bytes
+    """
+    return _dumps(value)
+
+
+def loads(content):
+    """
+    :param content: the JSON document
+    :type content: bytes | str
+    """
+    return _loads(content)
+
+
+_dumps, _loads = (orjson_dumps, orjson.loads) if orjson is not None else (stdlib_dumps, stdlib_loads)
+
+
+class JsonResponse(HttpResponse):
+    """
+    Drop-in replacement for django.http.JsonResponse rendering through the codec
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+        kwargs.setdefault('content_type', 'application/json')
+        super(JsonResponse, self).__init__(content=dumps(data), **kwargs)
@@ -1,13 +1,13 @@
 import json
 from functools import WRAPPER_ASSIGNMENTS
 
-from django.core.handlers.wsgi import WSGIRequest
-from django.db.models import Q
-from django.http import HttpResponse, JsonResponse
-from django.utils import timezone
+from asgiref.sync import markcoroutinefunction
+from django.http import HttpRequest, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
 from six import wraps
 
-from base.backend.service import UserIdentityService
+from base.backend.tokencache import authenticate_token, aauthenticate_token
+from base.backend.utils.codec import JsonResponse
 from base.backend.utils.utilities import get_request_data
 
 
@@ -19,43 +19,74 @@ def user_login_required(view_func):
     def wrapped_view(*args, **kwargs):
         """This method wraps the decorated method."""
         is_checked = False
-        print(kwargs)
         for k in args:
-            if isinstance(k, WSGIRequest):
-                request_data = get_request_data(k)
-                token = request_data.get("token", False)
-                if token is False:
-                    token = str(k.headers.get('Authorization', ""))
-                    token = token[len("Bearer "):] if token.startswith("Bearer ") else token
-
+            if isinstance(k, HttpRequest):
+                token = request_token(k)
                 if token not in ["", False]:
                     is_checked = True
-                    print("token",token)
-                    user_auth = UserIdentityService().filter(
-                        ~Q(user=None), token=token, expires_at__gt=timezone.now()).order_by('-date_created').first()
-                    if not user_auth:
-                        response = HttpResponse(
-                            json.dumps({
-                                'status': 'failed', 'message': 'Unauthorized. Invalid credentials.', 'code': '401'
-                            }),
-                            content_type='application/json', status=401)
-                        response['WWW-Authenticate'] = 'Bearer realm=api'
-                        return response
-                    setattr(k, 'user', user_auth.user)
+                    user = authenticate_token(token)
+                    if not user:
+                        return unauthorized('Unauthorized. Invalid credentials.')
+                    setattr(k, 'user', user)
                     setattr(k, 'token', token)
-                    user_auth.extend()
                 else:
                     return JsonResponse({
                         'status': 'failed', 'message': 'Unauthorized. Authorization parameters not Found!',
                         'code': '401'
                     }, status=401)
         if not is_checked:
-            response = HttpResponse(
-                json.dumps({'status': 'failed', 'message': 'Unauthorized. Credentials not Provided.', 'code': '401'}),
-                content_type='application/json', status=401)
-            response['WWW-Authenticate'] = 'Bearer realm=api'
-            return response
+            return unauthorized('Unauthorized. Credentials not Provided.')
         return view_func(*args, **kwargs)
 
     # return wraps(view_func, assigned=available_attrs(view_func))(wrapped_view)
     return wraps(view_func, assigned=WRAPPER_ASSIGNMENTS)(wrapped_view)
+
+
+def request_token(request):
+    """
+    The token sent in the request data or in the Authorization header
+    @rtype: str | bool
+    """
+    token = get_request_data(request).get("token", False)
+    if token is False:
+        token = str(request.headers.get('Authorization', ""))
+        token = token[len("Bearer "):] if token.startswith("Bearer ") else token
+    return token
+
+
+def unauthorized(message):
+    response = HttpResponse(
+        json.dumps({'status': 'failed', 'message': message, 'code': '401'}),
+        content_type='application/json', status=401)
+    response['WWW-Authenticate'] = 'Bearer realm=api'
+    return response
+
+
+def async_user_login_required(view_func):
+    """
+    user_login_required for async views, the token is validated through the async ORM
+    """
+
+    async def wrapped_view(request, *args, **kwargs):
+        if not isinstance(request, HttpRequest):
+            return unauthorized('Unauthorized. Credentials not Provided.')
+        token = request_token(request)
+        if token in ["", False]:
+            return JsonResponse({
+                'status': 'failed', 'message': 'Unauthorized. Authorization parameters not Found!', 'code': '401'
+            }, status=401)
+        user = await aauthenticate_token(token)
+        if not user:
+            return unauthorized('Unauthorized. Invalid credentials.')
+        setattr(request, 'user', user)
+        setattr(request, 'token', token)
+        return await view_func(request, *args, **kwargs)
+
+    return wraps(view_func, assigned=WRAPPER_ASSIGNMENTS)(wrapped_view)
+
+
+def async_csrf_exempt(view_func):
+    """
+    csrf_exempt for async views, Django 4.2 wraps the view in a sync function which would be run in a thread
+    """
+    return markcoroutinefunction(csrf_exempt(view_func))
@@ -0,0 +1,232 @@
+"""
+Keyset (cursor) pagination and streaming of listing querysets
+"""
+import base64
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+
+from base.backend.utils import codec
+from base.backend.utils.codec import JsonResponse
+
+lgr = logging.getLogger(__name__)
+
+
+class InvalidCursor(ValueError):
+    """ Raised when a cursor sent by the client cannot be decoded """
+
+
+def encode_cursor(row, keys):
+    """
+    Builds an opaque cursor from the key values of the last row of a page
+    :param row: the row as returned by queryset.values()
+    :type row: dict
+    :param keys: the ordering keys e.g. ('date_created', 'id')
+    :return: url safe cursor
+    :rtype: str
+    """
+    values = []
+    for key in keys:
+        value = row[key]
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        elif isinstance(value, uuid.UUID):
+            value = str(value)
+        values.append(value)
+    values = json.dumps(values)
+    return base64.urlsafe_b64encode(values.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, keys):
+    """
+    Decodes a cursor created by encode_cursor
+    :return: list of key values
+    :rtype: list
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(str(cursor).encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError('cursor does not match keys')
+        date_value = parse_datetime(values[0]) if isinstance(values[0], str) else None
+        return [date_value or values[0]] + values[1:]
+    except Exception as e:
+        raise InvalidCursor(f'Invalid cursor {cursor}: {e}')
+
+
+def is_paginated(**kwargs):
+    """
+    Whether the request asked for a page or a stream rather than the whole table
+    :rtype: bool
+    """
+    return any(kwargs.get(key) not in (None, '') for key in ('limit', 'cursor')) or is_streamed(**kwargs)
+
+
+def is_streamed(**kwargs):
+    return str(kwargs.get('stream', '')).lower() in ('1', 'true', 'yes')
+
+
+def paginate_queryset(queryset, keys=('date_created', 'id'), **kwargs):
+    """
+    Returns one page of a values() queryset ordered newest first on keys, seeking past the cursor
+    instead of using OFFSET. When stream is requested the whole result is returned as an iterator.
+    :param queryset: values() queryset which includes the keys
+    :param keys: (ordering column, unique tie breaker)
+    :param kwargs: request parameters, limit, cursor and stream are used
+    :return: dict with data (list or iterator) and next_cursor
+    :rtype: dict
+    """
+    queryset, limit = page_queryset(queryset, keys, **kwargs)
+    if limit is None:
+        return {'data': queryset.iterator(chunk_size=getattr(settings, 'STREAM_CHUNK_SIZE', 2000))}
+    return page_of(list(queryset[:limit + 1]), limit, keys)
+
+
+async def apaginate_queryset(queryset, keys=('date_created', 'id'), **kwargs):
+    """
+    Async variant of paginate_queryset, the page is read with async iteration and a stream is returned as an
+    async iterator
+    :rtype: dict
+    """
+    queryset, limit = page_queryset(queryset, keys, **kwargs)
+    if limit is None:
+        return {'data': queryset.aiterator(chunk_size=getattr(settings, 'STREAM_CHUNK_SIZE', 2000))}
+    return page_of([row async for row in queryset[:limit + 1]], limit, keys)
+
+
+def page_queryset(queryset, keys, **kwargs):
+    """
+    Orders the queryset on keys and seeks past the cursor
+    :return: tuple of the queryset and the page size, None when the whole result is streamed
+    :rtype: tuple
+    """
+    queryset = queryset.order_by(*[f'-{key}' for key in keys])
+    cursor = kwargs.get('cursor')
+    if cursor:
+        first, second = decode_cursor(cursor, keys)
+        queryset = queryset.filter(
+            Q(**{f'{keys[0]}__lt': first}) | Q(**{keys[0]: first, f'{keys[1]}__lt': second}))
+    if is_streamed(**kwargs):
+        # the rows are read while the response is sent, bind the database now so that it stays on the replica
+        return queryset.using(queryset.db), None
+    limit = min(
+        int(kwargs.get('limit') or getattr(settings, 'DEFAULT_PAGE_SIZE', 100)), getattr(settings, 'MAX_PAGE_SIZE', 1000))
+    if limit < 1:
+        raise InvalidCursor(f'Invalid limit {limit}')
+    return queryset, limit
+
+
+def page_of(rows, limit, keys):
+    """ :return: the page of rows read with one extra row telling whether there is a next page """
+    next_cursor = encode_cursor(rows[limit - 1], keys) if len(rows) > limit else None
+    return {'data': rows[:limit], 'next_cursor': next_cursor}
+
+
+def stream_rows(rows, code='100.000.000'):
+    """
+    Writes a JSON response body incrementally, one chunk of rows at a time. An error while reading the rows
+    is raised so that the server aborts the response rather than ending it as a success.
+    :param rows: iterator of dicts
+    :param code: the response code
+    :return: generator of bytes
+    """
+    chunk_size = getattr(settings, 'STREAM_CHUNK_SIZE', 2000)
+    yield b'{"code":' + codec.dumps(code) + b',"data":['
+    chunk = []
+    first = True
+    try:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield (b'' if first else b',') + codec.dumps(chunk)[1:-1]
+                first = False
+                chunk = []
+        if chunk:
+            yield (b'' if first else b',') + codec.dumps(chunk)[1:-1]
+    except Exception as e:
+        # closing the array would send a well formed but truncated success response, abort the stream instead
+        lgr.exception(f"stream_rows Exception: {e}")
+        raise
+    yield b']}'
+
+
+async def astream_rows(rows, code='100.000.000'):
+    """
+    Async variant of stream_rows for async iterators of rows
+    :return: async generator of bytes
+    """
+    chunk_size = getattr(settings, 'STREAM_CHUNK_SIZE', 2000)
+    yield b'{"code":' + codec.dumps(code) + b',"data":['
+    chunk = []
+    first = True
+    try:
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield (b'' if first else b',') + codec.dumps(chunk)[1:-1]
+                first = False
+                chunk = []
+        if chunk:
+            yield (b'' if first else b',') + codec.dumps(chunk)[1:-1]
+    except Exception as e:
+        # closing the array would send a well formed but truncated success response, abort the stream instead
+        lgr.exception(f"astream_rows Exception: {e}")
+        raise
+    yield b']}'
+
+
+def list_response(response):
+    """
+    Renders an administration response, streaming it when data is an iterator or an async iterator
+    :param response: dict response with code and data
+    :type response: dict
+    :rtype: JsonResponse | StreamingHttpResponse
+    """
+    data = response.get('data') if isinstance(response, dict) else None
+    if hasattr(data, '__aiter__'):
+        return StreamingHttpResponse(astream_rows(data, response.get('code')), content_type='application/json')
+    if data is not None and not isinstance(data, (list, dict)):
+        return StreamingHttpResponse(stream_rows(data, response.get('code')), content_type='application/json')
+    return JsonResponse(response, safe=False)
+
+
+def page_response(queryset, not_found, keys=('date_created', 'id'), **kwargs):
+    """
+    Builds the administration response for a paginated or streamed listing
+    :param queryset: values() queryset which includes the keys
+    :param not_found: response returned when the page is empty
+    :type not_found: dict
+    :param keys: (ordering column, unique tie breaker)
+    :param kwargs: request parameters, limit, cursor and stream are used
+    :return: dict response with code, data and next_cursor
+    :rtype: dict
+    """
+    try:
+        page = paginate_queryset(queryset, keys=keys, **kwargs)
+    except ValueError as e:
+        lgr.warning(f"page_response invalid pagination parameters: {e}")
+        return {'code': '500.400.005', 'message': 'Invalid pagination parameters'}
+    return page_or_not_found(page, not_found)
+
+
+async def apage_response(queryset, not_found, keys=('date_created', 'id'), **kwargs):
+    """
+    Async variant of page_response
+    :rtype: dict
+    """
+    try:
+        page = await apaginate_queryset(queryset, keys=keys, **kwargs)
+    except ValueError as e:
+        lgr.warning(f"apage_response invalid pagination parameters: {e}")
+        return {'code': '500.400.005', 'message': 'Invalid pagination parameters'}
+    return page_or_not_found(page, not_found)
+
+
+def page_or_not_found(page, not_found):
+    if isinstance(page['data'], list) and not page['data']:
+        return not_found
+    return dict({'code': '100.000.000'}, **page)
@@ -1,56 +1,97 @@
 import base64
 import binascii
-import json
 import logging
 import os
 import re
 from datetime import timedelta
 from uuid import UUID
 
+from django.core.handlers.asgi import ASGIRequest
 from django.http import QueryDict
 
+from base.backend.utils import codec
 from library_manager import settings
 
 lgr = logging.getLogger(__name__)
 
 
+# content types whose body is still parsed as JSON when it was not read as a form
+JSON_FALLBACK_CONTENT_TYPES = ('', 'text/plain', 'application/x-www-form-urlencoded')
+
+
 def get_request_data(request):
     """
-    Retrieve request data.
+    Retrieve request data. The body is parsed on the first call and the result is kept on the request,
+    later calls e.g. from the view after the auth decorator get a copy of it.
     @param request: The Django HttpRequest.
     @type request: WSGIRequest
     @return: The data from the request as a dict
     @rtype: QueryDict
     """
+    if request is None:
+        return QueryDict()
+    data = getattr(request, '_request_data', None)
+    if data is None:
+        data = parse_request_data(request)
+        try:
+            request._request_data = data
+        except AttributeError:
+            pass
+    return data.copy() if hasattr(data, 'copy') else data
+
+
+def parse_request_data(request):
+    """
+    Parses the query string, form or JSON body of the request
+    @rtype: dict | QueryDict
+    """
     try:
+        request_meta = getattr(request, 'META', {})
+        request_method = getattr(request, 'method', None)
+        content_type = str(request_meta.get('CONTENT_TYPE', ''))
         data = None
-        if request is not None:
-            request_meta = getattr(request, 'META', {})
-            request_method = getattr(request, 'method', None)
-            if request_meta.get('CONTENT_TYPE', '') == 'application/json':
-                data = json.loads(request.body)
-            elif str(request_meta.get('CONTENT_TYPE', '')).startswith('multipart/form-data;'):
-                # Form Data?
-                data = request.POST.copy()
-                data = data.dict()
-            elif request_method == 'GET':
-                data = request.GET.copy()
-                data = data.dict()
-            elif request_method == 'POST':
-                data = request.POST.copy()
-                data = data.dict()
-            if not data:
-                request_body = getattr(request, 'body', None)
-                if request_body:
-                    data = json.loads(request_body)
-                else:
-                    data = QueryDict()
-            return data
+        if content_type.startswith('application/json'):
+            data = codec.loads(request.body) if request.body else None
+        elif content_type.startswith('multipart/form-data;'):
+            # Form Data?
+            data = request.POST.dict()
+        elif request_method == 'GET':
+            data = request.GET.dict()
+        elif request_method == 'POST':
+            data = request.POST.dict()
+        if not data and content_type.split(';')[0].strip() in JSON_FALLBACK_CONTENT_TYPES and getattr(
+                request, 'body', None):
+            # clients posting JSON without a JSON content type, other bodies e.g. a CSV import are left unread
+            data = codec.loads(request.body)
+        return data if data else QueryDict()
     except Exception as e:
         lgr.exception(f"get_request_data Exception: {e}")
     return QueryDict()
 
 
+def process_running(pid):
+    """
+    Whether a process with the pid exists, e.g. the worker which wrote a spill or metrics file
+    @rtype: bool
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def served_by_asgi(request):
+    """
+    Whether the request came through the ASGI handler. Under WSGI an async view is run with async_to_sync and
+    a response streamed from an async iterator is read whole into memory before it is sent.
+    @rtype: bool
+    """
+    return isinstance(request, ASGIRequest)
+
+
 def validate_uuid4(uuid_string):
     """
     Validate that a UUID string is in fact a valid uuid4.
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+
+
+class Command(BaseCommand):
+    help = 'Measures the requests per second of an endpoint opening a connection per request and keeping it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/books/get_books/', help='Endpoint requested')
+        parser.add_argument('--token', default='benchmark', help='Bearer token sent with the requests')
+        parser.add_argument('--requests', type=int, default=500, help='Number of requests per run')
+        parser.add_argument('--rounds', type=int, default=3, help='Runs of each setting, the best is reported')
+        parser.add_argument(
+            '--conn-max-age', type=int, default=None,
+            help='CONN_MAX_AGE of the second run, defaults to the configured value or 60 if it is 0')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias the endpoint reads')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        configured = connection.settings_dict['CONN_MAX_AGE']
+        kept = options['conn_max_age'] if options['conn_max_age'] is not None else (configured or 60)
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {options['token']}")
+        rates = {0: 0.0, kept: 0.0}
+        try:
+            # the settings are run in turns so that both see the same load on the machine
+            for _ in range(options['rounds']):
+                for max_age in rates:
+                    connection.close()
+                    connection.settings_dict['CONN_MAX_AGE'] = max_age
+                    client.get(options['path'])
+                    started = time.perf_counter()
+                    for _ in range(options['requests']):
+                        client.get(options['path'])
+                    rates[max_age] = max(rates[max_age], options['requests'] / (time.perf_counter() - started))
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = configured
+        for max_age, rate in rates.items():
+            self.stdout.write(f"CONN_MAX_AGE={max_age}: {rate:.1f} requests/sec")
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['path']} {connection.vendor}: {rates[kept] / rates[0]:.2f}x the requests/sec with kept connections"))
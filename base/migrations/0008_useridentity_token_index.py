@@ -0,0 +1,19 @@
+# Generated by Django 4.2.2 on 2026-10-18 18:48
+
+import base.backend.utils.utilities
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_useridentity_state_alter_useridentity_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='useridentity',
+            name='token',
+            field=models.CharField(db_index=True, default=base.backend.utils.utilities.create_token, max_length=200),
+        ),
+    ]
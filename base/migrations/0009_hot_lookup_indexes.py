@@ -0,0 +1,29 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_useridentity_token_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='state',
+            index=models.Index(fields=['name'], name='state_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['transaction_type', 'state', 'date_created'], name='transaction_type_state_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useridentity',
+            index=models.Index(fields=['token', 'expires_at'], name='useridentity_token_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useridentity',
+            index=models.Index(fields=['user', 'state', 'expires_at'], name='useridentity_user_state_idx'),
+        ),
+    ]
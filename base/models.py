@@ -56,6 +56,7 @@ class State(GenericBaseModel):
 
     class Meta(object):
         ordering = ('name',)
+        indexes = [models.Index(fields=['name'], name='state_name_idx')]
 
     @classmethod
     def default_state(cls):
@@ -63,11 +64,8 @@ class State(GenericBaseModel):
         set default state for any model
         :return:
         """
-        try:
-            state = cls.objects.get(name="Active")
-        except Exception as e:
-            state = None
-        return state
+        from base.backend.stateregistry import StateRegistry
+        return StateRegistry.get(name="Active")
 
 
 class TransactionType(GenericBaseModel):
@@ -97,9 +95,14 @@ class Transaction(BaseModel):
     def __str__(self):
         return f"{self.transaction_type} {self.state}"
 
+    class Meta(object):
+        indexes = [
+            models.Index(fields=['transaction_type', 'state', 'date_created'], name='transaction_type_state_idx'),
+        ]
+
 
 class UserIdentity(BaseModel):
-    token = models.CharField(default=create_token, max_length=200)
+    token = models.CharField(default=create_token, max_length=200, db_index=True)
     expires_at = models.DateTimeField(default=token_expiry)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     source_ip = models.GenericIPAddressField(max_length=50, null=True, blank=True)
@@ -111,6 +114,12 @@ class UserIdentity(BaseModel):
     class Meta(object):
         ordering = ('-date_created',)
         verbose_name_plural = 'User Identities'
+        indexes = [
+            # token authentication, see base.backend.tokencache.authenticate_token
+            models.Index(fields=['token', 'expires_at'], name='useridentity_token_idx'),
+            # login, see base.backend.authentication
+            models.Index(fields=['user', 'state', 'expires_at'], name='useridentity_user_state_idx'),
+        ]
 
     def extend(self):
         """
@@ -121,7 +130,7 @@ class UserIdentity(BaseModel):
         # noinspection PyBroadException
         try:
             self.expires_at = token_expiry()
-            self.save()
+            self.save(update_fields=['expires_at', 'date_modified'])
         except Exception:
             pass
         return self
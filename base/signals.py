@@ -0,0 +1,50 @@
+"""
+Signal receivers for the base app
+"""
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from base.backend.responsecache import bump_model_version
+from base.backend.stateregistry import StateRegistry
+from base.backend.tokencache import TokenCache
+from base.models import State, UserIdentity
+
+
+@receiver(post_save, sender=State)
+@receiver(post_delete, sender=State)
+def invalidate_state_registry(sender, **kwargs):
+    """
+    Clears the in-process state registry and the cached responses reading states when a State changes.
+    Cleared again on commit so that lookups made by other threads before the commit do not keep the old rows.
+    """
+    StateRegistry.invalidate()
+    transaction.on_commit(StateRegistry.invalidate)
+    bump_model_version(sender)
+
+
+@receiver(post_save, sender=UserIdentity)
+@receiver(post_delete, sender=UserIdentity)
+def invalidate_token_cache(sender, instance, **kwargs):
+    """
+    Drops the cached token when its UserIdentity is saved or deleted e.g. on login or revocation
+    """
+    TokenCache.discard(instance.token)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Sets settings.SQLITE_PRAGMAS (WAL journal, synchronous, mmap and busy timeout) on every new SQLite connection
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            if not re.fullmatch(r'\w+', str(name)) or not re.fullmatch(r'\w+', str(value)):
+                raise ValueError(f'Invalid SQLite pragma {name}={value}')
+            cursor.execute(f'PRAGMA {name} = {value}')
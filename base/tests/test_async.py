@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import JsonResponse
+from django.test import RequestFactory
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from base.backend.service import StateService
+from base.backend.utils.decorators import async_user_login_required
+from base.models import UserIdentity
+
+pytestmark = pytest.mark.django_db
+
+
+@async_user_login_required
+async def protected_view(request):
+    return JsonResponse({'code': '100.000.000', 'user': request.user.username})
+
+
+def call(token=None):
+    headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+    return async_to_sync(protected_view)(RequestFactory().get('/api/books/get_books/', **headers))
+
+
+@pytestmark
+class TestAsyncUserLoginRequired(object):
+    """
+    Test token validation on the async_user_login_required decorator
+    """
+
+    def test_valid_token(self):
+        mixer.blend('base.State', name='Active')
+        identity = mixer.blend('base.UserIdentity', user=mixer.blend('auth.User', username='librarian'))
+        response = call(identity.token)
+        assert response.status_code == 200 and b'librarian' in response.content, 'Should allow a valid token'
+
+    def test_rejected(self):
+        assert call().status_code == 401, 'Should reject a request without a token'
+        assert call('not-a-token').status_code == 401, 'Should reject an unknown token'
+
+    def test_expiry_extended_past_threshold(self, settings):
+        mixer.blend('base.State', name='Active')
+        expires_at = timezone.now() + timedelta(seconds=settings.TOKEN_EXPIRY_SECONDS * 0.1)
+        identity = mixer.blend('base.UserIdentity', user=mixer.blend('auth.User'), expires_at=expires_at)
+        call(identity.token)
+        assert UserIdentity.objects.get(id=identity.id).expires_at > expires_at, 'Should extend the token'
+
+
+@pytestmark
+class TestAsyncServiceBase(object):
+    """
+    Test the async ORM methods of ServiceBase
+    """
+
+    def test_async_crud(self):
+        state = async_to_sync(StateService().acreate)(name='Active')
+        assert async_to_sync(StateService().aget)(id=state.id) == state, 'Should read the created record'
+        assert async_to_sync(StateService().aget)(name='Missing') is None, 'Should return None when not found'
+        assert async_to_sync(StateService().afilter)(name='Active') == [state], 'Should list the matching records'
+        assert async_to_sync(StateService().aupdate_where)({'id': state.id}, name='Inactive') == 1, \
+            'Should update the record'
+        assert StateService().get(id=state.id).name == 'Inactive', 'Should write the update'
@@ -0,0 +1,46 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import pytest
+from django.test import RequestFactory
+
+from base.backend.utils import codec
+from base.backend.utils.utilities import get_request_data
+
+VALUES = {
+    'id': uuid.UUID('8a3c2b1e-6f4d-4c5b-9a8e-7d6c5b4a3f2e'), 'fee': decimal.Decimal('12.50'),
+    'date': datetime.date(2024, 3, 10), 'at': datetime.datetime(2024, 3, 10, 8, 30, 15, 123456),
+}
+EXPECTED = {
+    'id': '8a3c2b1e-6f4d-4c5b-9a8e-7d6c5b4a3f2e', 'fee': '12.50', 'date': '2024-03-10',
+    'at': '2024-03-10T08:30:15.123456',
+}
+
+
+class TestCodec(object):
+    """
+    Test the JSON codec
+    """
+
+    @pytest.mark.parametrize('dumps', [codec.dumps, codec.stdlib_dumps])
+    def test_dumps(self, dumps):
+        assert json.loads(dumps(VALUES)) == EXPECTED, 'Should write UUID, Decimal and dates natively'
+
+    def test_json_response(self):
+        response = codec.JsonResponse({'code': '100.000.000', 'data': [VALUES]})
+        assert response['Content-Type'] == 'application/json', 'Should be a JSON response'
+        assert json.loads(response.content)['data'] == [EXPECTED], 'Should render through the codec'
+        with pytest.raises(TypeError):
+            codec.JsonResponse([VALUES])
+
+    def test_request_parsed_once(self, monkeypatch):
+        calls = []
+        loads = codec.loads
+        monkeypatch.setattr(codec, 'loads', lambda content: calls.append(content) or loads(content))
+        request = RequestFactory().post(
+            '/api/books/borrow_book/', data={'book_id': 'a'}, content_type='application/json')
+        get_request_data(request).pop('book_id')
+        assert get_request_data(request) == {'book_id': 'a'}, 'Should return a fresh copy of the data'
+        assert len(calls) == 1, 'Should parse the body once'
@@ -0,0 +1,86 @@
+import pytest
+from django.test import RequestFactory
+from mixer.backend.django import mixer
+
+from base.backend.dbrouter import routing_scope, read_replica, is_pinned
+from base.backend.middleware import ReplicaRoutingMiddleware
+from base.backend.utils.pagination import paginate_queryset
+from base.models import State
+from books.administration.books_administration import BooksAdministration
+from books.backend.service import AuthorService
+from books.models import Author
+
+pytestmark = pytest.mark.django_db(databases=['default', 'replica'])
+
+
+def replica_request():
+    request = RequestFactory().get('/api/books/get_authors/')
+    request.user = None
+    return request
+
+
+def author_names():
+    response = BooksAdministration().get_authors(replica_request())
+    return [author['first_name'] for author in response.get('data', [])]
+
+
+@pytest.fixture
+def replica(settings):
+    """ Creates an author on the primary and a different one on the replica """
+    settings.READ_REPLICA_ALIAS = 'replica'
+    settings.RESPONSE_CACHE_ENABLED = False
+    mixer.blend('books.Author', first_name='Primary', state=mixer.blend('base.State', name='Active'))
+    state = State.objects.using('replica').create(name='Active')
+    Author.objects.using('replica').create(salutation='Mr', first_name='Replica', last_name='Copy', state=state)
+
+
+@pytestmark
+class TestReplicaRouting(object):
+    """
+    Test the routing of the read-only administration methods to the read replica
+    """
+
+    def test_reads_go_to_the_replica(self, replica):
+        with routing_scope():
+            assert author_names() == ['Replica'], 'Should read the authors from the replica'
+            assert AuthorService().filter().get().first_name == 'Primary', 'Should read the primary outside hints'
+
+    def test_reads_after_a_write_stay_on_the_primary(self, replica):
+        with routing_scope():
+            AuthorService().create(salutation='Ms', first_name='Written', last_name='Now', state=State.objects.get())
+            assert is_pinned(), 'Should pin the request to the primary'
+            assert sorted(author_names()) == ['Primary', 'Written'], 'Should read its own write'
+        with routing_scope():
+            assert author_names() == ['Replica'], 'Should read the replica again on the next request'
+
+    def test_middleware_opens_a_scope(self, replica):
+        AuthorService().create(salutation='Ms', first_name='Setup', last_name='Write', state=State.objects.get())
+        names = ReplicaRoutingMiddleware(lambda request: author_names())(replica_request())
+        assert names == ['Replica'], 'Should not keep the pin of an earlier write'
+
+    def test_streamed_rows_stay_on_the_replica(self, replica):
+        with routing_scope():
+            rows = read_replica(lambda: paginate_queryset(Author.objects.values('first_name'), stream='true'))()
+            assert [row['first_name'] for row in rows['data']] == ['Replica'], 'Should stream from the replica'
+
+    def test_without_replica(self, replica, settings):
+        settings.READ_REPLICA_ALIAS = None
+        with routing_scope():
+            assert author_names() == ['Primary'], 'Should read the primary when no replica is configured'
+
+    def test_replica_reads_are_not_cached_after_a_change(self, replica, settings):
+        settings.RESPONSE_CACHE_ENABLED = True
+        with routing_scope():
+            assert author_names() == ['Replica'], 'Should read the lagging replica'
+        state = State.objects.using('replica').get()
+        # the replicated rows arrive without sending signals
+        Author.objects.using('replica').bulk_create([
+            Author(salutation='Mr', first_name='Caught', last_name='Up', state=state)])
+        with routing_scope():
+            assert sorted(author_names()) == ['Caught', 'Replica'], 'Should not cache a read made during the lag'
+        settings.REPLICA_LAG_SECONDS = 0
+        with routing_scope():
+            author_names()
+        Author.objects.using('replica').filter(first_name='Caught').update(first_name='Later')
+        with routing_scope():
+            assert sorted(author_names()) == ['Caught', 'Replica'], 'Should cache once the lag window is over'
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+import pytest
+from django.http import JsonResponse
+from django.test import RequestFactory
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from base.backend.utils.decorators import user_login_required
+from base.models import UserIdentity
+
+pytestmark = pytest.mark.django_db
+
+
+@user_login_required
+def protected_view(request):
+    return JsonResponse({'code': '100.000.000', 'user': request.user.username})
+
+
+@pytestmark
+class TestUserLoginRequired(object):
+    """
+    Test token validation on the user_login_required decorator
+    """
+
+    @staticmethod
+    def _request(token):
+        return RequestFactory().get('/api/books/get_books/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_valid_token(self):
+        mixer.blend('base.State', name='Active')
+        identity = mixer.blend('base.UserIdentity', user=mixer.blend('auth.User', username='librarian'))
+        response = protected_view(self._request(identity.token))
+        assert response.status_code == 200, 'Should allow a valid token'
+
+    def test_invalid_token(self):
+        response = protected_view(self._request('not-a-token'))
+        assert response.status_code == 401, 'Should reject an unknown token'
+
+    def test_cached_token_skips_database(self, django_assert_num_queries):
+        mixer.blend('base.State', name='Active')
+        identity = mixer.blend('base.UserIdentity', user=mixer.blend('auth.User'))
+        protected_view(self._request(identity.token))
+        with django_assert_num_queries(0):
+            response = protected_view(self._request(identity.token))
+        assert response.status_code == 200, 'Should authenticate from the token cache'
+
+    def test_expiry_extended_past_threshold(self, settings):
+        mixer.blend('base.State', name='Active')
+        expires_at = timezone.now() + timedelta(seconds=settings.TOKEN_EXPIRY_SECONDS * 0.1)
+        identity = mixer.blend('base.UserIdentity', user=mixer.blend('auth.User'), expires_at=expires_at)
+        protected_view(self._request(identity.token))
+        assert UserIdentity.objects.get(id=identity.id).expires_at > expires_at, 'Should extend the token'
+
+    def test_expiry_not_extended_before_threshold(self):
+        mixer.blend('base.State', name='Active')
+        identity = mixer.blend('base.UserIdentity', user=mixer.blend('auth.User'))
+        protected_view(self._request(identity.token))
+        assert UserIdentity.objects.get(id=identity.id).expires_at == identity.expires_at, \
+            'Should not write the expiry on every request'
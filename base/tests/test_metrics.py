@@ -0,0 +1,79 @@
+import fcntl
+import os
+
+import pytest
+
+from base.backend.metrics import MetricsRegistry, get_metrics_registry
+
+pytestmark = pytest.mark.django_db
+
+
+class TestMetricsRegistry(object):
+    """
+    Test the request metrics
+    """
+
+    def test_observe_and_render(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.observe('books.views.borrow_book', '100.000.000', 0.05)
+        registry.observe('books.views.borrow_book', '100.000.000', 0.5)
+        registry.observe('books.views.borrow_book', '300.003.005', 5)
+        text = registry.render()
+        labels = 'view="books.views.borrow_book",code="100.000.000"'
+        assert f'library_http_requests_total{{{labels}}} 2' in text, 'Should count the requests per label'
+        assert f'library_http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1' in text, \
+            'Should count the requests within the first bucket'
+        assert f'library_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text, \
+            'Should make the buckets cumulative'
+        assert 'code="300.003.005",le="1.0"} 0' in text, 'Should put slow requests in the +Inf bucket only'
+
+    def test_collect_across_processes(self, tmp_path):
+        registry = MetricsRegistry(metrics_dir=tmp_path)
+        registry.observe('books.views.get_books', '100.000.000', 0.01)
+        registry.flush()
+        os.rename(registry._path(), registry._path(pid=1))  # as if written by another worker
+        totals = registry.collect()
+        assert totals[('books.views.get_books', '100.000.000')][0] == 2, 'Should sum the files of other processes'
+
+    def test_dead_processes_are_folded(self, tmp_path):
+        key = ('books.views.get_books', '100.000.000')
+        previous = MetricsRegistry(metrics_dir=tmp_path)
+        previous.observe(*key, 0.01)
+        previous.flush()
+        registry = MetricsRegistry(metrics_dir=tmp_path)  # a new worker reusing the pid of the previous one
+        assert os.path.exists(tmp_path / 'metrics-aggregate.json'), 'Should fold the file of the dead worker'
+        assert not os.path.exists(previous._path()), 'Should remove the folded file'
+        registry.observe(*key, 0.01)
+        registry.flush()
+        assert os.path.exists(registry._path()), 'Should not overwrite the file of another process'
+        assert registry.collect()[key][0] == 2, 'Should keep counting the requests of the dead worker'
+
+    def test_collect_reads_under_the_fold_lock(self, tmp_path, monkeypatch):
+        key = ('books.views.get_books', '100.000.000')
+        live = MetricsRegistry(metrics_dir=tmp_path)
+        live._write(live._path(pid=os.getppid(), token='live'), {key: [1, 0.01] + [0] * (len(live.buckets) + 1)})
+        registry = MetricsRegistry(metrics_dir=tmp_path)
+        read, locked = registry._read, []
+
+        def probe(path):
+            with open(tmp_path / 'metrics.lock', 'a') as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked.append(False)
+                except BlockingIOError:
+                    locked.append(True)
+            return read(path)
+
+        monkeypatch.setattr(registry, '_read', probe)
+        assert registry.collect()[key][0] == 1, 'Should count the file of the live worker'
+        assert locked and all(locked), 'Should read the files while holding the fold lock'
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(client):
+    client.get('/api/books/get_books/')
+    response = client.get('/api/metrics')
+    assert response.status_code == 200, 'Should serve the metrics'
+    assert 'library_http_requests_total{view="books.views.get_books",code="401"}' in response.content.decode(), \
+        'Should record the request under its view and response code'
+    assert get_metrics_registry().metrics_dir is None, 'Should not write metric files in tests'
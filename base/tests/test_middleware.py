@@ -0,0 +1,44 @@
+import json
+import logging
+
+import pytest
+from django.http import JsonResponse
+from django.test import RequestFactory
+from mixer.backend.django import mixer
+
+from base.backend.middleware import QueryCountMiddleware
+from base.backend.querycounter import QueryCounter
+from base.models import State
+
+pytestmark = pytest.mark.django_db
+
+
+def list_states(request):
+    return JsonResponse({'data': [str(State.objects.filter(name=name).first()) for name in ('Active', 'Failed')]})
+
+
+@pytestmark
+class TestQueryCountMiddleware(object):
+    """
+    Test the query count middleware
+    """
+
+    def test_headers_and_log(self, caplog):
+        mixer.blend('base.State', name='Active')
+        with caplog.at_level(logging.INFO, logger='base.backend.middleware'):
+            response = QueryCountMiddleware(list_states)(RequestFactory().get('/api/states/'))
+        assert response['X-DB-Queries'] == '2', 'Should count the statements'
+        assert float(response['X-DB-Time']) >= 0, 'Should report the database time'
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['queries'] == 2 and record['path'] == '/api/states/', 'Should log the request figures'
+        assert record['duplicates'][0]['count'] == 2, 'Should report the repeated statement'
+
+    def test_client_response_headers(self, client):
+        response = client.get('/api/books/get_books/')
+        assert 'X-DB-Queries' in response, 'Should add the headers to every response'
+
+    def test_query_counter(self):
+        with QueryCounter() as counter:
+            list(State.objects.all())
+        assert counter.count == 1, 'Should count the statement'
+        assert counter.duplicates == {}, 'Should not report a statement run once'
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+from django.db import DatabaseError
+from mixer.backend.django import mixer
+
+from base.backend.service import StateService
+from base.backend.utils.pagination import page_response, list_response
+
+pytestmark = pytest.mark.django_db
+
+
+@pytestmark
+class TestKeysetPagination(object):
+    """
+    Test keyset pagination and streaming of listing querysets
+    """
+
+    not_found = {'code': '300.000.002', 'message': 'Not found'}
+
+    def test_pages_cover_all_rows(self):
+        mixer.cycle(7).blend('base.State')
+        seen = []
+        response = page_response(StateService().filter().values(), self.not_found, limit=3)
+        while True:
+            assert response['code'] == '100.000.000', 'Should return a page'
+            seen.extend(row['id'] for row in response['data'])
+            if not response['next_cursor']:
+                break
+            response = page_response(
+                StateService().filter().values(), self.not_found, limit=3, cursor=response['next_cursor'])
+        assert len(seen) == 7 and len(set(seen)) == 7, 'Should return every row exactly once'
+
+    def test_empty_page(self):
+        assert page_response(StateService().filter().values(), self.not_found, limit=3) == self.not_found, \
+            'Should return the not found response'
+
+    def test_invalid_cursor(self):
+        response = page_response(StateService().filter().values(), self.not_found, cursor='garbage')
+        assert response['code'] == '500.400.005', 'Should reject an invalid cursor'
+
+    def test_stream(self):
+        mixer.cycle(5).blend('base.State')
+        response = list_response(page_response(StateService().filter().values(), self.not_found, stream='true'))
+        body = json.loads(b''.join(response.streaming_content))
+        assert body['code'] == '100.000.000', 'Should stream a success code'
+        assert len(body['data']) == 5, 'Should stream every row'
+
+    def test_stream_error_aborts(self):
+        def rows():
+            yield {'name': 'Active'}
+            raise DatabaseError('connection lost')
+
+        response = list_response({'code': '100.000.000', 'data': rows()})
+        with pytest.raises(DatabaseError):
+            b''.join(response.streaming_content)
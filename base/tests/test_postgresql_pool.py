@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+# the pooled backend needs psycopg 3 and psycopg_pool, see requirements-postgresql.txt
+pytest.importorskip('psycopg')
+pytest.importorskip('psycopg_pool')
+
+from base.backend.postgresql_pool.base import DatabaseWrapper  # noqa: E402
+
+
+class FakePool(object):
+    """ Stands in for the psycopg_pool pool, no server is needed """
+
+    def __init__(self):
+        self.lent = []
+        self.returned = []
+        self.closed = False
+
+    def getconn(self):
+        lent = SimpleNamespace(isolation_level=None)
+        self.lent.append(lent)
+        return lent
+
+    def putconn(self, lent):
+        self.returned.append(lent)
+
+    def close(self):
+        self.closed = True
+
+
+def pooled_wrapper(**options):
+    settings_dict = dict(
+        connection.settings_dict, ENGINE='base.backend.postgresql_pool', NAME='library',
+        OPTIONS=dict(options, pool={'max_size': 2}))
+    return DatabaseWrapper(settings_dict, alias='pooled')
+
+
+@pytest.fixture
+def pool():
+    pool = FakePool()
+    DatabaseWrapper._pools['pooled'] = pool
+    yield pool
+    DatabaseWrapper._pools.pop('pooled', None)
+
+
+class TestPooledBackend(object):
+    """
+    Test that the pooled PostgreSQL backend lends and takes back the connections of the pool
+    """
+
+    def test_connection_is_lent_and_returned(self, pool):
+        wrapper = pooled_wrapper()
+        lent = wrapper.get_new_connection(wrapper.get_connection_params())
+        assert pool.lent == [lent], 'Should take the connection from the pool'
+        wrapper.connection = lent
+        wrapper._close()
+        assert pool.returned == [lent], 'Should hand the connection back to the pool'
+
+    def test_isolation_level(self, pool):
+        wrapper = pooled_wrapper(isolation_level=3)
+        lent = wrapper.get_new_connection({})
+        assert lent.isolation_level == wrapper.isolation_level == 3, 'Should set the configured isolation level'
+        with pytest.raises(ImproperlyConfigured):
+            pooled_wrapper(isolation_level=99).get_new_connection({})
+
+    def test_pool_options_are_not_connection_params(self, pool):
+        assert 'pool' not in pooled_wrapper().get_connection_params(), 'Should not pass the pool options to connect'
+
+    def test_close_pools(self, pool):
+        DatabaseWrapper.close_pools()
+        assert pool.closed and 'pooled' not in DatabaseWrapper._pools, 'Should close and forget the pools'
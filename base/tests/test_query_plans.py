@@ -0,0 +1,33 @@
+import uuid
+
+import pytest
+from django.utils import timezone
+
+from base.models import State, Transaction, UserIdentity
+
+pytestmark = pytest.mark.django_db
+
+
+@pytestmark
+class TestQueryPlans(object):
+    """
+    Test that the authentication and audit lookups are served by an index
+    """
+
+    def test_token_lookup(self, full_scans):
+        queryset = UserIdentity.objects.filter(
+            token='token', expires_at__gt=timezone.now(), user__isnull=False).select_related('user').order_by()[:1]
+        assert full_scans(queryset) == [], 'Should find the token through useridentity_token_idx'
+
+    def test_login_lookup(self, full_scans):
+        queryset = UserIdentity.objects.filter(
+            user_id=1, expires_at__gt=timezone.now(), state__name='Active').order_by('-date_created')
+        assert full_scans(queryset) == [], 'Should find the user identities through an index'
+
+    def test_transaction_lookup(self, full_scans):
+        queryset = Transaction.objects.filter(
+            transaction_type_id=uuid.uuid4(), state_id=uuid.uuid4()).order_by('-date_created')
+        assert full_scans(queryset) == [], 'Should find the transactions through transaction_type_state_idx'
+
+    def test_state_lookup(self, full_scans):
+        assert full_scans(State.objects.filter(name='Active')) == [], 'Should find the state through state_name_idx'
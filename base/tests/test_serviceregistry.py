@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+from mixer.backend.django import mixer
+
+from base.backend.serviceregistry import ServiceRegistry, get_service
+from books.backend.service import BookService
+
+pytestmark = pytest.mark.django_db
+
+
+class ProjectedBookService(BookService):
+    select_related = ('author', 'category')
+    only = ('title', 'author__first_name', 'category__name')
+
+
+class TestServiceRegistry(object):
+    """
+    Test the shared service instances
+    """
+
+    def test_shared_instance(self):
+        service = get_service(BookService)
+        assert get_service(BookService) is service, 'Should reuse the instance'
+        locking = get_service(BookService, lock_for_update=True)
+        assert locking is not service, 'Should keep a separate locking instance'
+        assert locking.manager.query.select_for_update, 'Should lock the rows read'
+        ServiceRegistry.clear()
+        assert get_service(BookService) is not service, 'Should create a new instance once cleared'
+
+    def test_concurrent_first_use(self):
+        ServiceRegistry.clear()
+        barrier = threading.Barrier(8)
+        services = []
+
+        def lookup():
+            barrier.wait()
+            services.append(get_service(ProjectedBookService))
+
+        threads = [threading.Thread(target=lookup) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len({id(service) for service in services}) == 1, 'Should create a single instance'
+
+
+@pytestmark
+class TestProjections(object):
+    """
+    Test the default projections of a service
+    """
+
+    def test_select_related_and_only(self, query_budget):
+        mixer.blend('base.State', name='Active')
+        mixer.blend('books.Books')
+        with query_budget(1):
+            book = get_service(ProjectedBookService).filter().first()
+            assert book.author.first_name and book.category.name, 'Should read the related rows in the same query'
+        assert book.get_deferred_fields() >= {'isbn', 'edition'}, 'Should defer the fields left out of only'
+
+    def test_locking_skips_select_related(self):
+        query = get_service(ProjectedBookService, lock_for_update=True).manager.query
+        assert query.select_for_update and not query.select_related, 'Should not lock the joined rows'
+
+    def test_writes_do_not_leak_into_reads(self):
+        mixer.blend('base.State', name='Active')
+        category, author = mixer.blend('books.Category'), mixer.blend('books.Author')
+        service = get_service(ProjectedBookService)
+        service.create(
+            title='Shared', published_date='2023-04-01', edition='1st', isbn='978-2', category=category, author=author)
+        assert not service.filter()._for_write, 'Should build a fresh queryset for every call'
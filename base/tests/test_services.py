@@ -1,7 +1,9 @@
 import pytest
+from django.db.models import F
 from mixer.backend.django import mixer
 
 from base.backend.service import StateService, TransactionTypeService, TransactionService
+from base.backend.stateregistry import StateRegistry
 
 pytestmark = pytest.mark.django_db
 
@@ -34,6 +36,24 @@ class TestStateService(object):
         new_state = StateService().update(old_state.id, name='Active')
         assert new_state.name is not old_state, 'Should have an updated instance of State'
 
+    def test_get_from_registry(self, django_assert_num_queries):
+        """ Test that repeated lookups by name are served from the StateRegistry """
+        mixer.blend('base.State', name="Active")
+        mixer.blend('base.State', name="Deleted")
+        with django_assert_num_queries(1):
+            assert StateService().get(name='Active').name == 'Active', 'Should return Active state'
+            assert StateService().get(name='Deleted').name == 'Deleted', 'Should return Deleted state'
+            assert StateService().get(name='Active') is not None, 'Should return cached Active state'
+            assert StateService().get(name='Missing') is None, 'Should return None for unknown state'
+
+    def test_registry_invalidated_on_save(self):
+        """ Test that saving a State drops the cached states """
+        state = mixer.blend('base.State', name="Active")
+        assert StateRegistry.get(pk=state.id) is not None, 'Should load the state by id'
+        StateService().update(state.id, name='Enabled')
+        assert StateRegistry.get(name='Active') is None, 'Should not return the renamed state'
+        assert StateRegistry.get(name='Enabled') is not None, 'Should return state under the new name'
+
 
 class TestTransactionTypeService(object):
     """
@@ -70,6 +90,54 @@ class TestTransactionTypeService(object):
         new_transaction_type = TransactionTypeService().update(transaction_type.id, simple_name='Register Member')
         assert new_transaction_type.simple_name == "Register Member", 'Should have an updated TransactionType'
 
+    def test_bulk_create(self):
+        """ Test for bulk_create method on TransactionType"""
+        state = mixer.blend('base.State', name='Active')
+        created = TransactionTypeService().bulk_create(
+            [{'name': f'Type{i}', 'simple_name': f'Type {i}', 'state': state} for i in range(5)], batch_size=2)
+        assert len(created) == 5, 'Should return the created TransactionTypes'
+        assert TransactionTypeService().filter().count() == 5, 'Should create every TransactionType'
+
+    def test_bulk_update(self):
+        """ Test for bulk_update method on TransactionType"""
+        transaction_types = mixer.cycle(3).blend('base.TransactionType')
+        for transaction_type in transaction_types:
+            transaction_type.simple_name = 'Renamed'
+        assert TransactionTypeService().bulk_update(transaction_types, ['simple_name']) == 3, \
+            'Should update every TransactionType'
+        assert TransactionTypeService().filter(simple_name='Renamed').count() == 3, 'Should write the new values'
+
+    def test_update_where(self):
+        """ Test for update_where method on TransactionType"""
+        mixer.cycle(3).blend('base.TransactionType', simple_name='Old')
+        mixer.blend('base.TransactionType', simple_name='Other')
+        assert TransactionTypeService().update_where({'simple_name': 'Old'}, simple_name='New') == 3, \
+            'Should update the matching TransactionTypes'
+        assert TransactionTypeService().filter(simple_name='Other').exists(), 'Should leave the others untouched'
+
+    def test_upsert(self):
+        """ Test for upsert method on TransactionType"""
+        state = mixer.blend('base.State', name='Active')
+        mixer.blend('base.TransactionType', name='CreateBook', simple_name='Old', state=state)
+        TransactionTypeService().upsert(
+            [{'name': 'CreateBook', 'simple_name': 'Create Book', 'state': state},
+             {'name': 'DeleteBook', 'simple_name': 'Delete Book', 'state': state}],
+            unique_fields=['name'], update_fields=['simple_name'])
+        assert TransactionTypeService().filter().count() == 2, 'Should insert the new TransactionType only'
+        assert TransactionTypeService().get(name='CreateBook').simple_name == 'Create Book', \
+            'Should update the existing TransactionType'
+
+    def test_init_annotations(self):
+        """ Test that annotations passed to the service are applied to its queries"""
+        mixer.blend('base.TransactionType', name='RegisterMember')
+        transaction_type = TransactionTypeService(False, label=F('name')).get(name='RegisterMember')
+        assert transaction_type.label == 'RegisterMember', 'Should annotate the fetched TransactionType'
+
+    def test_init_lock_for_update(self):
+        """ Test that lock_for_update makes the service select for update"""
+        assert TransactionTypeService(lock_for_update=True).manager.query.select_for_update, \
+            'Should lock the selected rows'
+
 
 class TestTransactionService(object):
     def test_get(self):
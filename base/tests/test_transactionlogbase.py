@@ -0,0 +1,109 @@
+import os
+
+import pytest
+from django.db import DatabaseError
+from mixer.backend.django import mixer
+
+from base.backend import transactionlogbase
+from base.backend.transactionlogbase import TransactionLogBase
+from base.backend.transactionlogwriter import TransactionLogWriter
+from base.models import Transaction
+
+pytestmark = pytest.mark.django_db
+
+
+@pytestmark
+class TestTransactionLogWriter(object):
+    """
+    Test the batched Transaction writer, flushes are triggered by hand rather than by the worker
+    """
+
+    def test_create_and_update_are_merged(self, tmp_path):
+        writer = TransactionLogWriter(spill_dir=tmp_path)
+        completed = mixer.blend('base.State', name='Completed')
+        trans = writer.create(transaction_type=mixer.blend('base.TransactionType'), state=mixer.blend('base.State'))
+        writer.update(trans, state=completed, message='Success')
+        assert not Transaction.objects.filter(id=trans.id).exists(), 'Should not write before the flush'
+        assert writer.flush() == 1, 'Should flush one merged record'
+        saved = Transaction.objects.get(id=trans.id)
+        assert saved.state == completed and saved.message == 'Success', 'Should write the final values'
+        assert os.listdir(tmp_path) == [], 'Should remove the spill file once flushed'
+
+    def test_update_after_flush(self, tmp_path):
+        writer = TransactionLogWriter(spill_dir=tmp_path)
+        trans = writer.create(transaction_type=mixer.blend('base.TransactionType'), state=mixer.blend('base.State'))
+        writer.flush()
+        writer.update(trans, response_code='300.003.002')
+        writer.flush()
+        assert Transaction.objects.get(id=trans.id).response_code == '300.003.002', 'Should apply the update'
+
+    def test_recover_spill_file(self, tmp_path):
+        crashed = TransactionLogWriter(spill_dir=tmp_path)
+        trans = crashed.create(transaction_type=mixer.blend('base.TransactionType'), state=mixer.blend('base.State'))
+        assert len(os.listdir(tmp_path)) == 1, 'Should spill the queued record'
+        assert TransactionLogWriter(spill_dir=tmp_path).recover() == 1, 'Should replay the spilled record'
+        assert Transaction.objects.filter(id=trans.id).exists(), 'Should write the spilled transaction'
+        assert os.listdir(tmp_path) == [], 'Should remove the replayed spill file'
+
+    def test_poison_record_is_dead_lettered(self, tmp_path):
+        writer = TransactionLogWriter(spill_dir=tmp_path, max_attempts=2)
+        good = writer.create(transaction_type=mixer.blend('base.TransactionType'), state=mixer.blend('base.State'))
+        poison = writer.create(transaction_type=mixer.blend('base.TransactionType'), state=None)
+        assert writer.flush() == 1, 'Should write the good record of the failed batch'
+        assert Transaction.objects.filter(id=good.id).exists(), 'Should not hold back the good record'
+        writer.create(transaction_type=mixer.blend('base.TransactionType'), state=mixer.blend('base.State'))
+        assert writer.flush() == 1, 'Should retry the failing record with the next batch'
+        assert not writer._pending, 'Should give up after max_attempts'
+        dead_letters = [name for name in os.listdir(tmp_path) if name.startswith('dead-letter')]
+        assert os.listdir(tmp_path) == dead_letters, 'Should remove the spill segments'
+        with open(tmp_path / dead_letters[0]) as dead_letter:
+            assert str(poison.id) in dead_letter.read(), 'Should keep the record in the dead-letter file'
+
+    def test_database_down_keeps_the_records(self, tmp_path, monkeypatch):
+        writer = TransactionLogWriter(spill_dir=tmp_path, flush_interval=1, max_attempts=1)
+        trans = writer.create(transaction_type=mixer.blend('base.TransactionType'), state=mixer.blend('base.State'))
+        queued_at = trans.date_created
+
+        def database_down(*args, **kwargs):
+            raise DatabaseError('server closed the connection')
+
+        monkeypatch.setattr(writer, '_write', database_down)
+        assert writer.flush() == 0 and writer.flush() == 0, 'Should not write while the database is down'
+        assert writer._delay == 4, 'Should back off'
+        assert str(trans.id) in writer._pending, 'Should keep the record'
+        assert all(name.startswith('transactions') for name in os.listdir(tmp_path)), \
+            'Should keep the spill segments and not dead-letter'
+        monkeypatch.undo()
+        assert writer.flush() == 1, 'Should write the record once the database is back'
+        assert writer._delay == 1, 'Should stop backing off'
+        assert Transaction.objects.get(id=trans.id).date_created == queued_at, 'Should keep the time of the event'
+        assert os.listdir(tmp_path) == [], 'Should remove the spill segments'
+
+
+@pytestmark
+class TestTransactionLogBase(object):
+    """
+    Test transaction logging with the asynchronous writer enabled
+    """
+
+    def test_async_log_transaction(self, settings, tmp_path, monkeypatch):
+        settings.TRANSACTION_LOG_ASYNC = True
+        writer = TransactionLogWriter(spill_dir=tmp_path)
+        monkeypatch.setattr(transactionlogbase, 'get_transaction_log_writer', lambda: writer)
+        mixer.blend('base.State', name='Active')
+        mixer.blend('base.State', name='Completed')
+        mixer.blend('base.TransactionType', name='CreateBook')
+        trans = TransactionLogBase.log_transaction('CreateBook', message='Book created')
+        assert trans is not None, 'Should return the queued transaction'
+        TransactionLogBase.complete_transaction(trans, response_code='100.000.000')
+        assert Transaction.objects.count() == 0, 'Should not write on the request thread'
+        writer.flush()
+        saved = Transaction.objects.get(id=trans.id)
+        assert saved.state.name == 'Completed', 'Should be marked completed'
+        assert saved.response_code == '100.000.000', 'Should keep the completion response code'
+
+    def test_async_log_unknown_type(self, settings, monkeypatch):
+        settings.TRANSACTION_LOG_ASYNC = True
+        writer = TransactionLogWriter()
+        monkeypatch.setattr(transactionlogbase, 'get_transaction_log_writer', lambda: writer)
+        assert TransactionLogBase.log_transaction('Unknown') is None, 'Should fail for an unknown transaction type'
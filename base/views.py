@@ -1,3 +1,16 @@
-from django.shortcuts import render
+import logging
 
-# Create your views here.
+from django.http import HttpResponse
+
+from base.backend.metrics import get_metrics_registry
+
+lgr = logging.getLogger(__name__)
+
+
+def metrics(request):
+    try:
+        return HttpResponse(
+            get_metrics_registry().render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    except Exception as e:
+        lgr.exception(f"metrics error {e}")
+        return HttpResponse(status=500)
@@ -1,31 +1,35 @@
 from django.contrib import admin
 
-from books.models import Author, Category, Books, BookIssued, BookFees
+from base.backend.projections import ProjectedAdmin
+from books.models import Author, Category, Books, BookIssued, BookFees, CirculationSummary, MemberFeeBalance, BookHold, \
+    BookCopy
 
 
 # Register your models here.
 @admin.register(Author)
-class AuthorAdmin(admin.ModelAdmin):
+class AuthorAdmin(ProjectedAdmin):
     """
     Author admin site
     """
     list_display = ('salutation', 'first_name','last_name', 'description', 'state', 'date_modified', 'date_created')
     search_fields = ('first_name','last_name')
     list_filter = ('state__name', 'date_created')
+    list_select_related = ('state',)
 
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(ProjectedAdmin):
     """
     Category admin site
     """
     list_display = ('name', 'description', 'state', 'date_modified', 'date_created')
     search_fields = ('name',)
     list_filter = ('state__name', 'date_created')
+    list_select_related = ('state',)
 
 
 @admin.register(Books)
-class BooksAdmin(admin.ModelAdmin):
+class BooksAdmin(ProjectedAdmin):
     """
     Books admin site
     """
@@ -34,10 +38,14 @@ class BooksAdmin(admin.ModelAdmin):
         'date_created')
     search_fields = ('isbn', 'author', 'title')
     list_filter = ('status__name', 'date_created', 'author')
+    list_select_related = ('author', 'category', 'status')
+    list_only = (
+        'isbn', 'title', 'published_date', 'edition', 'book_image', 'date_modified', 'date_created',
+        'author__salutation', 'author__first_name', 'author__last_name', 'category__name', 'status__name')
 
 
 @admin.register(BookIssued)
-class BookIssuedAdmin(admin.ModelAdmin):
+class BookIssuedAdmin(ProjectedAdmin):
     """
     Books admin site
     """
@@ -45,10 +53,65 @@ class BookIssuedAdmin(admin.ModelAdmin):
         'book', 'member', 'issued_date', 'borrow_duration', 'return_date', 'return_fee', 'fee_paid', 'returned')
     search_fields = ('book__author', 'book__title', 'member__membership_no')
     list_filter = ('book__author', 'issued_date')
+    list_select_related = ('book__author', 'member')
+    list_only = (
+        'issued_date', 'borrow_duration', 'return_date', 'return_fee', 'fee_paid', 'returned',
+        'book__title', 'book__author__salutation', 'book__author__first_name', 'book__author__last_name',
+        'member__first_name', 'member__last_name')
+
+
 @admin.register(BookFees)
-class BookFeesAdmin(admin.ModelAdmin):
+class BookFeesAdmin(ProjectedAdmin):
     """
     Books admin site
     """
-    list_display = ('borrow_fee', 'late_return_rate', 'max_borrow_fee_limit')
+    list_display = ('borrow_fee', 'late_return_rate', 'max_borrow_fee_limit', 'effective_from')
     search_fields = ('borrow_fee', 'late_return_rate', 'max_borrow_fee_limit')
+
+
+@admin.register(CirculationSummary)
+class CirculationSummaryAdmin(ProjectedAdmin):
+    """
+    Circulation summary admin site
+    """
+    list_display = ('category', 'books_on_loan', 'total_loans', 'outstanding_fees')
+    search_fields = ('category__name',)
+    list_select_related = ('category',)
+
+
+@admin.register(MemberFeeBalance)
+class MemberFeeBalanceAdmin(ProjectedAdmin):
+    """
+    Member fee balance admin site
+    """
+    list_display = ('member', 'balance')
+    search_fields = ('member__membership_no', 'member__first_name', 'member__last_name')
+    list_select_related = ('member',)
+
+
+@admin.register(BookHold)
+class BookHoldAdmin(ProjectedAdmin):
+    """
+    Book holds admin site
+    """
+    list_display = ('book', 'member', 'priority', 'status', 'allocated_date', 'date_created')
+    search_fields = ('book__title', 'member__membership_no')
+    list_filter = ('status',)
+    list_select_related = ('book__author', 'member')
+    list_only = (
+        'priority', 'status', 'allocated_date', 'date_created', 'book__title', 'book__author__salutation',
+        'book__author__first_name', 'book__author__last_name', 'member__first_name', 'member__last_name')
+
+
+@admin.register(BookCopy)
+class BookCopyAdmin(ProjectedAdmin):
+    """
+    Book copies admin site
+    """
+    list_display = ('barcode', 'book', 'status', 'date_modified')
+    search_fields = ('barcode', 'book__title', 'book__isbn')
+    list_filter = ('status',)
+    list_select_related = ('book__author',)
+    list_only = (
+        'barcode', 'status', 'date_modified', 'book__title', 'book__author__salutation', 'book__author__first_name',
+        'book__author__last_name')
@@ -1,15 +1,29 @@
 import json
 import logging
 
+from django.conf import settings
 from django.core import serializers
-from django.db.models import F, Q, Value, DateField, Case, When
+from django.db import router
+from django.db.transaction import atomic, set_rollback
+from django.db.models import F, Q, Value, DateField, Case, When, Count, Sum
 from django.db.models.functions import Concat, TruncDate, Cast
 from django.forms.models import model_to_dict
+from django.utils import timezone
 
+from base.backend.dbrouter import read_replica
+from base.backend.responsecache import cached_response
 from base.backend.service import StateService
+from base.backend.serviceregistry import get_service
+from base.backend.stateregistry import StateRegistry
 from base.backend.transactionlogbase import TransactionLogBase
+from base.backend.utils.pagination import is_paginated, page_response, apage_response
 from base.backend.utils.utilities import validate_uuid4, validate_name
-from books.backend.service import AuthorService, CategoryService, BookService, BookIssuedService, BookFeesService
+from books.backend.catalogue_import import CATALOGUE_FORMATS, CatalogueImporter, read_rows
+from books.backend.fees import BookFeesRegistry
+from books.backend.search import get_search_backend
+from books.backend.service import AuthorService, CategoryService, BookService, BookIssuedService, \
+    CirculationSummaryService, MemberFeeBalanceService, BookHoldService, BookCopyService
+from books.models import Books, BookHold, BookCopy
 from members.backend.service import MemberService
 
 lgr = logging.getLogger(__name__)
@@ -37,7 +51,7 @@ class BooksAdministration(TransactionLogBase):
             last_name = kwargs.pop("last_name")
             salutation = kwargs.get('salutation')
             description = kwargs.get('description', None)
-            author = AuthorService().create(
+            author = get_service(AuthorService).create(
                 first_name=first_name, last_name=last_name, salutation=salutation, description=description)
             if not author:
                 self.mark_transaction_failed(transaction, message='Author not created', response_code='300.001.001')
@@ -51,6 +65,7 @@ class BooksAdministration(TransactionLogBase):
                 transaction, response=str(e), message='Error occurred in add Author', response_code='999.999.999')
             return {'code': '999.999.999', 'message': 'Error occurred during author creation'}
 
+    @read_replica
     def get_author(self, request, author_id):
         """
         Get author from database
@@ -59,7 +74,8 @@ class BooksAdministration(TransactionLogBase):
         :return: dict with Author obj or error code
         """
         try:
-            auth = AuthorService().filter(pk=author_id).annotate(state_name=F('state__name')).values().first()
+            auth = get_service(AuthorService).filter(pk=author_id).annotate(
+                state_name=F('state__name')).values().first()
             return {'code': '100.000.000', 'data': auth}
         except Exception as e:
             print(e)
@@ -75,7 +91,7 @@ class BooksAdministration(TransactionLogBase):
         try:
             if not validate_uuid4(author_id):
                 return {'code': '500.400.004', 'message': 'Invalid author identifier'}
-            auth = AuthorService().get(pk=author_id)
+            auth = get_service(AuthorService).get(pk=author_id)
             if not auth:
                 self.mark_transaction_failed(transaction, message='Author not found', response_code='300.002.002')
                 return {'code': '300.002.002', 'message': 'Author not found'}
@@ -84,6 +100,8 @@ class BooksAdministration(TransactionLogBase):
             print(e)
             return None
 
+    @cached_response('books.Author', 'base.State')
+    @read_replica
     def get_authors(self, request, **kwargs):
         """
         Get authors from database
@@ -92,10 +110,12 @@ class BooksAdministration(TransactionLogBase):
         :return:list of all authors
         """
         try:
-            authors = AuthorService().filter().annotate(
+            authors = get_service(AuthorService).filter().annotate(
                 state_name=F('state__name'), full_name=Concat(
                     F('salutation'), Value(' '),
                     F('first_name'), Value(' '), F('last_name'))).values()
+            if is_paginated(**kwargs):
+                return page_response(authors, {'code': '300.001.404', 'message': 'Authors not found'}, **kwargs)
             return {'code': '100.000.000', 'data': list(authors)}
         except Exception as e:
             lgr.exception(f"Error during fetch of authors {e}")
@@ -118,16 +138,16 @@ class BooksAdministration(TransactionLogBase):
                 self.mark_transaction_failed(
                     transaction, message="Invalid author identifier", response_code="300.001.004")
                 return {'code': '300.001.004', 'message': 'Invalid author identifier'}
-            author = AuthorService().get(id=author_id)
+            author = get_service(AuthorService).get(id=author_id)
             if not author:
                 self.mark_transaction_failed(transaction, message="Author not found", reponse_code='300.001.404')
                 return {'code': '300.001.404', 'message': 'Author not found'}
-            update_author = AuthorService().update(author.id, **kwargs)
+            update_author = get_service(AuthorService).update(author.id, **kwargs)
             if not update_author:
                 self.mark_transaction_failed(transaction, message='Author not update', response_code='300.001.002')
                 return {'code': '300.001.002', 'message': 'Author update failed'}
             resp = model_to_dict(update_author)
-            resp['state'] = StateService().get(id=resp.pop('state')).name
+            resp['state'] = StateRegistry.get(pk=resp.pop('state')).name
             self.complete_transaction(transaction, response_code='100.000.000', message='Success')
             return {'code': '100.000.000', 'message': 'Success', 'data': resp}
         except Exception as e:
@@ -146,11 +166,12 @@ class BooksAdministration(TransactionLogBase):
             transaction = self.log_transaction('DeleteAuthor', request=request, user=request.user)
             if not transaction:
                 return {'code': '900.500.500', 'message': 'Delete Author transaction failed'}
-            author = AuthorService().get(id=author_id)
+            author = get_service(AuthorService).get(id=author_id)
             if not author:
                 self.mark_transaction_failed(transaction, message='Author not found', repsonse_code='300.001.004')
                 return {'code': '300.001.004', 'message': 'Author not found'}
-            update_author = AuthorService().update(author.id, state=StateService().get(name="Deleted"))
+            update_author = get_service(AuthorService).update(
+                author.id, state=get_service(StateService).get(name="Deleted"))
             if not update_author:
                 self.mark_transaction_failed(
                     transaction, message='Failed to mark author as deleted', response_code='300.001.003')
@@ -179,7 +200,7 @@ class BooksAdministration(TransactionLogBase):
             if not validate_name(name):
                 self.mark_transaction_failed(transaction, message="Invalid name provide", response_code='500.400.001')
                 return {'code': '500.400.001', 'message': 'Invalid name provide'}
-            category = CategoryService().create(name=name, **kwargs)
+            category = get_service(CategoryService).create(name=name, **kwargs)
             if not category:
                 self.mark_transaction_failed(
                     transaction, message='Failed to created category', response_code='300.002.002')
@@ -193,6 +214,7 @@ class BooksAdministration(TransactionLogBase):
                 response=str(e), response_code='999.999.999')
             return {'code': '999.999.999', 'message': 'Error Occurred during create category'}
 
+    @read_replica
     def get_category(self, request, category_id):
         """
         Get author from database
@@ -203,7 +225,8 @@ class BooksAdministration(TransactionLogBase):
         try:
             if not validate_uuid4(category_id):
                 return {'code': '500.400.004', 'message': 'Invalid category identifier'}
-            category = CategoryService().filter(id=category_id).annotate(state_name=F('state__name')).values().first()
+            category = get_service(CategoryService).filter(id=category_id).annotate(
+                state_name=F('state__name')).values().first()
             if not category:
                 return {'code': '300.002.003', 'message': 'Category not found'}
             return {'code': '100.000.000', 'data': category}
@@ -223,7 +246,7 @@ class BooksAdministration(TransactionLogBase):
                 self.mark_transaction_failed(
                     transaction, message='Invalid book identifier', response_code='300.003.004')
                 return {'code': '300.003.004', 'message': 'Invalid book identifier'}
-            category = CategoryService().get(id=category_id)
+            category = get_service(CategoryService).get(id=category_id)
             if not category:
                 self.mark_transaction_failed(transaction, message='Category not found', response_code='300.002.002')
                 return {'code': '300.002.002', 'message': 'Category not found'}
@@ -232,6 +255,8 @@ class BooksAdministration(TransactionLogBase):
             lgr.exception(f"Failed to fetch category with Error : {e}")
             return {'code': '999.999.999', 'message': 'An error occurred during get category'}
 
+    @cached_response('books.Category', 'base.State')
+    @read_replica
     def get_categories(self, request, **kwargs):
         """
         Get categories from database
@@ -240,8 +265,12 @@ class BooksAdministration(TransactionLogBase):
         :return: return queryset | []
         """
         try:
-            delete = StateService().get(name='Deleted')
-            categories = CategoryService().filter(~Q(state=delete)).annotate(state_name=F('state__name')).values()
+            delete = get_service(StateService).get(name='Deleted')
+            categories = get_service(CategoryService).filter(~Q(state=delete)).annotate(
+                state_name=F('state__name')).values()
+            if is_paginated(**kwargs):
+                return page_response(
+                    categories, {'code': '300.002.003', 'message': 'No categories found'}, **kwargs)
             if not categories:
                 return {'code': '300.002.003', 'message': 'No categories found'}
             return {'code': '100.000.000', 'data': list(categories)}
@@ -266,11 +295,11 @@ class BooksAdministration(TransactionLogBase):
                 self.mark_transaction_failed(
                     transaction, message='Invalid category identifier', response_code='500.400.004')
                 return {'code': '500.400.004', 'message': 'Invalid category identifier'}
-            category = CategoryService().get(id=category_id)
+            category = get_service(CategoryService).get(id=category_id)
             if not category:
                 self.mark_transaction_failed(transaction, message='Category not found', response_code='300.002.002')
                 return {'code': '300.002.002', 'message': 'Category not found'}
-            update_category = CategoryService().update(category.id, **kwargs)
+            update_category = get_service(CategoryService).update(category.id, **kwargs)
             if not update_category:
                 self.mark_transaction_failed(
                     transaction, message='Failed to update category', response_code='300.002.003')
@@ -297,11 +326,12 @@ class BooksAdministration(TransactionLogBase):
                 self.mark_transaction_failed(
                     transaction, message="Invalid category identifier", response_code='500.400.004')
                 return {'code': '500.400.004', 'message': 'Invalid category identifier'}
-            category = CategoryService().get(id=category_id)
+            category = get_service(CategoryService).get(id=category_id)
             if not category:
                 self.mark_transaction_failed(transaction, message='Category not found', response_code='300.002.002')
                 return {'code': '300.002.002', 'message': 'Category not found'}
-            update_category = CategoryService().update(category.id, state=StateService().get(name='Deleted'))
+            update_category = get_service(CategoryService).update(
+                category.id, state=get_service(StateService).get(name='Deleted'))
             if not update_category:
                 self.mark_transaction_failed(
                     transaction, message='Failed to delete category', response_code='300.002.003')
@@ -326,20 +356,20 @@ class BooksAdministration(TransactionLogBase):
                 return {'code': '900.500.500', 'message': 'Transaction Failed'}
             author_id = kwargs.pop('author')
             category_id = kwargs.pop('category')
-            author = AuthorService().get(id=author_id) if validate_uuid4(author_id) else AuthorService().filter(
-                name=author_id).first()
+            author = get_service(AuthorService).get(id=author_id) if validate_uuid4(author_id) else get_service(
+                AuthorService).filter(name=author_id).first()
             if not author:
                 self.mark_transaction_failed(transaction, message="Author not found", response_code="300.001.001")
                 return {'code': '300.001.001', 'message': 'Author not found'}
 
             kwargs['author'] = author
-            category = CategoryService().get(id=category_id) if validate_uuid4(
-                category_id) else CategoryService().filter(name=category_id).first()
+            category = get_service(CategoryService).get(id=category_id) if validate_uuid4(
+                category_id) else get_service(CategoryService).filter(name=category_id).first()
             if not category:
                 self.mark_transaction_failed(transaction, message="Category not found", response_code="300.002.001")
                 return {'code': '300.002.001', 'message': 'Category not found'}
             kwargs['category'] = category
-            book = BookService().create(**kwargs)
+            book = get_service(BookService).create(**kwargs)
             if not book:
                 self.mark_transaction_failed(
                     transaction, message="Unable to create book record", response_code="300.003.003")
@@ -350,6 +380,39 @@ class BooksAdministration(TransactionLogBase):
             self.mark_transaction_failed(transaction, response=str(e), response_code="999.999.999")
             return {'code': '999.999.999', 'message': 'Error Occurred during book creation'}
 
+    def import_books(self, request, stream, fmt='csv', **kwargs):
+        """
+        Handles bulk import of books from a CSV or JSON Lines file, invalid rows are reported without
+        stopping the import
+        :param request: the original request
+        :param stream: the uploaded file object
+        :param fmt: csv | jsonl
+        :param kwargs: batch_size may be sent to override the configured batch size
+        :return: dict response with code and the import report
+        """
+        transaction = None
+        try:
+            transaction = self.log_transaction('ImportBooks', request=request, user=request.user)
+            if not transaction:
+                return {'code': '900.500.500', 'message': 'Transaction Failed'}
+            if fmt not in CATALOGUE_FORMATS:
+                self.mark_transaction_failed(transaction, message='Invalid import format', response_code='500.400.006')
+                return {'code': '500.400.006', 'message': 'Invalid import format'}
+            batch_size = int(kwargs.get('batch_size') or 0) or None
+            report = CatalogueImporter(batch_size=batch_size).run(read_rows(stream, fmt))
+            message = f"Imported {report['created']} books, {report['failed']} failed"
+            if not report['created']:
+                self.mark_transaction_failed(transaction, message=message, response_code='300.003.009')
+                return {'code': '300.003.009', 'message': 'No books imported', 'data': report}
+            self.complete_transaction(transaction, message=message, response_code='100.000.000')
+            return {'code': '100.000.000', 'message': message, 'data': report}
+        except Exception as e:
+            lgr.exception(f"Import books exception: {e}")
+            self.mark_transaction_failed(transaction, response=str(e), response_code='999.999.999')
+            return {'code': '999.999.999', 'message': 'Error Occurred during books import'}
+
+    @cached_response('books.Books', 'books.BookCopy', 'base.State')
+    @read_replica
     def get_book(self, request, book_id):
         """
         handle fetching of one book
@@ -360,7 +423,7 @@ class BooksAdministration(TransactionLogBase):
         try:
             if not validate_uuid4(book_id):
                 return {'code': '500.400.004', 'message': 'Invalid book identifier'}
-            book = BookService().filter(id=book_id).annotate(state_name=F('status__name')).values().first()
+            book = self.__book_query(book_id).first()
             if not book:
                 return {'code': '300.003.002', 'message': 'No book record found'}
             return {'code': '100.000.000', 'data': book}
@@ -368,6 +431,34 @@ class BooksAdministration(TransactionLogBase):
             lgr.exception(f"Error during fetch book : {e}")
             return {'code': '999.999.999', 'message': 'Error during fetch book'}
 
+    @cached_response('books.Books', 'books.BookCopy', 'base.State')
+    @read_replica
+    async def aget_book(self, request, book_id):
+        """
+        Async variant of get_book for the async views
+        :param request: original request as received
+        :param book_id: the unique identifier of the book
+        :return: dict response with the book data
+        """
+        try:
+            if not validate_uuid4(book_id):
+                return {'code': '500.400.004', 'message': 'Invalid book identifier'}
+            book = await self.__book_query(book_id).afirst()
+            if not book:
+                return {'code': '300.003.002', 'message': 'No book record found'}
+            return {'code': '100.000.000', 'data': book}
+        except Exception as e:
+            lgr.exception(f"Error during async fetch book : {e}")
+            return {'code': '999.999.999', 'message': 'Error during fetch book'}
+
+    @staticmethod
+    def __book_query(book_id):
+        return get_service(BookService).filter(id=book_id).annotate(
+            state_name=F('status__name'),
+            available_copies=Count('copies', filter=Q(copies__status=BookCopy.AVAILABLE))).values()
+
+    @cached_response('books.Books', 'books.Author', 'books.Category', 'base.State')
+    @read_replica
     def get_books(self, request, **kwargs):
         """
         Handles fetching of multiple books, either with added conditions
@@ -377,12 +468,9 @@ class BooksAdministration(TransactionLogBase):
         :return: dict response of a list of all books based on conditions provided
         """
         try:
-            books = BookService().filter().annotate(
-                status_name=F('status__name'),
-                category_name=F('category__name'),
-                author_name=Concat(
-                    F('author__salutation'), Value(' '), F('author__first_name'), Value(' '), F('author__last_name'))
-            ).values()
+            books = self.__books_query()
+            if is_paginated(**kwargs):
+                return page_response(books, {'code': '300.003.002', 'message': 'No book records found'}, **kwargs)
             if not books:
                 return {'code': '300.003.002', 'message': 'No book records found'}
             return {'code': '100.000.000', 'data': list(books)}
@@ -390,6 +478,37 @@ class BooksAdministration(TransactionLogBase):
             lgr.exception(f"Error occurred during fetch books : {e}")
             return {'code': '999.999.999', 'message': 'Error occurred during fetch books'}
 
+    @cached_response('books.Books', 'books.Author', 'books.Category', 'base.State')
+    @read_replica
+    async def aget_books(self, request, **kwargs):
+        """
+        Async variant of get_books for the async views
+        :param request: original request received
+        :param kwargs: limit, cursor and stream select a page or a stream of the books
+        :return: dict response of the books
+        """
+        try:
+            books = self.__books_query()
+            if is_paginated(**kwargs):
+                return await apage_response(
+                    books, {'code': '300.003.002', 'message': 'No book records found'}, **kwargs)
+            data = [book async for book in books]
+            if not data:
+                return {'code': '300.003.002', 'message': 'No book records found'}
+            return {'code': '100.000.000', 'data': data}
+        except Exception as e:
+            lgr.exception(f"Error occurred during async fetch books : {e}")
+            return {'code': '999.999.999', 'message': 'Error occurred during fetch books'}
+
+    @staticmethod
+    def __books_query():
+        return get_service(BookService).filter().annotate(
+            status_name=F('status__name'),
+            category_name=F('category__name'),
+            author_name=Concat(
+                F('author__salutation'), Value(' '), F('author__first_name'), Value(' '), F('author__last_name'))
+        ).values()
+
     def update_book(self, request, **kwargs):
         """
         Handles updating of books personal information or 
@@ -412,7 +531,7 @@ class BooksAdministration(TransactionLogBase):
                 self.mark_transaction_failed(
                     transaction, message='Invalid book identifier', response_code='300.003.004')
                 return {'code': '300.003.004', 'message': 'Invalid book identifier'}
-            book = BookService().get(id=book_id)
+            book = get_service(BookService).get(id=book_id)
             if not book:
                 self.mark_transaction_failed(transaction, message="Book not found", response_code='300.003.002')
                 return {'code': '300.003.002', 'message': 'Book not found'}
@@ -428,7 +547,7 @@ class BooksAdministration(TransactionLogBase):
                     return category
                 kwargs['category'] = category.get('data')
             print(f"book {kwargs}")
-            update_book = BookService().update(book.id, **kwargs)
+            update_book = get_service(BookService).update(book.id, **kwargs)
             if not update_book:
                 self.mark_transaction_failed(
                     transaction, message='Failed to update the book record', response_code='300.003.003')
@@ -460,11 +579,12 @@ class BooksAdministration(TransactionLogBase):
                 self.mark_transaction_failed(transaction, message="Invalid book identifier",
                                              response_code='300.003.004')
                 return {'code': '300.003.004', 'message': 'Invalid book identifier'}
-            book = BookService().get(id=book_id)
+            book = get_service(BookService).get(id=book_id)
             if not book:
                 self.mark_transaction_failed(transaction, message='Book not found', response_code='300.003.002')
                 return {'code': '300.003.002', 'message': 'Book not found'}
-            updated_book = BookService().update(book.id, status=StateService().get(name='Deleted'))
+            updated_book = get_service(BookService).update(
+                book.id, status=get_service(StateService).get(name='Deleted'))
             if not updated_book:
                 self.mark_transaction_failed(transaction, message='Failed to delete book', response_code='300.003.003')
                 return {'code': '300.003.003', 'message': 'Failed to delete book'}
@@ -491,11 +611,12 @@ class BooksAdministration(TransactionLogBase):
                 self.mark_transaction_failed(transaction, message="Invalid book identifier",
                                              response_code='300.003.004')
                 return {'code': '300.003.004', 'message': 'Invalid book identifier'}
-            book = BookService().get(id=book_id)
+            book = get_service(BookService).get(id=book_id)
             if not book:
                 self.mark_transaction_failed(transaction, message='Book not found', response_code='300.003.002')
                 return {'code': '300.003.002', 'message': 'Book not found'}
-            updated_book = BookService().update(book.id, state=StateService().get(name='Archived'))
+            updated_book = get_service(BookService).update(
+                book.id, state=get_service(StateService).get(name='Archived'))
             if not updated_book:
                 self.mark_transaction_failed(transaction, message='Failed to archive book', response_code='300.003.003')
                 return {'code': '300.003.003', 'message': 'Failed to archive book'}
@@ -508,7 +629,7 @@ class BooksAdministration(TransactionLogBase):
 
     def borrow_book(self, request, book_id, member_id, **kwargs):
         """
-        Handles borrowing of a book from the system, i.e. then reduce the number of available books
+        Handles borrowing of a book from the system, i.e. lends one of its available copies
         :param member_id: the unique member identifier
         :param request: Original Django HTTP request
         :param book_id: the unique book identifier
@@ -519,62 +640,118 @@ class BooksAdministration(TransactionLogBase):
             transaction = self.log_transaction('BorrowBook', request=request, user=request.user)
             if not transaction:
                 return {'code': '900.500.500', 'message': 'Borrow book transaction failed'}
-            borrow_duration = kwargs.get('borrow_duration', 7)
             if not validate_uuid4(book_id):
                 self.mark_transaction_failed(
                     transaction, message="Invalid book identifier", response_code='300.003.004')
                 return {'code': '300.003.004', 'message': 'Invalid book identifier'}
-            book = BookService().get(id=book_id)
-            if not book:
-                self.mark_transaction_failed(transaction, message='Book not found', response_code='300.003.002')
-                return {'code': '300.003.002', 'message': 'Book not found'}
-            if not validate_uuid4(member_id):
-                self.mark_transaction_failed(
-                    transaction, message="Invalid member identifier", response_code='300.003.004')
-                return {'code': '300.003.004', 'message': 'Invalid member identifier'}
-            member = MemberService().get(id=member_id)
-            if not member:
-                self.mark_transaction_failed(transaction, message='Member not found', response_code='200.001.002')
-                return {'code': '200.001.002', 'message': 'Member not found'}
-            # check if the number of remaining books is greater than the number of reserve books
-            if book.no_of_books <= book.no_of_reserve_books:
-                self.mark_transaction_failed(
-                    transaction, message="Book not available for borrowing", response_code='300.003.005')
-                return {'code': '300.003.005', 'message': 'Book not available for borrowing'}
-            # check if the member is eligible to borrow a book
-            total_fee = 0
-            if BookIssuedService().filter(member=member):
-                total_fee = BookIssuedService().filter(member=member).first().total_fee
-            book_fee = BookFeesService().filter().first()
-            if not book_fee:
-                self.mark_transaction_failed(transaction, message='Failed to get book fees',
-                                             response_code='300.004.002')
-                return {'code': '300.004.002', 'message': 'Failed to get book fees'}
-            if total_fee >= book_fee.max_borrow_fee_limit:
-                self.mark_transaction_failed(
-                    transaction, message='Member not eligible to borrow book due to uncleared fees',
-                    response_code='200.001.007')
-                return {'code': '200.001.007', 'message': 'Member not eligible to borrow book due to uncleared fees'}
-            updated_book = BookService().update(book.id, no_of_books=book.no_of_books - 1)
-            if not updated_book:
-                self.mark_transaction_failed(transaction, message='Failed to borrow book', response_code='300.003.006')
-                return {'code': '300.003.006', 'message': 'Failed to borrow book'}
-            book_issued = BookIssuedService().create(
-                book=book, member=member, borrow_duration=borrow_duration,
-                total_fee=total_fee + book_fee.borrow_fee, return_fee=book_fee.borrow_fee)
-            if not book_issued:
-                self.mark_transaction_failed(transaction, message='Failed to issued book ', response_code='300.003.003')
-                return {'code': '300.003.003', 'message': 'Failed to issued book'}
-            self.complete_transaction(transaction, message='Success')
-            return {'code': '100.000.000', 'message': 'Success'}
+            return self.__lend(transaction, book_id, member_id, **kwargs)
         except Exception as e:
             lgr.exception(f"Error during borrowing of book : {e}")
             self.mark_transaction_failed(transaction, message='Failed to borrower the book', response=str(e))
             return {'code': '999.999.999', 'message': 'Error Failed to borrower book record'}
 
+    def borrow_copy(self, request, barcode, member_id, **kwargs):
+        """
+        Handles borrowing of the copy scanned at the circulation desk
+        :param request: Original Django HTTP request
+        :param barcode: the barcode of the copy
+        :param member_id: the unique member identifier
+        :return: dict response with code
+        """
+        transaction = None
+        try:
+            transaction = self.log_transaction('BorrowBook', request=request, user=request.user)
+            if not transaction:
+                return {'code': '900.500.500', 'message': 'Borrow book transaction failed'}
+            copy = get_service(BookCopyService).filter(barcode=str(barcode)).values('id', 'book_id').first()
+            if not copy:
+                self.mark_transaction_failed(transaction, message='Copy not found', response_code='300.006.002')
+                return {'code': '300.006.002', 'message': 'Copy not found'}
+            return self.__lend(transaction, copy['book_id'], member_id, copy_id=copy['id'], **kwargs)
+        except Exception as e:
+            lgr.exception(f"Error during borrowing of copy : {e}")
+            self.mark_transaction_failed(transaction, message='Failed to borrower the copy', response=str(e))
+            return {'code': '999.999.999', 'message': 'Error Failed to borrower copy'}
+
+    def __lend(self, transaction, book_id, member_id, copy_id=None, **kwargs):
+        """
+        Lends a copy of the book to the member if they are eligible
+        :param transaction: the BorrowBook transaction
+        :param book_id: the unique book identifier
+        :param member_id: the unique member identifier
+        :param copy_id: the copy scanned, the copy allocated to the member's hold or any available copy if None
+        :return: dict response with code
+        """
+        borrow_duration = kwargs.get('borrow_duration', 7)
+        if not validate_uuid4(member_id):
+            self.mark_transaction_failed(
+                transaction, message="Invalid member identifier", response_code='300.003.004')
+            return {'code': '300.003.004', 'message': 'Invalid member identifier'}
+        member = get_service(MemberService).get(id=member_id)
+        if not member:
+            self.mark_transaction_failed(transaction, message='Member not found', response_code='200.001.002')
+            return {'code': '200.001.002', 'message': 'Member not found'}
+        book_fee = BookFeesRegistry.current()
+        if not book_fee:
+            self.mark_transaction_failed(transaction, message='Failed to get book fees',
+                                         response_code='300.004.002')
+            return {'code': '300.004.002', 'message': 'Failed to get book fees'}
+        # check the member's eligibility, charge, take the copy, issue it and complete the audit entry together.
+        # The eligibility check is the conditional UPDATE charging the fee, so concurrent borrows by the member
+        # cannot both pass it, and SQLite holds its write lock from there while the copy is picked.
+        # The services called in the block raise on database errors, which rolls the block back.
+        book_issued = lent = None
+        with atomic():
+            total_fee = get_service(MemberFeeBalanceService).charge(
+                member.id, book_fee.borrow_fee, book_fee.max_borrow_fee_limit)
+            hold = get_service(BookHoldService).fulfil(book_id, member.id) if total_fee is not None else False
+            lent = self.__checkout(book_id, copy_id, hold) if hold is not False else None
+            if lent:
+                book_issued = get_service(BookIssuedService).manager.create(
+                    book_id=book_id, member=member, copy_id=lent, borrow_duration=borrow_duration,
+                    total_fee=total_fee, return_fee=book_fee.borrow_fee)
+            if book_issued and self.__record_circulation(book_id, 1, book_issued.return_fee):
+                self.complete_transaction_atomically(transaction, message='Success')
+            else:
+                book_issued = None
+                set_rollback(True)
+        if total_fee is None:
+            self.mark_transaction_failed(
+                transaction, message='Member not eligible to borrow book due to uncleared fees',
+                response_code='200.001.007')
+            return {'code': '200.001.007', 'message': 'Member not eligible to borrow book due to uncleared fees'}
+        if hold is not False and not lent:
+            if not get_service(BookService).filter(id=book_id).exists():
+                self.mark_transaction_failed(transaction, message='Book not found', response_code='300.003.002')
+                return {'code': '300.003.002', 'message': 'Book not found'}
+            self.mark_transaction_failed(
+                transaction, message="Book not available for borrowing", response_code='300.003.005')
+            return {'code': '300.003.005', 'message': 'Book not available for borrowing'}
+        if not book_issued:
+            self.mark_transaction_failed(transaction, message='Failed to issued book ', response_code='300.003.003')
+            return {'code': '300.003.003', 'message': 'Failed to issued book'}
+        return {'code': '100.000.000', 'message': 'Success'}
+
+    def __checkout(self, book_id, copy_id, hold):
+        """
+        Takes the copy to lend out of stock: the copy scanned, else the copy allocated to the member's hold,
+        else any available copy. When another copy than the allocated one is scanned the allocated copy is
+        passed on. Call it in the transaction issuing the loan.
+        :param hold: the member's hold just fulfilled or None
+        :return: the id of the copy taken or None
+        """
+        held_copy = hold.copy_id if hold else None
+        target = copy_id or held_copy
+        lent = get_service(BookCopyService).checkout(
+            book_id, copy_id=target,
+            statuses=(BookCopy.ALLOCATED,) if target and target == held_copy else (BookCopy.AVAILABLE,))
+        if lent and held_copy and lent != held_copy and not self.__release_copy(book_id, held_copy):
+            return None
+        return lent
+
     def return_book(self, request, book_id, member_id):
         """
-        Handles archiving  of a book from the system, i.e. updated to state archived
+        Handles returning of a borrowed book, i.e. closes the loan and puts the copy back into stock
         :param member_id: the unique member identifier
         :param request: Original Django HTTP request
         :param book_id: the unique book identifier
@@ -589,43 +766,242 @@ class BooksAdministration(TransactionLogBase):
                 self.mark_transaction_failed(
                     transaction, message="Invalid book identifier", response_code='300.003.004')
                 return {'code': '300.003.004', 'message': 'Invalid book identifier'}
-            book = BookService().get(id=book_id)
-            if not book:
-                self.mark_transaction_failed(transaction, message='Book not found', response_code='300.003.002')
-                return {'code': '300.003.002', 'message': 'Book not found'}
             if not validate_uuid4(member_id):
                 self.mark_transaction_failed(
                     transaction, message="Invalid member identifier", response_code='300.003.004')
                 return {'code': '300.003.004', 'message': 'Invalid member identifier'}
-            member = MemberService().get(id=member_id)
-            if not member:
-                self.mark_transaction_failed(transaction, message='Member not found', response_code='200.001.002')
-                return {'code': '200.001.002', 'message': 'Member not found'}
-            updated_book = BookService().update(book.id, no_of_books=book.no_of_books + 1)
-            if not updated_book:
-                self.mark_transaction_failed(transaction, message='Failed to archive book', response_code='300.003.003')
-                return {'code': '300.003.003', 'message': 'Failed to archive book'}
-            book_issued = BookIssuedService().filter(book=book, member=member, returned=False).first()
+            book_issued, returned = self.__close_loan(transaction, book_id=book_id, member_id=member_id)
             if not book_issued:
+                if not get_service(BookService).filter(id=book_id).exists():
+                    self.mark_transaction_failed(transaction, message='Book not found', response_code='300.003.002')
+                    return {'code': '300.003.002', 'message': 'Book not found'}
+                if not get_service(MemberService).filter(id=member_id).exists():
+                    self.mark_transaction_failed(transaction, message='Member not found', response_code='200.001.002')
+                    return {'code': '200.001.002', 'message': 'Member not found'}
                 self.mark_transaction_failed(transaction, message='Failed to issued book ', response_code='300.003.003')
                 return {'code': '300.003.003', 'message': 'Sorry book already returned'}
-            update_issued = BookIssuedService().update(
-                book_issued.id, total_fee=book_issued.total_fee - book_issued.return_fee,
-                fee_paid=True, returned=True)
-            if not update_issued:
+            if not returned:
                 self.mark_transaction_failed(transaction, message='Failed to return book ', response_code='300.003.008')
                 return {'code': '300.003.008', 'message': 'Failed to return book'}
-            self.complete_transaction(transaction, message='Success')
             return {'code': '100.000.000', 'message': 'Success'}
         except Exception as e:
             lgr.exception(f"Error during return book : {e}")
             self.mark_transaction_failed(transaction, message='Failed to return book', response=str(e))
             return {'code': '999.999.999', 'message': 'Error Failed to return book record'}
 
+    def return_copy(self, request, barcode):
+        """
+        Handles returning of the copy scanned at the circulation desk
+        :param request: Original Django HTTP request
+        :param barcode: the barcode of the copy
+        :return: dict response with code
+        """
+        transaction = None
+        try:
+            transaction = self.log_transaction('ReturnBook', request=request, user=request.user)
+            if not transaction:
+                return {'code': '900.500.500', 'message': 'Return book transaction failed'}
+            book_issued, returned = self.__close_loan(transaction, copy__barcode=str(barcode))
+            if not book_issued:
+                if not get_service(BookCopyService).filter(barcode=str(barcode)).exists():
+                    self.mark_transaction_failed(transaction, message='Copy not found', response_code='300.006.002')
+                    return {'code': '300.006.002', 'message': 'Copy not found'}
+                self.mark_transaction_failed(transaction, message='Copy not on loan', response_code='300.003.003')
+                return {'code': '300.003.003', 'message': 'Sorry book already returned'}
+            if not returned:
+                self.mark_transaction_failed(transaction, message='Failed to return book ', response_code='300.003.008')
+                return {'code': '300.003.008', 'message': 'Failed to return book'}
+            return {'code': '100.000.000', 'message': 'Success'}
+        except Exception as e:
+            lgr.exception(f"Error during return copy : {e}")
+            self.mark_transaction_failed(transaction, message='Failed to return copy', response=str(e))
+            return {'code': '999.999.999', 'message': 'Error Failed to return copy'}
+
+    def __close_loan(self, transaction, **lookups):
+        """
+        Closes the open loan matching lookups, settles its fees, passes its copy to the next hold or back
+        into stock and completes the ReturnBook transaction, all in one transaction
+        :param transaction: the ReturnBook transaction
+        :return: tuple of the loan (None if no open loan matched) and whether it was closed
+        :rtype: tuple
+        """
+        with atomic():
+            book_issued = get_service(BookIssuedService, lock_for_update=True).filter(returned=False, **lookups).first()
+            returned = bool(book_issued) and get_service(BookIssuedService).close_loan(
+                book_issued.id) and self.__release_copy(book_issued.book_id, book_issued.copy_id) and get_service(
+                MemberFeeBalanceService).adjust(book_issued.member_id, -(
+                    book_issued.return_fee + book_issued.late_fee)) and self.__record_circulation(
+                book_issued.book_id, -1, -book_issued.return_fee)
+            if returned:
+                self.complete_transaction_atomically(transaction, message='Success')
+            else:
+                set_rollback(True)
+        return book_issued, returned
+
+    @staticmethod
+    def __release_copy(book_id, copy_id):
+        """
+        Allocates a copy coming back to the next waiting hold of the book, or puts it back into stock when
+        nobody is waiting. Call it in the transaction freeing the copy. Loans made before copies were tracked
+        have no copy to put back.
+        :return: True if the copy was allocated or put back
+        :rtype: bool
+        """
+        if not copy_id:
+            return True
+        hold = get_service(BookHoldService).allocate_next(book_id, copy_id)
+        if hold is False:
+            return False
+        return get_service(BookCopyService).move(
+            copy_id, (BookCopy.ON_LOAN, BookCopy.ALLOCATED), BookCopy.ALLOCATED if hold else BookCopy.AVAILABLE)
+
+    def place_hold(self, request, book_id, member_id, **kwargs):
+        """
+        Puts the member in the queue for a book with no copy available to borrow
+        :param request: Original Django HTTP request
+        :param book_id: the unique book identifier
+        :param member_id: the unique member identifier
+        :param kwargs: optional priority, holds with a higher priority are served first
+        :return: dict response with the hold id and its position in the queue
+        """
+        transaction = None
+        try:
+            transaction = self.log_transaction('PlaceHold', request=request, user=request.user)
+            if not transaction:
+                return {'code': '900.500.500', 'message': 'Place hold transaction failed'}
+            if not validate_uuid4(book_id):
+                self.mark_transaction_failed(
+                    transaction, message="Invalid book identifier", response_code='300.003.004')
+                return {'code': '300.003.004', 'message': 'Invalid book identifier'}
+            if not validate_uuid4(member_id):
+                self.mark_transaction_failed(
+                    transaction, message="Invalid member identifier", response_code='300.003.004')
+                return {'code': '300.003.004', 'message': 'Invalid member identifier'}
+            try:
+                priority = int(kwargs.get('priority') or 0)
+            except (TypeError, ValueError):
+                self.mark_transaction_failed(transaction, message='Invalid priority', response_code='300.005.008')
+                return {'code': '300.005.008', 'message': 'Invalid priority'}
+            member = get_service(MemberService).get(id=member_id)
+            if not member:
+                self.mark_transaction_failed(transaction, message='Member not found', response_code='200.001.002')
+                return {'code': '200.001.002', 'message': 'Member not found'}
+            book = get_service(BookService).get(id=book_id)
+            if not book:
+                self.mark_transaction_failed(transaction, message='Book not found', response_code='300.003.002')
+                return {'code': '300.003.002', 'message': 'Book not found'}
+            if get_service(BookCopyService).filter(book=book, status=BookCopy.AVAILABLE).exists():
+                self.mark_transaction_failed(
+                    transaction, message='Book available for borrowing', response_code='300.005.003')
+                return {'code': '300.005.003', 'message': 'Book available for borrowing'}
+            if get_service(BookHoldService).filter(book=book, member=member, status__in=BookHold.ACTIVE).exists():
+                self.mark_transaction_failed(
+                    transaction, message='Member already holds the book', response_code='300.005.002')
+                return {'code': '300.005.002', 'message': 'Member already holds the book'}
+            with atomic():
+                hold = get_service(BookHoldService).create(book=book, member=member, priority=priority)
+                if not hold:
+                    set_rollback(True)
+            if not hold:
+                self.mark_transaction_failed(transaction, message='Failed to place hold', response_code='300.005.004')
+                return {'code': '300.005.004', 'message': 'Failed to place hold'}
+            self.complete_transaction(transaction, message='Success')
+            return {'code': '100.000.000', 'message': 'Success', 'data': {
+                'hold_id': hold.id, 'position': get_service(BookHoldService).position(hold)}}
+        except Exception as e:
+            lgr.exception(f"Error during place hold : {e}")
+            self.mark_transaction_failed(transaction, message='Failed to place hold', response=str(e))
+            return {'code': '999.999.999', 'message': 'Error Failed to place hold'}
+
+    def cancel_hold(self, request, hold_id):
+        """
+        Cancels a waiting or allocated hold, a copy allocated to it goes to the next hold or back into stock
+        :param request: Original Django HTTP request
+        :param hold_id: the unique hold identifier
+        :return: dict response with code
+        """
+        transaction = None
+        try:
+            transaction = self.log_transaction('CancelHold', request=request, user=request.user)
+            if not transaction:
+                return {'code': '900.500.500', 'message': 'Cancel hold transaction failed'}
+            if not validate_uuid4(hold_id):
+                self.mark_transaction_failed(
+                    transaction, message="Invalid hold identifier", response_code='300.005.001')
+                return {'code': '300.005.001', 'message': 'Invalid hold identifier'}
+            with atomic():
+                hold = get_service(BookHoldService, lock_for_update=True).filter(id=hold_id).first()
+                cancelled = bool(hold) and hold.status in BookHold.ACTIVE and get_service(BookHoldService).cancel(
+                    hold.id) and (
+                    hold.status == BookHold.WAITING or self.__release_copy(hold.book_id, hold.copy_id))
+                if not cancelled:
+                    set_rollback(True)
+            if not hold:
+                self.mark_transaction_failed(transaction, message='Hold not found', response_code='300.005.005')
+                return {'code': '300.005.005', 'message': 'Hold not found'}
+            if hold.status not in BookHold.ACTIVE:
+                self.mark_transaction_failed(
+                    transaction, message=f'Hold already {hold.status.lower()}', response_code='300.005.006')
+                return {'code': '300.005.006', 'message': f'Hold already {hold.status.lower()}'}
+            if not cancelled:
+                self.mark_transaction_failed(transaction, message='Failed to cancel hold', response_code='300.005.007')
+                return {'code': '300.005.007', 'message': 'Failed to cancel hold'}
+            self.complete_transaction(transaction, message='Success')
+            return {'code': '100.000.000', 'message': 'Success'}
+        except Exception as e:
+            lgr.exception(f"Error during cancel hold : {e}")
+            self.mark_transaction_failed(transaction, message='Failed to cancel hold', response=str(e))
+            return {'code': '999.999.999', 'message': 'Error Failed to cancel hold'}
+
+    @read_replica
+    def get_holds(self, request, **kwargs):
+        """
+        Lists holds, optionally of one book (in queue order), one member or in one status
+        :param request: Original Django HTTP request
+        :param kwargs: optional book_id, member_id and status filters and the pagination parameters
+        :return: dict response with the holds
+        """
+        try:
+            filters = {}
+            for key in ('book_id', 'member_id'):
+                if kwargs.get(key):
+                    if not validate_uuid4(kwargs[key]):
+                        return {'code': '500.400.004', 'message': f'Invalid {key.split("_")[0]} identifier'}
+                    filters[key] = kwargs[key]
+            if kwargs.get('status'):
+                filters['status'] = kwargs['status']
+            holds = get_service(BookHoldService).filter(**filters).annotate(
+                book_title=F('book__title'), membership_no=F('member__membership_no'),
+                member_name=Concat(F('member__first_name'), Value(' '), F('member__last_name'))).values(
+                'id', 'book_id', 'book_title', 'member_id', 'membership_no', 'member_name', 'priority', 'status',
+                'allocated_date', 'date_created')
+            if is_paginated(**kwargs):
+                return page_response(holds, {'code': '300.005.009', 'message': 'No holds found'}, **kwargs)
+            holds = list(holds.order_by(*BookHoldService.queue_order))
+            if not holds:
+                return {'code': '300.005.009', 'message': 'No holds found'}
+            return {'code': '100.000.000', 'data': holds}
+        except Exception as e:
+            lgr.exception(f"Error during fetch holds : {e}")
+            return {'code': '999.999.999', 'message': 'Error during fetch holds'}
+
+    @staticmethod
+    def __record_circulation(book_id, loans, fees):
+        """
+        Updates the circulation summary when it is materialized, see settings.BOOK_STATS_MATERIALIZED
+        :return: True if the summary is up to date
+        :rtype: bool
+        """
+        if not getattr(settings, 'BOOK_STATS_MATERIALIZED', False):
+            return True
+        return get_service(CirculationSummaryService).record(book_id, loans, fees)
+
     @staticmethod
     def borrow_fee_lookup():
-        return {'code': '100.000.000', 'data': BookFeesService().filter().values().first()}
+        book_fee = BookFeesRegistry.current()
+        return {'code': '100.000.000', 'data': model_to_dict(book_fee) if book_fee else None}
 
+    @read_replica
     def Issued_books(self, request, **kwargs):
         """
         Handles fetching of all books issued out  from the system,
@@ -637,25 +1013,11 @@ class BooksAdministration(TransactionLogBase):
             """
             get all books from issued book table
             """
-            issued_books = BookIssuedService().filter().annotate(
-                member_name=Concat(F('member__first_name'), Value(' '), F('member__last_name')),
-                membership_no=F('member__membership_no'), book_title=F('book__title'), author=Concat(
-                    F('book__author__salutation'), Value(' '),
-                    F('book__author__first_name'), Value(' '), F('book__author__last_name')),
-                issue_date=Cast(TruncDate('issued_date'), output_field=DateField()),
-                returned_date=Cast(TruncDate('return_date'), output_field=DateField()),
-                is_fee_paid=Case(
-                    When(fee_paid=True, then=Value('Yes')),
-                    default=Value('No')),
-                book_returned=Case(
-                    When(returned=True, then=Value('Yes')),
-                    default=Value('No'))
-
-            ).values(
-                'member_name', 'membership_no', 'book_title', 'author',
-                'borrow_duration', 'return_fee', 'total_fee', 'is_fee_paid', 'book_returned',
-                'issue_date', 'returned_date','member_id','book_id',
-            ).order_by('-issued_date')
+            issued_books = self.__issued_books_query()
+            if is_paginated(**kwargs):
+                return page_response(
+                    issued_books, {'code': '300.003.008', 'message': 'No issued books found'},
+                    keys=('issued_date', 'id'), **kwargs)
             if not issued_books:
                 return {'code': '300.003.008', 'message': 'Failed to return book'}
             return {'code': '100.000.000', 'data': list(issued_books)}
@@ -664,29 +1026,209 @@ class BooksAdministration(TransactionLogBase):
 
             return {'code': '999.999.999', 'message': 'Error Failed to return book record'}
 
-    def filter_books(self, request, **kwargs):
+    @read_replica
+    async def aIssued_books(self, request, **kwargs):
         """
-        Handles fetching of all books issued out  from the system,
+        Async variant of Issued_books for the async views
         :param request: Original Django HTTP request
         :return: dict response with code
         """
         try:
+            issued_books = self.__issued_books_query()
+            if is_paginated(**kwargs):
+                return await apage_response(
+                    issued_books, {'code': '300.003.008', 'message': 'No issued books found'},
+                    keys=('issued_date', 'id'), **kwargs)
+            data = [issued async for issued in issued_books]
+            if not data:
+                return {'code': '300.003.008', 'message': 'Failed to return book'}
+            return {'code': '100.000.000', 'data': data}
+        except Exception as e:
+            lgr.exception(f"Error during async issued books : {e}")
+            return {'code': '999.999.999', 'message': 'Error Failed to return book record'}
 
-            """
-            get all books from issued book table
-            """
+    @staticmethod
+    def __issued_books_query():
+        return get_service(BookIssuedService).filter().annotate(
+            member_name=Concat(F('member__first_name'), Value(' '), F('member__last_name')),
+            membership_no=F('member__membership_no'), book_title=F('book__title'), author=Concat(
+                F('book__author__salutation'), Value(' '),
+                F('book__author__first_name'), Value(' '), F('book__author__last_name')),
+            issue_date=Cast(TruncDate('issued_date'), output_field=DateField()),
+            returned_date=Cast(TruncDate('return_date'), output_field=DateField()),
+            is_fee_paid=Case(
+                When(fee_paid=True, then=Value('Yes')),
+                default=Value('No')),
+            book_returned=Case(
+                When(returned=True, then=Value('Yes')),
+                default=Value('No'))
+        ).values(
+            'member_name', 'membership_no', 'book_title', 'author',
+            'borrow_duration', 'return_fee', 'total_fee', 'is_fee_paid', 'book_returned',
+            'issue_date', 'returned_date','member_id','book_id', 'id', 'issued_date',
+        ).order_by('-issued_date')
+
+    @read_replica
+    def filter_books(self, request, **kwargs):
+        """
+        Handles searching of books by title or author through the search index, best match first
+        :param request: Original Django HTTP request
+        :param kwargs: params is the search string, limit and page select the page of results
+        :return: dict response with code
+        """
+        try:
             query = kwargs.get('params', None)
-            build_query = Q(title__icontains=query) | Q(author__first_name__icontains=query) | Q(author__last_name__icontains=query)
-            filter_books = BookService().filter(build_query).annotate(
+            limit = min(int(kwargs.get('limit') or settings.DEFAULT_PAGE_SIZE), settings.MAX_PAGE_SIZE)
+            page = max(int(kwargs.get('page') or 1), 1)
+            book_ids = get_search_backend(router.db_for_read(Books)).search(query, limit=limit + 1, offset=(page - 1) * limit)
+            if not book_ids:
+                return {'code': '300.003.008', 'message': 'Failed to filter books'}
+            filter_books = get_service(BookService).filter(id__in=book_ids[:limit]).annotate(
                 status_name=F('status__name'),
                 category_name=F('category__name'),
                 author_name=Concat(
                     F('author__salutation'), Value(' '), F('author__first_name'), Value(' '), F('author__last_name'))
-            ).values().order_by('-date_created')
-            if not filter_books:
-                return {'code': '300.003.008', 'message': 'Failed to filter books'}
-            return {'code': '100.000.000', 'data': list(filter_books)}
+            ).values()
+            rank = {book_id: position for position, book_id in enumerate(book_ids)}
+            data = sorted(filter_books, key=lambda book: rank[book['id']])
+            next_page = page + 1 if len(book_ids) > limit else None
+            return {'code': '100.000.000', 'data': data, 'page': page, 'next_page': next_page}
         except Exception as e:
             lgr.exception(f"Error during filter book : {e}")
 
             return {'code': '999.999.999', 'message': 'Error Failed to filter books'}
+
+    @read_replica
+    def get_stats(self, request, **kwargs):
+        """
+        Handles fetching of the library totals for the dashboard, computed with aggregate queries
+        :param request: Original Django HTTP request
+        :return: dict response with code and the totals
+        """
+        try:
+            inventory = get_service(BookService).filter().aggregate(titles=Count('id'))
+            inventory.update(get_service(BookCopyService).filter(
+                status__in=BookCopy.IN_STOCK).aggregate(copies=Count('id')))
+            if getattr(settings, 'BOOK_STATS_MATERIALIZED', False):
+                loans = self.__materialized_loan_totals()
+            else:
+                loans = get_service(BookIssuedService).filter().aggregate(
+                    books_on_loan=Count('id', filter=Q(returned=False)),
+                    overdue=Count('id', filter=Q(returned=False, return_date__lt=timezone.now())),
+                    outstanding_fees=Sum('return_fee', filter=Q(fee_paid=False)),
+                    late_fees=Sum('late_fee', filter=Q(fee_paid=False)),
+                    members_with_fees=Count('member', filter=Q(fee_paid=False), distinct=True))
+            data = {
+                'titles': inventory['titles'], 'copies': inventory['copies'] or 0,
+                'books_on_loan': loans['books_on_loan'] or 0, 'overdue': loans['overdue'],
+                'outstanding_fees': loans['outstanding_fees'] or 0, 'late_fees': loans['late_fees'] or 0,
+                'members_with_fees': loans['members_with_fees']}
+            return {'code': '100.000.000', 'data': data}
+        except Exception as e:
+            lgr.exception(f"Error during fetch stats : {e}")
+            return {'code': '999.999.999', 'message': 'Error occurred during fetch stats'}
+
+    @staticmethod
+    def __materialized_loan_totals():
+        """
+        The loan totals of get_stats without scanning BookIssued: the open loans and return fees from
+        CirculationSummary, the overdue loans through the bookissued_open_due_idx partial index and the late fees
+        and members owing from MemberFeeBalance, whose balances hold the return and the late fees
+        :rtype: dict
+        """
+        loans = get_service(CirculationSummaryService).filter().aggregate(
+            books_on_loan=Sum('books_on_loan'), outstanding_fees=Sum('outstanding_fees'))
+        loans['overdue'] = get_service(BookIssuedService).overdue().count()
+        balances = get_service(MemberFeeBalanceService).filter(balance__gt=0).aggregate(
+            total=Sum('balance'), members_with_fees=Count('pk'))
+        loans['late_fees'] = max((balances['total'] or 0) - (loans['outstanding_fees'] or 0), 0)
+        loans['members_with_fees'] = balances['members_with_fees']
+        return loans
+
+    @read_replica
+    def get_category_stats(self, request, **kwargs):
+        """
+        Handles fetching of the inventory and loans per category
+        :param request: Original Django HTTP request
+        :return: dict response with code and a row per category
+        """
+        try:
+            categories = {
+                row['category_id']: dict(row, copies=0, books_on_loan=0) for row in get_service(
+                    BookService).filter().values(
+                    'category_id', category_name=F('category__name')).annotate(
+                    titles=Count('id')).order_by('category_name')}
+            in_stock = get_service(BookCopyService).filter(
+                status__in=BookCopy.IN_STOCK).values('book__category_id').annotate(
+                copies=Count('id')).values_list('book__category_id', 'copies').order_by()
+            for category_id, copies in in_stock:
+                if category_id in categories:
+                    categories[category_id]['copies'] = copies
+            if getattr(settings, 'BOOK_STATS_MATERIALIZED', False):
+                on_loan = get_service(CirculationSummaryService).filter().values_list('category_id', 'books_on_loan')
+            else:
+                on_loan = get_service(BookIssuedService).filter(returned=False).values('book__category_id').annotate(
+                    on_loan=Count('id')).values_list('book__category_id', 'on_loan').order_by()
+            for category_id, books_on_loan in on_loan:
+                if category_id in categories:
+                    categories[category_id]['books_on_loan'] = books_on_loan
+            if not categories:
+                return {'code': '300.002.002', 'message': 'No categories found'}
+            return {'code': '100.000.000', 'data': list(categories.values())}
+        except Exception as e:
+            lgr.exception(f"Error during fetch category stats : {e}")
+            return {'code': '999.999.999', 'message': 'Error occurred during fetch category stats'}
+
+    @read_replica
+    def get_member_stats(self, request, **kwargs):
+        """
+        Handles fetching of the members with outstanding fees, highest balance first
+        :param request: Original Django HTTP request
+        :param kwargs: limit is the number of members returned
+        :return: dict response with code and a row per member
+        """
+        try:
+            limit = min(int(kwargs.get('limit') or settings.DEFAULT_PAGE_SIZE), settings.MAX_PAGE_SIZE)
+            if getattr(settings, 'BOOK_STATS_MATERIALIZED', False):
+                members = self.__materialized_member_stats(limit)
+            else:
+                members = get_service(BookIssuedService).filter(fee_paid=False).values(
+                    'member_id', membership_no=F('member__membership_no'),
+                    member_name=Concat(F('member__first_name'), Value(' '), F('member__last_name'))).annotate(
+                    outstanding_fees=Sum('return_fee'), late_fees=Sum('late_fee'),
+                    books_on_loan=Count('id', filter=Q(returned=False)),
+                    overdue=Count('id', filter=Q(returned=False, return_date__lt=timezone.now()))).order_by(
+                    '-outstanding_fees', 'member_id')[:limit]
+            if not members:
+                return {'code': '200.001.002', 'message': 'No members with outstanding fees'}
+            return {'code': '100.000.000', 'data': list(members)}
+        except Exception as e:
+            lgr.exception(f"Error during fetch member stats : {e}")
+            return {'code': '999.999.999', 'message': 'Error occurred during fetch member stats'}
+
+    @staticmethod
+    def __materialized_member_stats(limit):
+        """
+        The members of get_member_stats read from MemberFeeBalance, highest balance first. Only the loans of the
+        members returned are read from BookIssued to split their balance into return and late fees.
+        :param limit: the number of members returned
+        :rtype: list
+        """
+        members = list(get_service(MemberFeeBalanceService).filter(balance__gt=0).values(
+            'member_id', 'balance', membership_no=F('member__membership_no'),
+            member_name=Concat(F('member__first_name'), Value(' '), F('member__last_name'))).order_by(
+            '-balance', 'member_id')[:limit])
+        loans = {
+            row['member_id']: row for row in get_service(BookIssuedService).filter(
+                member_id__in=[member['member_id'] for member in members], fee_paid=False).values(
+                'member_id').annotate(
+                late_fees=Sum('late_fee'), books_on_loan=Count('id', filter=Q(returned=False)),
+                overdue=Count('id', filter=Q(returned=False, return_date__lt=timezone.now()))).order_by()}
+        for member in members:
+            row = loans.get(member['member_id'], {})
+            balance = member.pop('balance')
+            member['late_fees'] = row.get('late_fees') or 0
+            member['outstanding_fees'] = balance - member['late_fees']
+            member['books_on_loan'] = row.get('books_on_loan', 0)
+            member['overdue'] = row.get('overdue', 0)
+        return members
@@ -0,0 +1,253 @@
+"""
+Streaming import of books from CSV or JSON Lines.
+Rows are read and inserted in batches; authors, categories and existing ISBNs are resolved with one
+query per batch and remembered for the rest of the import.
+"""
+import csv
+import io
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction, DatabaseError
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.utils.dateparse import parse_date
+
+from base.backend.serviceregistry import get_service
+from base.backend.utils.utilities import validate_uuid4
+from books.backend.service import AuthorService, CategoryService, BookService
+from books.models import Books
+
+lgr = logging.getLogger(__name__)
+
+CATALOGUE_FORMATS = ('csv', 'jsonl')
+REQUIRED_FIELDS = ('title', 'published_date', 'edition', 'isbn', 'author', 'category')
+
+
+def detect_format(name=None, content_type=None, default='csv'):
+    """
+    Works out the import format from a file name or content type
+    :return: csv | jsonl
+    :rtype: str
+    """
+    name = str(name or '').lower()
+    content_type = str(content_type or '').lower()
+    if name.endswith(('.jsonl', '.ndjson', '.json')) or 'json' in content_type:
+        return 'jsonl'
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    return default
+
+
+class RequestStream(io.RawIOBase):
+    """
+    Reads the body of a request as a binary file without loading it into memory, e.g. an import posted
+    as text/csv rather than as a multipart upload
+    """
+
+    def __init__(self, request):
+        super(RequestStream, self).__init__()
+        self.request = request
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.request.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def read_rows(stream, fmt):
+    """
+    Yields the rows of a CSV or JSON Lines stream as dicts, a row that cannot be parsed is yielded as
+    an exception so that it is reported without stopping the import.
+    :param stream: binary or text file object
+    :param fmt: csv | jsonl
+    """
+    if isinstance(stream, RequestStream):
+        stream = io.BufferedReader(stream)
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            yield row if isinstance(row, dict) else ValueError('Row is not an object')
+        except ValueError as e:
+            yield e
+
+
+class CatalogueImporter(object):
+    """
+    Imports books in batches with bulk_create, collecting the errors of invalid rows
+    """
+
+    def __init__(self, batch_size=None, max_errors=None):
+        """
+        :param batch_size: number of rows validated and inserted together
+        :type batch_size: int | None
+        :param max_errors: number of row errors kept in the report, the failed count is always complete
+        :type max_errors: int | None
+        """
+        self.batch_size = batch_size or getattr(settings, 'CATALOGUE_IMPORT_BATCH_SIZE', 1000)
+        self.max_errors = max_errors if max_errors is not None else getattr(
+            settings, 'CATALOGUE_IMPORT_MAX_ERRORS', 1000)
+        self.authors = {}
+        self.categories = {}
+        self.report = {'created': 0, 'failed': 0, 'errors': []}
+
+    def run(self, rows):
+        """
+        :param rows: iterable of dicts, e.g. from read_rows
+        :return: report with created and failed counts and the row errors
+        :rtype: dict
+        """
+        batch = []
+        for line, row in enumerate(rows, start=1):
+            batch.append((line, row))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+        return self.report
+
+    def _error(self, line, message):
+        self.report['failed'] += 1
+        if len(self.report['errors']) < self.max_errors:
+            self.report['errors'].append({'row': line, 'message': message})
+
+    def _import_batch(self, batch):
+        valid = []
+        for line, row in batch:
+            if isinstance(row, Exception):
+                self._error(line, f'Invalid row: {row}')
+                continue
+            row = {k.strip(): v.strip() if isinstance(v, str) else v for k, v in row.items() if k}
+            missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+            if missing:
+                self._error(line, f"Missing {', '.join(missing)}")
+                continue
+            valid.append((line, row))
+        self._resolve_authors({str(row['author']) for _, row in valid})
+        self._resolve_categories({str(row['category']) for _, row in valid})
+        isbns = [str(row['isbn']) for _, row in valid]
+        existing = set()
+        if isbns:
+            existing.update(get_service(BookService).filter(isbn__in=isbns).values_list('isbn', flat=True))
+        books = []
+        lines = []
+        for line, row in valid:
+            book = self._build_book(line, row, existing)
+            if book:
+                existing.add(book['isbn'])
+                books.append(book)
+                lines.append(line)
+        if not books:
+            return
+        created = self._create(books)
+        if created is None:
+            # create the rows of the failed batch one at a time so that the report names the bad rows
+            created = []
+            for line, book in zip(lines, books):
+                row = self._create([book])
+                if row is None:
+                    self._error(line, 'Unable to create book record')
+                else:
+                    created.extend(row)
+        self.report['created'] += len(created)
+
+    def _create(self, books):
+        """
+        Bulk creates the books in a savepoint so that a failed insert leaves the surrounding transaction usable.
+        BookService logs and swallows the error, the savepoint is rolled back by raising it again.
+        :return: the created books or None if the insert failed
+        :rtype: list | None
+        """
+        try:
+            with transaction.atomic():
+                created = get_service(BookService).bulk_create(books, batch_size=self.batch_size)
+                if created is None:
+                    raise DatabaseError('bulk_create failed')
+                return created
+        except DatabaseError as e:
+            lgr.warning(f"CatalogueImporter batch of {len(books)} books not created: {e}")
+        return None
+
+    def _build_book(self, line, row, existing):
+        """
+        Validates a row against the resolved lookups, returns the book kwargs or None if invalid
+        """
+        author = self.authors.get(str(row['author']))
+        if not author:
+            self._error(line, f"Author {row['author']} not found")
+            return None
+        category = self.categories.get(str(row['category']))
+        if not category:
+            self._error(line, f"Category {row['category']} not found")
+            return None
+        isbn = str(row['isbn'])
+        if isbn in existing:
+            self._error(line, f"Book with isbn {isbn} already exists")
+            return None
+        try:
+            published_date = parse_date(str(row['published_date']))
+        except ValueError:
+            published_date = None
+        if not published_date:
+            self._error(line, f"Invalid published_date {row['published_date']}")
+            return None
+        too_long = [
+            field for field in ('title', 'edition', 'isbn', 'book_image')
+            if len(str(row.get(field) or '')) > Books._meta.get_field(field).max_length]
+        if too_long:
+            self._error(line, f"Too long {', '.join(too_long)}")
+            return None
+        book = {
+            'title': str(row['title']), 'published_date': published_date, 'edition': str(row['edition']),
+            'isbn': isbn, 'author_id': author, 'category_id': category, 'book_image': row.get('book_image') or None}
+        try:
+            for field in ('no_of_books', 'no_of_reserve_books'):
+                if row.get(field) not in (None, ''):
+                    book[field] = int(row[field])
+        except (TypeError, ValueError):
+            self._error(line, 'Invalid number of books')
+            return None
+        return book
+
+    def _resolve_authors(self, keys):
+        """
+        Resolves author ids or full names ('first last') not seen yet in one query each
+        """
+        keys = {key for key in keys if key not in self.authors}
+        ids = [key for key in keys if validate_uuid4(key)]
+        names = [key for key in keys if key not in ids]
+        if ids:
+            for pk in get_service(AuthorService).filter(id__in=ids).values_list('id', flat=True):
+                self.authors[str(pk)] = pk
+        if names:
+            authors = get_service(AuthorService).filter().annotate(
+                full_name=Concat(F('first_name'), Value(' '), F('last_name'))).filter(
+                full_name__in=names).values_list('full_name', 'id')
+            for full_name, pk in authors:
+                self.authors[full_name] = pk
+
+    def _resolve_categories(self, keys):
+        """
+        Resolves category ids or names not seen yet in one query each
+        """
+        keys = {key for key in keys if key not in self.categories}
+        ids = [key for key in keys if validate_uuid4(key)]
+        names = [key for key in keys if key not in ids]
+        if ids:
+            for pk in get_service(CategoryService).filter(id__in=ids).values_list('id', flat=True):
+                self.categories[str(pk)] = pk
+        if names:
+            for name, pk in get_service(CategoryService).filter(name__in=names).values_list('name', 'id'):
+                self.categories[name] = pk
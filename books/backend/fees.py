@@ -0,0 +1,88 @@
+"""
+In-process registry of the BookFees schedules so that borrow/return do not query the fees on every call
+"""
+import bisect
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from base.backend.responsecache import get_model_versions
+
+lgr = logging.getLogger(__name__)
+
+VERSION_LABEL = 'books.BookFees'
+
+
+class BookFeesRegistry(object):
+    """
+    Process-wide copy of every BookFees schedule ordered by effective_from. The schedules are loaded with a
+    single query and kept while the books.BookFees version in the response cache is unchanged, the version is
+    bumped when a schedule is saved or deleted (see books.signals). The version only reaches the other processes
+    when the cache is shared, so the schedules are also reloaded every BOOK_FEES_TTL_SECONDS, which bounds how
+    long a process with a per-process cache (the default locmem) charges a changed schedule. Schedules which
+    take effect later are already loaded, no reload is needed when they come into effect.
+    """
+    _lock = threading.Lock()
+    _schedules = None
+    _starts = None
+    _version = None
+    _loaded_at = None
+
+    @classmethod
+    def _load(cls):
+        """
+        Loads the schedules if not loaded, if another process changed them or if they are older than the TTL.
+        :return: tuple of (effective_from list, schedules list)
+        :rtype: tuple
+        """
+        version = get_model_versions([VERSION_LABEL])[0]
+        starts, schedules = cls._starts, cls._schedules
+        if schedules is not None and not cls._stale(version):
+            return starts, schedules
+        with cls._lock:
+            if cls._schedules is None or cls._stale(version):
+                from books.models import BookFees
+                # on equal dates the schedule with the lowest id is in effect
+                fees = sorted(BookFees.objects.all(), key=lambda fee: (fee.effective_from, -fee.pk))
+                cls._starts = [fee.effective_from for fee in fees]
+                cls._schedules = fees
+                cls._version = version
+                cls._loaded_at = time.monotonic()
+            return cls._starts, cls._schedules
+
+    @classmethod
+    def _stale(cls, version):
+        ttl = getattr(settings, 'BOOK_FEES_TTL_SECONDS', 60)
+        return cls._version != version or time.monotonic() - cls._loaded_at > ttl
+
+    @classmethod
+    def current(cls, at=None):
+        """
+        Retrieves the schedule in effect.
+        :param at: the time the fees apply at, defaults to now
+        :type at: datetime.datetime | None
+        :return: the BookFees or None if no schedule is in effect
+        :rtype: BookFees | None
+        """
+        try:
+            starts, schedules = cls._load()
+            index = bisect.bisect_right(starts, at or timezone.now())
+            if index:
+                return schedules[index - 1]
+        except Exception as e:
+            lgr.exception(f"BookFeesRegistry current exception: {e}")
+        return None
+
+    @classmethod
+    def invalidate(cls, **kwargs):
+        """
+        Drops the loaded schedules so that the next lookup reloads them. Accepts signal kwargs.
+        """
+        with cls._lock:
+            cls._schedules = None
+            cls._starts = None
+            cls._version = None
+            cls._loaded_at = None
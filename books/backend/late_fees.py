@@ -0,0 +1,75 @@
+"""
+Late fee accrual for overdue loans.
+A loan is overdue once its return date has passed. For every day overdue it is charged late_return_rate
+percent of its return fee, up to BookFees.max_borrow_fee_limit, using the fee schedule in effect on the
+run date. Fees are recomputed from the run date rather than added to, so running the job again for the
+same date changes nothing. The balances of the members whose loans changed are recomputed along with
+each chunk.
+"""
+import datetime
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Value
+from django.db.models.functions import Least, Round, TruncDate
+from django.utils import timezone
+
+from base.backend.serviceregistry import get_service
+from books.backend.fees import BookFeesRegistry
+from books.backend.service import BookIssuedService, MemberFeeBalanceService
+
+lgr = logging.getLogger(__name__)
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def accrue_late_fees(run_date=None, chunk_size=None):
+    """
+    Charges late fees on every loan overdue on run_date with set-based UPDATEs. Loans are grouped by the
+    day they were due, so that the number of days overdue is the same for the whole group, and each
+    group is updated chunk_size rows at a time.
+    :param run_date: the date fees are accrued up to, defaults to today
+    :type run_date: datetime.date | None
+    :param chunk_size: maximum rows changed per UPDATE
+    :type chunk_size: int | None
+    :return: dict with the run date, the number of due dates processed and of loans updated
+    :rtype: dict
+    """
+    run_date = run_date or timezone.localdate()
+    chunk_size = chunk_size or getattr(settings, 'LATE_FEE_CHUNK_SIZE', 5000)
+    report = {'run_date': run_date.isoformat(), 'due_dates': 0, 'updated': 0}
+    book_fee = BookFeesRegistry.current(start_of_day(run_date + datetime.timedelta(days=1)))
+    if not book_fee or not book_fee.late_return_rate:
+        return report
+    overdue = get_service(BookIssuedService).overdue(start_of_day(run_date)).filter(
+        Q(fees_accrued_on__isnull=True) | Q(fees_accrued_on__lt=run_date))
+    due_dates = overdue.annotate(due_date=TruncDate('return_date')).values_list(
+        'due_date', flat=True).distinct().order_by('due_date')
+    for due_date in list(due_dates):
+        days = (run_date - due_date).days
+        if days < 1:
+            continue
+        rate = Decimal(days * book_fee.late_return_rate) / 100
+        late_fee = Least(
+            Round(ExpressionWrapper(F('return_fee') * Value(rate), output_field=DecimalField()), 2),
+            Value(book_fee.max_borrow_fee_limit), output_field=DecimalField())
+        due = overdue.filter(
+            return_date__gte=start_of_day(due_date),
+            return_date__lt=start_of_day(due_date + datetime.timedelta(days=1)))
+        report['due_dates'] += 1
+        while True:
+            chunk = get_service(BookIssuedService).filter(pk__in=list(due.values_list('pk', flat=True)[:chunk_size]))
+            with transaction.atomic():
+                updated = chunk.update(
+                    total_fee=F('total_fee') - F('late_fee') + late_fee, late_fee=late_fee, fees_accrued_on=run_date)
+                if get_service(MemberFeeBalanceService).refresh(chunk.values_list('member_id', flat=True).distinct()) is None:
+                    raise DatabaseError('Failed to refresh member fee balances')
+            report['updated'] += updated
+            if updated < chunk_size:
+                break
+    lgr.info(f"accrue_late_fees {report}")
+    return report
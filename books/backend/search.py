@@ -0,0 +1,247 @@
+"""
+Full-text search over the book catalogue.
+The index holds one document per book (title and author name) and is kept in sync by books.signals.
+SQLite uses an FTS5 virtual table, Postgres a tsvector table with a GIN index and any other database
+falls back to icontains lookups.
+"""
+import logging
+import re
+import uuid
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS, OperationalError, ProgrammingError
+from django.db.models import Q
+
+lgr = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'books_search'
+
+
+def search_terms(query):
+    """
+    Splits the raw query into plain word tokens so that no search syntax from the client reaches the index
+    :param query: the search string as received
+    :return: list of lowercase tokens
+    :rtype: list
+    """
+    return re.findall(r'\w+', str(query or '').lower())
+
+
+def author_name(author):
+    return f"{author.first_name} {author.last_name}" if author else ''
+
+
+class SearchBackend(object):
+    """
+    Base class for search backends
+    """
+    vendor = None
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def create_index(self, cursor):
+        """ Creates the index table, must be idempotent """
+
+    def drop_index(self, cursor):
+        """ Drops the index table """
+
+    def index_books(self, books):
+        """
+        Adds or replaces the documents of the given books
+        :param books: iterable of Books with their author loaded
+        """
+
+    def remove_books(self, book_ids):
+        """ Removes the documents of the given book ids """
+
+    def search(self, query, limit, offset=0):
+        """
+        Returns the ids of the books matching the query, best match first
+        :param query: the search string as received
+        :param limit: maximum number of ids to return
+        :param offset: number of matches to skip
+        :return: list of book ids
+        :rtype: list
+        """
+        raise NotImplementedError
+
+    def rebuild(self, chunk_size=2000):
+        """
+        Re-creates the index from the Books table
+        :return: number of books indexed
+        :rtype: int
+        """
+        from books.models import Books
+        with self.connection.cursor() as cursor:
+            self.drop_index(cursor)
+            self.create_index(cursor)
+        count = 0
+        batch = []
+        books = Books.objects.using(self.using).select_related('author').only(
+            'id', 'title', 'author__first_name', 'author__last_name').order_by()
+        for book in books.iterator(chunk_size=chunk_size):
+            batch.append(book)
+            if len(batch) >= chunk_size:
+                count += self._index(batch)
+                batch = []
+        if batch:
+            count += self._index(batch)
+        return count
+
+    def _index(self, books):
+        self.index_books(books)
+        return len(books)
+
+    def _execute(self, callback):
+        """
+        Runs callback(cursor), creating the index table first if it is missing e.g. on a test database
+        that was built without migrations.
+        """
+        try:
+            with self.connection.cursor() as cursor:
+                return callback(cursor)
+        except (OperationalError, ProgrammingError) as e:
+            if SEARCH_TABLE not in str(e):
+                raise
+        with self.connection.cursor() as cursor:
+            self.create_index(cursor)
+            return callback(cursor)
+
+
+class IContainsSearchBackend(SearchBackend):
+    """
+    Fallback without an index, scans Books with icontains on title and author names
+    """
+
+    def search(self, query, limit, offset=0):
+        from books.models import Books
+        build_query = Q()
+        for term in search_terms(query):
+            build_query &= Q(title__icontains=term) | Q(author__first_name__icontains=term) | Q(
+                author__last_name__icontains=term)
+        books = Books.objects.using(self.using).filter(build_query).order_by('-date_created')
+        return list(books.values_list('id', flat=True)[offset:offset + limit])
+
+    def rebuild(self, chunk_size=2000):
+        return 0
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    SQLite FTS5 index ranked with bm25. The FTS rowid is derived from the book UUID so that a book's
+    document is replaced by rowid rather than by scanning the UNINDEXED book_id column.
+    """
+    vendor = 'sqlite'
+
+    @staticmethod
+    def _rowid(book_id):
+        return uuid.UUID(str(book_id)).int & ((1 << 63) - 1)
+
+    def create_index(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"book_id UNINDEXED, title, author, tokenize='unicode61 remove_diacritics 2')")
+
+    def drop_index(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+    def index_books(self, books):
+        rows = [(self._rowid(book.id), uuid.UUID(str(book.id)).hex, book.title, author_name(book.author))
+                for book in books]
+        if not rows:
+            return
+
+        def write(cursor):
+            cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE}(rowid, book_id, title, author) VALUES (%s, %s, %s, %s)", rows)
+
+        self._execute(write)
+
+    def remove_books(self, book_ids):
+        rows = [(self._rowid(book_id),) for book_id in book_ids]
+        if rows:
+            self._execute(lambda cursor: cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", rows))
+
+    def search(self, query, limit, offset=0):
+        terms = search_terms(query)
+        if not terms:
+            return IContainsSearchBackend(self.using).search(query, limit, offset)
+        match = ' '.join(f'"{term}"*' for term in terms)
+
+        def run(cursor):
+            cursor.execute(
+                f"SELECT book_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+                f"ORDER BY bm25({SEARCH_TABLE}) LIMIT %s OFFSET %s", [match, limit, offset])
+            return [uuid.UUID(row[0]) for row in cursor.fetchall()]
+
+        return self._execute(run)
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Postgres tsvector index with a GIN index, ranked with ts_rank
+    """
+    vendor = 'postgresql'
+
+    def create_index(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (book_id uuid PRIMARY KEY, document tsvector NOT NULL)")
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)")
+
+    def drop_index(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+    def index_books(self, books):
+        rows = [(book.id, book.title, author_name(book.author)) for book in books]
+        if not rows:
+            return
+        self._execute(lambda cursor: cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (book_id, document) VALUES "
+            f"(%s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B')) "
+            f"ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document", rows))
+
+    def remove_books(self, book_ids):
+        book_ids = list(book_ids)
+        if book_ids:
+            self._execute(lambda cursor: cursor.execute(
+                f"DELETE FROM {SEARCH_TABLE} WHERE book_id = ANY(%s::uuid[])", [[str(i) for i in book_ids]]))
+
+    def search(self, query, limit, offset=0):
+        terms = search_terms(query)
+        if not terms:
+            return IContainsSearchBackend(self.using).search(query, limit, offset)
+        ts_query = ' & '.join(f'{term}:*' for term in terms)
+
+        def run(cursor):
+            cursor.execute(
+                f"SELECT book_id FROM {SEARCH_TABLE}, to_tsquery('simple', %s) query WHERE document @@ query "
+                f"ORDER BY ts_rank(document, query) DESC LIMIT %s OFFSET %s", [ts_query, limit, offset])
+            return [row[0] for row in cursor.fetchall()]
+
+        return self._execute(run)
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+    'icontains': IContainsSearchBackend,
+}
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    """
+    Returns the search backend configured in settings.BOOK_SEARCH_BACKEND, 'auto' picks the one matching
+    the database vendor.
+    @rtype: SearchBackend
+    """
+    name = getattr(settings, 'BOOK_SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        name = connections[using].vendor
+    return SEARCH_BACKENDS.get(name, IContainsSearchBackend)(using)
@@ -1,5 +1,22 @@
+"""
+Services of the books app. The methods run inside the circulation transactions (borrow, return, holds) raise
+database errors instead of logging them and returning False or None, so that the atomic block they run in is
+rolled back rather than committed half done.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import F, Count, Q, Sum, DecimalField, ExpressionWrapper
+from django.utils import timezone
+
+from base.backend.responsecache import bump_model_version
 from base.backend.servicebase import ServiceBase
-from books.models import Author, Category, Books, BookIssued, BookFees
+from base.backend.serviceregistry import get_service
+from books.backend.search import get_search_backend
+from books.models import Author, Category, Books, BookIssued, BookFees, CirculationSummary, MemberFeeBalance, \
+    BookHold, BookCopy
+
+lgr = logging.getLogger(__name__)
 
 
 class AuthorService(ServiceBase):
@@ -16,12 +33,388 @@ class BookService(ServiceBase):
     """ books model CRUD services"""
     manager = Books.objects
 
+    def bulk_create(self, objs, batch_size=None, **kwargs):
+        """
+        Bulk creates books, adds them to the search index and catalogues their copies, which the post_save
+        signal would otherwise do
+        """
+        books = super(BookService, self).bulk_create(objs, batch_size=batch_size, **kwargs)
+        if books:
+            self._index_books('id', [book.id for book in books], catalogue=True)
+            bump_model_version(Books)
+        return books
+
+    def upsert(self, objs, unique_fields, update_fields, batch_size=None):
+        """
+        Upserts books, refreshes their search documents and catalogues their copies
+        """
+        books = super(BookService, self).upsert(objs, unique_fields, update_fields, batch_size=batch_size)
+        if books:
+            if len(unique_fields) == 1:
+                self._index_books(
+                    unique_fields[0], [getattr(book, unique_fields[0]) for book in books], catalogue=True)
+            bump_model_version(Books)
+        return books
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        """
+        Bulk updates books, invalidating the cached responses which the post_save signal would otherwise do
+        """
+        updated = super(BookService, self).bulk_update(objs, fields, batch_size=batch_size)
+        if updated:
+            bump_model_version(Books)
+        return updated
+
+    def update_where(self, *args, **kwargs):
+        """
+        Updates the matching books, invalidating the cached responses which the post_save signal would otherwise do
+        """
+        updated = super(BookService, self).update_where(*args, **kwargs)
+        if updated:
+            bump_model_version(Books)
+        return updated
+
+    def _index_books(self, field, values, catalogue=False):
+        """
+        Indexes the books whose field is in values, reloading them with their author in batches
+        :param catalogue: also add the copies the books are missing, see BookCopyService.catalogue
+        """
+        try:
+            for start in range(0, len(values), self.batch_size):
+                books = list(self.manager.filter(
+                    **{f'{field}__in': values[start:start + self.batch_size]}).select_related('author'))
+                get_search_backend(self.manager.db).index_books(books)
+                if catalogue:
+                    get_service(BookCopyService).catalogue(books)
+        except Exception as e:
+            lgr.exception(f"BookService index books exception: {e}")
+
+
+class BookCopyService(ServiceBase):
+    """ Book copies, the stock of each book """
+    manager = BookCopy.objects
+    checkout_attempts = 3
+
+    def catalogue(self, books, existing=True):
+        """
+        Adds copies until each book has no_of_books copies that are not withdrawn, the first
+        no_of_reserve_books of them for reference. Copies are never removed here, withdraw them instead.
+        Barcodes are the ISBN followed by the copy number.
+        :param books: Books instances
+        :param existing: False for books known to have no copies, skips counting them
+        :return: number of copies created
+        :rtype: int | None
+        """
+        try:
+            books = [book for book in books if book.pk]
+            counts = {}
+            if existing and books:
+                counts = {row['book_id']: row for row in self.manager.filter(book__in=books).values(
+                    'book_id').annotate(
+                    total=Count('id'), active=Count('id', filter=~Q(status=BookCopy.WITHDRAWN)),
+                    reference=Count('id', filter=Q(status=BookCopy.REFERENCE))).order_by()}
+            copies = []
+            for book in books:
+                row = counts.get(book.pk, {})
+                reference = book.no_of_reserve_books - row.get('reference', 0)
+                for number in range(book.no_of_books - row.get('active', 0)):
+                    copies.append(BookCopy(
+                        book=book, barcode=f"{book.isbn}-{row.get('total', 0) + number + 1}",
+                        status=BookCopy.REFERENCE if number < reference else BookCopy.AVAILABLE))
+            if copies:
+                self.manager.bulk_create(copies, batch_size=self.batch_size)
+                bump_model_version(BookCopy)
+            return len(copies)
+        except Exception as e:
+            lgr.exception(f"BookCopyService catalogue exception: {e}")
+        return None
+
+    def move(self, copy_id, statuses, status, **filters):
+        """
+        Changes the status of the copy with a single conditional UPDATE, only if it is in one of statuses
+        Raises database errors.
+        :param copy_id: the unique copy identifier
+        :param statuses: the statuses the copy may be in
+        :param status: the new status
+        :param filters: other lookups the copy must match e.g. book_id
+        :return: True if the copy was moved
+        :rtype: bool
+        """
+        if self.manager.filter(id=copy_id, status__in=statuses, **filters).update(
+                status=status, date_modified=timezone.now()) == 1:
+            bump_model_version(BookCopy)
+            return True
+        return False
+
+    def checkout(self, book_id, copy_id=None, statuses=(BookCopy.AVAILABLE,)):
+        """
+        Lends the given copy of the book or any of its available copies. The copy is picked along the
+        bookcopy_book_status_idx index and copies locked by a concurrent checkout are skipped, so concurrent
+        loans of the same title update different rows. Run it in a transaction.
+        Raises database errors.
+        :param book_id: the unique book identifier
+        :param copy_id: the copy scanned, any available copy if None
+        :param statuses: the statuses the given copy may be in
+        :return: the id of the copy lent, None if no copy could be lent
+        """
+        for _ in range(self.checkout_attempts):
+            candidate = copy_id or self.manager.filter(
+                book_id=book_id, status=BookCopy.AVAILABLE).select_for_update(skip_locked=True).values_list(
+                'id', flat=True).first()
+            if candidate is None:
+                return None
+            if self.move(candidate, statuses if copy_id else (BookCopy.AVAILABLE,), BookCopy.ON_LOAN,
+                         book_id=book_id):
+                return candidate
+            if copy_id:
+                return None
+        return None
+
+
 class BookIssuedService(ServiceBase):
     """ Book issued our CRUD service"""
     manager = BookIssued.objects
 
+    def overdue(self, now=None):
+        """
+        Open loans past their return date, served by the bookissued_open_due_idx partial index
+        :param now: the cut off, defaults to the current time
+        :return: queryset of BookIssued
+        """
+        try:
+            return self.manager.filter(returned=False, return_date__lt=now or timezone.now())
+        except Exception as e:
+            lgr.exception(f"BookIssuedService overdue exception: {e}")
+        return None
+
+    def close_loan(self, loan_id):
+        """
+        Marks the loan returned and settles its return and late fees, only if it is still open
+        Raises database errors.
+        :param loan_id: the BookIssued id
+        :return: True if the loan was open and is now closed
+        :rtype: bool
+        """
+        return self.manager.filter(id=loan_id, returned=False).update(
+            total_fee=F('total_fee') - F('return_fee') - F('late_fee'), fee_paid=True, returned=True) == 1
+
+
 class BookFeesService(ServiceBase):
     """ Book Fees our CRUD service"""
     manager = BookFees.objects
 
 
+class CirculationSummaryService(ServiceBase):
+    """ Circulation summary counters """
+    manager = CirculationSummary.objects
+
+    def record(self, book_id, loans, fees):
+        """
+        Adjusts the counters of the book's category with a single UPDATE, creating its row on first use
+        Raises database errors.
+        :param book_id: the book lent or returned
+        :param loans: 1 for a borrow, -1 for a return
+        :param fees: the change in outstanding fees
+        :return: True if the counters were updated
+        :rtype: bool
+        """
+        values = {
+            'books_on_loan': F('books_on_loan') + loans, 'total_loans': F('total_loans') + max(loans, 0),
+            'outstanding_fees': F('outstanding_fees') + fees}
+        if self.manager.filter(category__books__id=book_id).update(**values):
+            return True
+        category_id = Books.objects.filter(id=book_id).values_list('category_id', flat=True).first()
+        if not category_id:
+            return False
+        self.manager.get_or_create(category_id=category_id)
+        return self.manager.filter(category_id=category_id).update(**values) == 1
+
+    def rebuild(self):
+        """
+        Recomputes every category's counters from BookIssued
+        :return: number of categories summarised
+        :rtype: int | None
+        """
+        try:
+            loans = BookIssued.objects.values('book__category_id').annotate(
+                on_loan=Count('id', filter=Q(returned=False)), total=Count('id'),
+                outstanding=Sum('return_fee', filter=Q(fee_paid=False))).order_by()
+            summaries = [
+                CirculationSummary(
+                    category_id=row['book__category_id'], books_on_loan=row['on_loan'], total_loans=row['total'],
+                    outstanding_fees=row['outstanding'] or 0) for row in loans]
+            with transaction.atomic():
+                self.manager.all().delete()
+                self.manager.bulk_create(summaries, batch_size=self.batch_size)
+            return len(summaries)
+        except Exception as e:
+            lgr.exception(f"CirculationSummaryService rebuild exception: {e}")
+        return None
+
+
+class MemberFeeBalanceService(ServiceBase):
+    """ Member outstanding fee balances """
+    manager = MemberFeeBalance.objects
+
+    def balance(self, member_id):
+        """
+        Reads the member's outstanding fees by primary key
+        :param member_id: the unique member identifier
+        :return: the balance, 0 for a member without one, None on error
+        :rtype: Decimal | int | None
+        """
+        try:
+            return self.manager.filter(pk=member_id).values_list('balance', flat=True).first() or 0
+        except Exception as e:
+            lgr.exception(f"MemberFeeBalanceService balance exception: {e}")
+        return None
+
+    def adjust(self, member_id, amount):
+        """
+        Adds amount to the member's balance with a single UPDATE, creating the balance on first use
+        Raises database errors.
+        :param member_id: the unique member identifier
+        :param amount: fees charged (positive) or paid (negative)
+        :return: True if the balance was updated
+        :rtype: bool
+        """
+        if self.manager.filter(pk=member_id).update(balance=F('balance') + amount):
+            return True
+        self.manager.get_or_create(member_id=member_id)
+        return self.manager.filter(pk=member_id).update(balance=F('balance') + amount) == 1
+
+    def charge(self, member_id, amount, limit):
+        """
+        Charges amount to the member only if their balance is below limit, with a single conditional UPDATE.
+        The UPDATE locks the balance until the transaction ends, so concurrent borrows by the same member are
+        checked one after the other. Run it in the transaction issuing the loan.
+        Raises database errors.
+        :param member_id: the unique member identifier
+        :param amount: the fee charged
+        :param limit: the balance from which the member may not borrow
+        :return: the balance after the charge, None if the member is not eligible
+        :rtype: Decimal | None
+        """
+        charged = self.manager.filter(pk=member_id, balance__lt=limit).update(balance=F('balance') + amount)
+        if not charged and not self.manager.filter(pk=member_id).exists():
+            self.manager.get_or_create(member_id=member_id)
+            charged = self.manager.filter(pk=member_id, balance__lt=limit).update(balance=F('balance') + amount)
+        if not charged:
+            return None
+        return self.manager.filter(pk=member_id).values_list('balance', flat=True).get()
+
+    def refresh(self, member_ids):
+        """
+        Recomputes the balances of the given members from their unpaid loans. The balances are locked before
+        the loans are summed, so a borrow or return adjusting one of them waits for the new balance instead of
+        having its adjustment overwritten by a sum which did not include it.
+        :param member_ids: iterable of member ids
+        :return: number of balances written
+        :rtype: int | None
+        """
+        try:
+            member_ids = list(member_ids)
+            balances = dict.fromkeys(member_ids, 0)
+            with transaction.atomic():
+                list(MemberFeeBalance.objects.select_for_update().filter(pk__in=member_ids).values_list(
+                    'pk', flat=True))
+                balances.update(BookIssued.objects.filter(member_id__in=member_ids, fee_paid=False).values(
+                    'member_id').annotate(outstanding=Sum(ExpressionWrapper(
+                        F('return_fee') + F('late_fee'), output_field=DecimalField()))).values_list(
+                    'member_id', 'outstanding').order_by())
+                objs = [
+                    MemberFeeBalance(member_id=member_id, balance=balance) for member_id, balance in balances.items()]
+                if objs:
+                    self.manager.bulk_create(
+                        objs, batch_size=self.batch_size, update_conflicts=True, unique_fields=['member'],
+                        update_fields=['balance'])
+            return len(objs)
+        except Exception as e:
+            lgr.exception(f"MemberFeeBalanceService refresh exception: {e}")
+        return None
+
+
+class BookHoldService(ServiceBase):
+    """ Book holds, the reservation queue of each book """
+    manager = BookHold.objects
+    queue_order = ('-priority', 'date_created', 'id')
+
+    def queue(self, book_id):
+        """
+        The waiting holds of the book in the order they are served, read from the bookhold_queue_idx index
+        :param book_id: the unique book identifier
+        :return: queryset of BookHold
+        """
+        try:
+            return self.manager.filter(book_id=book_id, status=BookHold.WAITING).order_by(*self.queue_order)
+        except Exception as e:
+            lgr.exception(f"BookHoldService queue exception: {e}")
+        return None
+
+    def position(self, hold):
+        """
+        Place of a waiting hold in its book's queue, counted along the queue index
+        :param hold: the BookHold
+        :return: 1 for the next hold to be served
+        :rtype: int | None
+        """
+        try:
+            ahead = Q(priority__gt=hold.priority) | Q(priority=hold.priority, date_created__lt=hold.date_created) | Q(
+                priority=hold.priority, date_created=hold.date_created, id__lt=hold.id)
+            return self.manager.filter(ahead, book_id=hold.book_id, status=BookHold.WAITING).count() + 1
+        except Exception as e:
+            lgr.exception(f"BookHoldService position exception: {e}")
+        return None
+
+    def allocate_next(self, book_id, copy_id=None):
+        """
+        Allocates a copy of the book to the first waiting hold. The hold is locked and holds locked by a
+        concurrent return are skipped, so two copies are never allocated to the same hold. Run it in a
+        transaction along with the change that frees the copy.
+        Raises database errors.
+        :param book_id: the unique book identifier
+        :param copy_id: the copy kept for the member
+        :return: the allocated BookHold, None if nobody is waiting or False if the hold changed meanwhile
+        :rtype: BookHold | None | bool
+        """
+        hold = self.queue(book_id).select_for_update(skip_locked=True).first()
+        if hold is None:
+            return None
+        now = timezone.now()
+        if self.manager.filter(pk=hold.pk, status=BookHold.WAITING).update(
+                status=BookHold.ALLOCATED, allocated_date=now, date_modified=now, copy_id=copy_id) == 1:
+            hold.status, hold.allocated_date, hold.date_modified = BookHold.ALLOCATED, now, now
+            hold.copy_id = copy_id
+            return hold
+        return False
+
+    def fulfil(self, book_id, member_id):
+        """
+        Marks the member's allocated hold of the book fulfilled, the copy kept for them is being lent.
+        Run it in a transaction.
+        Raises database errors.
+        :return: the fulfilled BookHold, None if the member has no copy allocated or False if it changed meanwhile
+        :rtype: BookHold | None | bool
+        """
+        hold = self.manager.select_for_update().filter(
+            book_id=book_id, member_id=member_id, status=BookHold.ALLOCATED).first()
+        if hold is None:
+            return None
+        if self.manager.filter(pk=hold.pk, status=BookHold.ALLOCATED).update(
+                status=BookHold.FULFILLED, date_modified=timezone.now()) == 1:
+            hold.status = BookHold.FULFILLED
+            return hold
+        return False
+
+    def cancel(self, hold_id):
+        """
+        Cancels the hold if it is still waiting or allocated
+        :return: True if the hold was cancelled
+        :rtype: bool
+        """
+        try:
+            return self.manager.filter(id=hold_id, status__in=BookHold.ACTIVE).update(
+                status=BookHold.CANCELLED, date_modified=timezone.now()) == 1
+        except Exception as e:
+            lgr.exception(f"BookHoldService cancel exception: {e}")
+        return False
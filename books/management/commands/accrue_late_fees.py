@@ -0,0 +1,22 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.backend.late_fees import accrue_late_fees
+
+
+class Command(BaseCommand):
+    help = 'Charges late fees on overdue loans, safe to run more than once for the same date'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Date to accrue fees up to (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--chunk-size', type=int, help='Maximum loans updated per statement')
+
+    def handle(self, *args, **options):
+        try:
+            run_date = datetime.date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError:
+            raise CommandError(f"Invalid date {options['date']}")
+        report = accrue_late_fees(run_date=run_date, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Accrued late fees for {report['run_date']}: {report['updated']} loans over {report['due_dates']} due dates"))
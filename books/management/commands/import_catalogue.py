@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from books.backend.catalogue_import import CATALOGUE_FORMATS, CatalogueImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Imports books from a CSV or JSON Lines file, authors and categories are matched by id or name'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', choices=CATALOGUE_FORMATS, help='File format, taken from the extension if omitted')
+        parser.add_argument('--batch-size', type=int, help='Number of rows inserted per batch')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], 'rb') as stream:
+                report = CatalogueImporter(batch_size=options['batch_size']).run(read_rows(stream, fmt))
+        except OSError as e:
+            raise CommandError(f"Unable to read {options['path']}: {e}")
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['message']}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {report['created']} books, {report['failed']} failed"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from base.backend.serviceregistry import get_service
+from books.backend.service import CirculationSummaryService
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the per category circulation summary from the issued books'
+
+    def handle(self, *args, **options):
+        count = get_service(CirculationSummaryService).rebuild()
+        if count is None:
+            raise CommandError('Failed to rebuild the circulation summary')
+        self.stdout.write(self.style.SUCCESS(f"Summarised {count} categories"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from books.backend.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the book full-text search index from the Books table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias to rebuild')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Number of books indexed per batch')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options['database'])
+        count = backend.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} books with {backend.__class__.__name__}"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from base.backend.serviceregistry import get_service
+from books.backend.service import MemberFeeBalanceService
+from members.models import Members
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the member fee balances from the issued books'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Number of members reconciled per batch')
+
+    def handle(self, *args, **options):
+        count = 0
+        chunk = []
+        for member_id in Members.objects.values_list('id', flat=True).order_by().iterator(chunk_size=options['chunk_size']):
+            chunk.append(member_id)
+            if len(chunk) >= options['chunk_size']:
+                count += self._refresh(chunk)
+                chunk = []
+        if chunk:
+            count += self._refresh(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {count} member fee balances"))
+
+    @staticmethod
+    def _refresh(member_ids):
+        count = get_service(MemberFeeBalanceService).refresh(member_ids)
+        if count is None:
+            raise CommandError('Failed to reconcile member fee balances')
+        return count
@@ -0,0 +1,79 @@
+import uuid
+
+from django.db import migrations
+
+# frozen copy of the index of books.backend.search as it stood when this migration was written, so that later
+# changes to the search backends do not change what this migration does
+SEARCH_TABLE = 'books_search'
+CHUNK_SIZE = 2000
+
+CREATE_INDEX = {
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        f"book_id UNINDEXED, title, author, tokenize='unicode61 remove_diacritics 2')",
+    ],
+    'postgresql': [
+        f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (book_id uuid PRIMARY KEY, document tsvector NOT NULL)",
+        f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)",
+    ],
+}
+
+INDEX_BOOK = {
+    'sqlite': f"INSERT INTO {SEARCH_TABLE}(rowid, book_id, title, author) VALUES (%s, %s, %s, %s)",
+    'postgresql': (
+        f"INSERT INTO {SEARCH_TABLE} (book_id, document) VALUES "
+        f"(%s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B')) "
+        f"ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document"),
+}
+
+
+def index_books(connection, rows):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(INDEX_BOOK[connection.vendor], rows)
+
+
+def document(vendor, book_id, title, author):
+    """ :return: the parameters of INDEX_BOOK for one book """
+    if vendor == 'sqlite':
+        book_id = uuid.UUID(str(book_id))
+        return book_id.int & ((1 << 63) - 1), book_id.hex, title, author
+    return book_id, title, author
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in CREATE_INDEX:
+        return
+    with connection.cursor() as cursor:
+        for statement in CREATE_INDEX[connection.vendor]:
+            cursor.execute(statement)
+    books = apps.get_model('books', 'Books').objects.using(connection.alias).values_list(
+        'id', 'title', 'author_id', 'author__first_name', 'author__last_name').order_by()
+    rows = []
+    for book_id, title, author_id, first_name, last_name in books.iterator(chunk_size=CHUNK_SIZE):
+        rows.append(document(connection.vendor, book_id, title, f"{first_name} {last_name}" if author_id else ''))
+        if len(rows) >= CHUNK_SIZE:
+            index_books(connection, rows)
+            rows = []
+    if rows:
+        index_books(connection, rows)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in CREATE_INDEX:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0009_rename_total_pending_fee_bookissued_total_fee_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0010_books_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CirculationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('books_on_loan', models.IntegerField(default=0)),
+                ('total_loans', models.IntegerField(default=0)),
+                ('outstanding_fees', models.DecimalField(decimal_places=2, default=0.0, max_digits=16)),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='circulation_summary', to='books.category')),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0011_circulationsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookissued',
+            name='fees_accrued_on',
+            field=models.DateField(blank=True, help_text='run date of the last late fee accrual', null=True),
+        ),
+        migrations.AddField(
+            model_name='bookissued',
+            name='late_fee',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=16),
+        ),
+        migrations.AddIndex(
+            model_name='bookissued',
+            index=models.Index(condition=models.Q(('returned', False)), fields=['return_date'], name='bookissued_open_due_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+
+def seed_balances(apps, schema_editor):
+    BookIssued = apps.get_model('books', 'BookIssued')
+    MemberFeeBalance = apps.get_model('books', 'MemberFeeBalance')
+    db_alias = schema_editor.connection.alias
+    balances = BookIssued.objects.using(db_alias).filter(fee_paid=False).values('member_id').annotate(
+        outstanding=Sum(ExpressionWrapper(F('return_fee') + F('late_fee'), output_field=DecimalField()))).order_by()
+    MemberFeeBalance.objects.using(db_alias).bulk_create(
+        [MemberFeeBalance(member_id=row['member_id'], balance=row['outstanding']) for row in balances],
+        batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0006_membernumbersequence'),
+        ('books', '0012_bookissued_late_fee'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberFeeBalance',
+            fields=[
+                ('member', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fee_balance', serialize=False, to='members.members')),
+                ('balance', models.DecimalField(decimal_places=2, default=0.0, max_digits=16)),
+            ],
+        ),
+        migrations.RunPython(seed_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0013_memberfeebalance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookissued',
+            index=models.Index(fields=['book', 'member', 'returned'], name='bookissued_loan_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookissued',
+            index=models.Index(fields=['member', 'fee_paid'], name='bookissued_member_fee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookissued',
+            index=models.Index(fields=['issued_date', 'id'], name='bookissued_issued_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='books',
+            index=models.Index(fields=['date_created', 'id'], name='books_created_idx'),
+        ),
+    ]
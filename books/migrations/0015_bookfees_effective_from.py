@@ -0,0 +1,43 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:13
+
+import datetime
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backdate_fees(apps, schema_editor):
+    """
+    Puts the existing schedules in effect from the epoch. The one with the lowest id, which borrow_book used
+    to read, is kept in effect by giving the others earlier dates.
+    """
+    BookFees = apps.get_model('books', 'BookFees')
+    epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    fees = list(BookFees.objects.using(schema_editor.connection.alias).order_by('pk'))
+    for index, fee in enumerate(fees):
+        fee.effective_from = epoch - datetime.timedelta(seconds=index)
+    BookFees.objects.using(schema_editor.connection.alias).bulk_update(fees, ['effective_from'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0014_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='bookfees',
+            options={'ordering': ('effective_from',)},
+        ),
+        migrations.AddField(
+            model_name='bookfees',
+            name='effective_from',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='when the schedule takes effect'),
+        ),
+        migrations.AddIndex(
+            model_name='bookfees',
+            index=models.Index(fields=['effective_from'], name='bookfees_effective_idx'),
+        ),
+        migrations.RunPython(backdate_fees, migrations.RunPython.noop),
+    ]
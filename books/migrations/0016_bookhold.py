@@ -0,0 +1,36 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0007_hot_lookup_indexes'),
+        ('books', '0015_bookfees_effective_from'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookHold',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('priority', models.IntegerField(default=0, help_text='holds with a higher priority are served first')),
+                ('status', models.CharField(choices=[('Waiting', 'Waiting'), ('Allocated', 'Allocated'), ('Fulfilled', 'Fulfilled'), ('Cancelled', 'Cancelled')], default='Waiting', max_length=10)),
+                ('allocated_date', models.DateTimeField(blank=True, null=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='books.books')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='members.members')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'Waiting')), fields=['book', '-priority', 'date_created', 'id'], name='bookhold_queue_idx'), models.Index(fields=['member', 'status'], name='bookhold_member_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookhold',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['Waiting', 'Allocated'])), fields=('book', 'member'), name='bookhold_active_uniq'),
+        ),
+    ]
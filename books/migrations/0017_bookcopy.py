@@ -0,0 +1,88 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def create_copies(apps, schema_editor):
+    """
+    Creates the copies of every book from its stock counters: the reserve as reference copies, the rest of the
+    stock as available copies and one copy per open loan and allocated hold, which are linked to it.
+    no_of_books becomes the number of copies catalogued.
+    """
+    Books = apps.get_model('books', 'Books')
+    BookCopy = apps.get_model('books', 'BookCopy')
+    BookIssued = apps.get_model('books', 'BookIssued')
+    BookHold = apps.get_model('books', 'BookHold')
+    db_alias = schema_editor.connection.alias
+    loans, holds = {}, {}
+    for loan in BookIssued.objects.using(db_alias).filter(returned=False).only('id', 'book_id'):
+        loans.setdefault(loan.book_id, []).append(loan)
+    for hold in BookHold.objects.using(db_alias).filter(status='Allocated').only('id', 'book_id'):
+        holds.setdefault(hold.book_id, []).append(hold)
+    for book in Books.objects.using(db_alias).iterator():
+        reference = min(max(book.no_of_reserve_books, 0), max(book.no_of_books, 0))
+        statuses = ['Reference'] * reference + ['Available'] * (max(book.no_of_books, 0) - reference)
+        statuses += ['OnLoan'] * len(loans.get(book.id, [])) + ['Allocated'] * len(holds.get(book.id, []))
+        copies = BookCopy.objects.using(db_alias).bulk_create([
+            BookCopy(book=book, barcode=f'{book.isbn}-{number}', status=status)
+            for number, status in enumerate(statuses, start=1)], batch_size=500)
+        borrowed = [copy for copy in copies if copy.status == 'OnLoan']
+        for loan, copy in zip(loans.get(book.id, []), borrowed):
+            loan.copy = copy
+        allocated = [copy for copy in copies if copy.status == 'Allocated']
+        for hold, copy in zip(holds.get(book.id, []), allocated):
+            hold.copy = copy
+        BookIssued.objects.using(db_alias).bulk_update(loans.get(book.id, []), ['copy'], batch_size=500)
+        BookHold.objects.using(db_alias).bulk_update(holds.get(book.id, []), ['copy'], batch_size=500)
+        Books.objects.using(db_alias).filter(id=book.id).update(no_of_books=len(copies))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0016_bookhold'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='books',
+            name='no_of_books',
+            field=models.IntegerField(default=1, help_text='copies catalogued, see BookCopy'),
+        ),
+        migrations.AlterField(
+            model_name='books',
+            name='no_of_reserve_books',
+            field=models.IntegerField(default=1, help_text='copies kept for reference, never lent'),
+        ),
+        migrations.CreateModel(
+            name='BookCopy',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('barcode', models.CharField(max_length=40, unique=True)),
+                ('status', models.CharField(choices=[('Available', 'Available'), ('OnLoan', 'On loan'), ('Allocated', 'Allocated to a hold'), ('Reference', 'Reference only'), ('Withdrawn', 'Withdrawn')], default='Available', max_length=10)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='copies', to='books.books')),
+            ],
+            options={
+                'verbose_name_plural': 'Book copies',
+            },
+        ),
+        migrations.AddField(
+            model_name='bookhold',
+            name='copy',
+            field=models.ForeignKey(blank=True, help_text='the copy kept for the member once allocated', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='holds', to='books.bookcopy'),
+        ),
+        migrations.AddField(
+            model_name='bookissued',
+            name='copy',
+            field=models.ForeignKey(blank=True, help_text='the copy lent, empty for loans made before copies were tracked', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='loans', to='books.bookcopy'),
+        ),
+        migrations.AddIndex(
+            model_name='bookcopy',
+            index=models.Index(fields=['book', 'status'], name='bookcopy_book_status_idx'),
+        ),
+        migrations.RunPython(create_copies, migrations.RunPython.noop),
+    ]
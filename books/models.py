@@ -1,6 +1,7 @@
 import datetime
 from datetime import timedelta
 from django.db import models
+from django.utils import timezone
 from base.models import State, GenericBaseModel, salutations, BaseModel
 from members.models import Members
 
@@ -35,14 +36,17 @@ class Books(BaseModel):
     isbn = models.CharField(max_length=25, unique=True)
     book_image = models.CharField(max_length=200, null=True, blank=True)
     author = models.ForeignKey(Author, on_delete=models.CASCADE)
-    no_of_books = models.IntegerField(default=1)
-    no_of_reserve_books = models.IntegerField(default=1)
+    no_of_books = models.IntegerField(default=1, help_text="copies catalogued, see BookCopy")
+    no_of_reserve_books = models.IntegerField(default=1, help_text="copies kept for reference, never lent")
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     status = models.ForeignKey(State, default=State.default_state, on_delete=models.CASCADE)
 
     def __str__(self):
         return f"{self.title} - {self.author}"
 
+    class Meta(object):
+        indexes = [models.Index(fields=['date_created', 'id'], name='books_created_idx')]
+
 
 # 004
 class BookIssued(models.Model):
@@ -55,10 +59,24 @@ class BookIssued(models.Model):
     total_fee = models.DecimalField(default=0.0, decimal_places=2, max_digits=16)
     fee_paid = models.BooleanField(default=False)
     returned = models.BooleanField(default=False)
+    late_fee = models.DecimalField(default=0.0, decimal_places=2, max_digits=16)
+    fees_accrued_on = models.DateField(blank=True, null=True, help_text="run date of the last late fee accrual")
+    copy = models.ForeignKey(
+        'BookCopy', blank=True, null=True, on_delete=models.SET_NULL, related_name='loans',
+        help_text="the copy lent, empty for loans made before copies were tracked")
 
     def __str__(self):
         return f"{self.book} - {self.member} - {self.return_date}"
 
+    class Meta(object):
+        indexes = [
+            models.Index(fields=['return_date'], condition=models.Q(returned=False), name='bookissued_open_due_idx'),
+            # open loan lookup on return, see BooksAdministration.return_book
+            models.Index(fields=['book', 'member', 'returned'], name='bookissued_loan_idx'),
+            models.Index(fields=['member', 'fee_paid'], name='bookissued_member_fee_idx'),
+            models.Index(fields=['issued_date', 'id'], name='bookissued_issued_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         """
             Override save method  to ensure valid return date have been saved.
@@ -68,9 +86,132 @@ class BookIssued(models.Model):
 
 
 class BookFees(models.Model):
+    """
+    Fee schedule, the schedule in effect is the one with the latest effective_from up to now.
+    Read through books.backend.fees.BookFeesRegistry rather than queried per request.
+    """
     borrow_fee = models.DecimalField(default=0.0, decimal_places=2, max_digits=16)
     late_return_rate = models.IntegerField(default=0, help_text="rate of the initial charge per day")
     max_borrow_fee_limit = models.DecimalField(default=500.0, decimal_places=2, max_digits=16)
+    effective_from = models.DateTimeField(default=timezone.now, help_text="when the schedule takes effect")
 
     def __str__(self):
         return f"{self.borrow_fee} {self.late_return_rate}"
+
+    class Meta(object):
+        ordering = ('effective_from',)
+        indexes = [models.Index(fields=['effective_from'], name='bookfees_effective_idx')]
+
+
+class CirculationSummary(models.Model):
+    """
+    Running loan totals per category, kept up to date by borrow/return when settings.BOOK_STATS_MATERIALIZED
+    is set and rebuilt from BookIssued by the rebuild_circulation_summary command
+    """
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, related_name='circulation_summary')
+    books_on_loan = models.IntegerField(default=0)
+    total_loans = models.IntegerField(default=0)
+    outstanding_fees = models.DecimalField(default=0.0, decimal_places=2, max_digits=16)
+
+    def __str__(self):
+        return f"{self.category} - {self.books_on_loan}"
+
+
+class MemberFeeBalance(models.Model):
+    """
+    Outstanding fees of a member (unpaid return and late fees of their loans), keyed by the member so that
+    borrow_book can check eligibility with a primary key read. Kept up to date on issue, return and late fee
+    accrual and rebuilt from BookIssued by the reconcile_fee_balances command.
+    """
+    member = models.OneToOneField(Members, primary_key=True, on_delete=models.CASCADE, related_name='fee_balance')
+    balance = models.DecimalField(default=0.0, decimal_places=2, max_digits=16)
+
+    def __str__(self):
+        return f"{self.member} - {self.balance}"
+
+
+def hold_statuses():
+    """
+    return the states of a hold
+    :return: hold status choices
+    """
+    return [('Waiting', 'Waiting'), ('Allocated', 'Allocated'), ('Fulfilled', 'Fulfilled'), ('Cancelled', 'Cancelled')]
+
+
+# 005
+class BookHold(BaseModel):
+    """
+    A member's place in the queue for a book. Waiting holds are served by priority, highest first, then in
+    the order they were placed. A returned copy is allocated to the first waiting hold instead of going back
+    into stock and is kept for the member until they borrow it (Fulfilled) or cancel the hold.
+    """
+    WAITING = 'Waiting'
+    ALLOCATED = 'Allocated'
+    FULFILLED = 'Fulfilled'
+    CANCELLED = 'Cancelled'
+    ACTIVE = (WAITING, ALLOCATED)
+
+    book = models.ForeignKey(Books, on_delete=models.CASCADE, related_name='holds')
+    member = models.ForeignKey(Members, on_delete=models.CASCADE, related_name='holds')
+    priority = models.IntegerField(default=0, help_text="holds with a higher priority are served first")
+    status = models.CharField(choices=hold_statuses(), max_length=10, default=WAITING)
+    allocated_date = models.DateTimeField(blank=True, null=True)
+    copy = models.ForeignKey(
+        'BookCopy', blank=True, null=True, on_delete=models.SET_NULL, related_name='holds',
+        help_text="the copy kept for the member once allocated")
+
+    def __str__(self):
+        return f"{self.book} - {self.member} - {self.status}"
+
+    class Meta(object):
+        indexes = [
+            # the queue of a book, the next hold is the first entry, see BookHoldService.allocate_next
+            models.Index(
+                fields=['book', '-priority', 'date_created', 'id'], condition=models.Q(status='Waiting'),
+                name='bookhold_queue_idx'),
+            models.Index(fields=['member', 'status'], name='bookhold_member_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['book', 'member'], condition=models.Q(status__in=['Waiting', 'Allocated']),
+                name='bookhold_active_uniq'),
+        ]
+
+
+def copy_statuses():
+    """
+    return the states of a book copy
+    :return: copy status choices
+    """
+    return [
+        ('Available', 'Available'), ('OnLoan', 'On loan'), ('Allocated', 'Allocated to a hold'),
+        ('Reference', 'Reference only'), ('Withdrawn', 'Withdrawn')]
+
+
+# 006
+class BookCopy(BaseModel):
+    """
+    A physical copy of a book, scanned by its barcode at the circulation desk. The stock of a book is the
+    number of its Available copies; borrow and return change the status of one copy so concurrent loans of
+    the same title update different rows. Reference copies are the book's no_of_reserve_books and are never lent.
+    """
+    AVAILABLE = 'Available'
+    ON_LOAN = 'OnLoan'
+    ALLOCATED = 'Allocated'
+    REFERENCE = 'Reference'
+    WITHDRAWN = 'Withdrawn'
+    IN_STOCK = (AVAILABLE, REFERENCE)
+
+    book = models.ForeignKey(Books, on_delete=models.CASCADE, related_name='copies')
+    barcode = models.CharField(max_length=40, unique=True)
+    status = models.CharField(choices=copy_statuses(), max_length=10, default=AVAILABLE)
+
+    def __str__(self):
+        return f"{self.barcode} - {self.book}"
+
+    class Meta(object):
+        verbose_name_plural = 'Book copies'
+        indexes = [
+            # copies of a book in a status e.g. the copies that can be lent, see BookCopyService.checkout
+            models.Index(fields=['book', 'status'], name='bookcopy_book_status_idx'),
+        ]
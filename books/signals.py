@@ -0,0 +1,81 @@
+"""
+Signal receivers for the books app
+"""
+import logging
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from base.backend.responsecache import bump_model_version
+from base.backend.serviceregistry import get_service
+from books.backend.search import get_search_backend
+from books.backend.service import BookCopyService
+from books.models import Author, Books, Category, BookFees, BookCopy
+
+lgr = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Books)
+def index_book(sender, instance, using, **kwargs):
+    """
+    Adds or refreshes the book's search document
+    """
+    try:
+        get_search_backend(using).index_books([instance])
+    except Exception as e:
+        lgr.exception(f"index_book Exception: {e}")
+
+
+@receiver(post_save, sender=Books)
+def catalogue_copies(sender, instance, created, **kwargs):
+    """
+    Adds the copies the book is missing when it is created or its no_of_books is raised, fixtures loaded with
+    loaddata bring their own copies
+    """
+    if kwargs.get('raw'):
+        return
+    get_service(BookCopyService).catalogue([instance], existing=not created)
+
+
+@receiver(post_delete, sender=Books)
+def remove_book_from_index(sender, instance, using, **kwargs):
+    """
+    Removes the book's search document
+    """
+    try:
+        get_search_backend(using).remove_books([instance.id])
+    except Exception as e:
+        lgr.exception(f"remove_book_from_index Exception: {e}")
+
+
+@receiver(post_save, sender=Author)
+def reindex_author_books(sender, instance, using, created, **kwargs):
+    """
+    Refreshes the search documents of the author's books since they carry the author name
+    """
+    if created:
+        return
+    try:
+        books = list(Books.objects.using(using).filter(author=instance).only('id', 'title', 'author_id'))
+        for book in books:
+            book.author = instance
+        get_search_backend(using).index_books(books)
+    except Exception as e:
+        lgr.exception(f"reindex_author_books Exception: {e}")
+
+
+@receiver(post_save, sender=Books)
+@receiver(post_delete, sender=Books)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=BookFees)
+@receiver(post_delete, sender=BookFees)
+@receiver(post_save, sender=BookCopy)
+@receiver(post_delete, sender=BookCopy)
+def invalidate_cached_responses(sender, **kwargs):
+    """
+    Invalidates the cached catalogue responses read from the changed model, see base/backend/responsecache.py
+    """
+    bump_model_version(sender)
@@ -0,0 +1,81 @@
+import json
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from mixer.backend.django import mixer
+
+from books.administration.books_administration import BooksAdministration
+from books.tests.test_circulation import circulation_setup, circulation_request
+
+pytestmark = pytest.mark.django_db
+
+
+def get(path, token=None, **data):
+    """ Requests the path through the ASGI handler and returns the response with its decoded body """
+    return async_to_sync(fetch)(path, data, headers={'Authorization': f'Bearer {token}'} if token else {})
+
+
+async def fetch(path, data, headers):
+    response = await AsyncClient().get(path, data, headers=headers)
+    if response.streaming:
+        return response, json.loads(b''.join([chunk async for chunk in response.streaming_content]))
+    return response, json.loads(response.content)
+
+
+@pytest.fixture
+def token():
+    identity = mixer.blend('base.UserIdentity', user=mixer.blend('auth.User'), state=mixer.blend('base.State'))
+    return identity.token
+
+
+@pytestmark
+class TestAsyncViews(object):
+    """
+    Test the async listing views served through ASGI
+    """
+
+    def test_books(self, token):
+        book, member = circulation_setup()
+        assert get('/api/books/get_books/', token)[1]['data'][0]['id'] == str(book.id), 'Should list the books'
+        _, response = get('/api/books/get_book/', token, book_id=str(book.id))
+        assert response['data']['available_copies'] == 2, 'Should return the book with its stock'
+        assert get('/api/books/get_book/', token, book_id='x')[1]['code'] == '500.400.004', 'Should validate the id'
+        BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id))
+        _, response = get('/api/books/issued_books/', token, limit=1)
+        assert response['data'][0]['book_id'] == str(book.id), 'Should page the issued books'
+
+    def test_streamed_books(self, token):
+        mixer.blend('base.State', name='Active')
+        books = mixer.cycle(3).blend('books.Books')
+        _, response = get('/api/books/get_books/', token, stream='true')
+        assert response['code'] == '100.000.000', 'Should stream the books'
+        assert {row['id'] for row in response['data']} == {str(book.id) for book in books}, 'Should stream every book'
+
+    def test_streamed_books_under_wsgi(self, client, token):
+        mixer.blend('base.State', name='Active')
+        books = mixer.cycle(3).blend('books.Books')
+        response = client.get('/api/books/get_books/', {'stream': 'true'}, HTTP_AUTHORIZATION=f'Bearer {token}')
+        assert response.streaming and not response.is_async, 'Should stream from a sync iterator under WSGI'
+        rows = json.loads(b''.join(response.streaming_content))['data']
+        assert {row['id'] for row in rows} == {str(book.id) for book in books}, 'Should stream every book'
+
+    def test_no_query_headers_under_asgi(self, token):
+        mixer.blend('base.State', name='Active')
+        response, _ = get('/api/books/get_books/', token)
+        assert 'X-DB-Queries' not in response and 'X-DB-Time' not in response, \
+            'Should not count the statements of async requests'
+
+    def test_members(self, token):
+        mixer.blend('base.State', name='Active')
+        member = mixer.blend('members.Members')
+        assert get('/api/members/get_members/', token)[1]['data'][0]['id'] == str(member.id), 'Should list the members'
+        _, response = get('/api/members/get_member/', token, member_id=str(member.id))
+        assert response['data']['membership_no'] == member.membership_no, 'Should return the member'
+
+    def test_unauthorized(self, caplog):
+        with caplog.at_level(logging.DEBUG, logger='django.request'):
+            response, _ = get('/api/books/get_books/')
+        assert response.status_code == 401, 'Should reject the request without a token'
+        assert 'adapted' not in caplog.text, 'Should run the whole middleware chain in the event loop'
@@ -0,0 +1,97 @@
+import pytest
+from django.test import RequestFactory
+from mixer.backend.django import mixer
+
+from books.administration.books_administration import BooksAdministration
+from books.backend.service import BookService
+from books.tests.test_circulation import circulation_setup, circulation_request
+
+pytestmark = pytest.mark.django_db
+
+
+def cache_request():
+    request = RequestFactory().get('/api/books/get_books/')
+    request.user = None
+    return request
+
+
+@pytestmark
+class TestResponseCache(object):
+    """
+    Test the caching of the catalogue read responses
+    """
+
+    def test_repeated_reads(self, query_budget):
+        book = mixer.blend('books.Books', status=mixer.blend('base.State', name='Active'))
+        mixer.blend('books.BookFees', borrow_fee=50, max_borrow_fee_limit=500)
+        reads = [
+            lambda: BooksAdministration().get_books(cache_request()),
+            lambda: BooksAdministration().get_book(cache_request(), str(book.id)),
+            lambda: BooksAdministration().get_authors(cache_request()),
+            lambda: BooksAdministration().get_categories(cache_request()),
+            lambda: BooksAdministration().borrow_fee_lookup()]
+        first = [read() for read in reads]
+        with query_budget(0):
+            assert [read() for read in reads] == first, 'Should serve the same responses from the cache'
+
+    def test_parameters_are_part_of_the_key(self):
+        mixer.blend('base.State', name='Active')
+        books = mixer.cycle(2).blend('books.Books')
+        first = BooksAdministration().get_book(cache_request(), str(books[0].id))
+        second = BooksAdministration().get_book(cache_request(), str(books[1].id))
+        assert first['data']['id'] == books[0].id, 'Should return the first book'
+        assert second['data']['id'] == books[1].id, 'Should not return the cached first book'
+        page = BooksAdministration().get_books(cache_request(), limit='1', token='a')
+        assert len(page['data']) == 1, 'Should return one page'
+        assert BooksAdministration().get_books(cache_request(), limit='1', token='b') == page, \
+            'Should share the entry between tokens'
+        assert len(BooksAdministration().get_books(cache_request())['data']) == 2, 'Should cache the pages apart'
+
+    def test_save_invalidates(self):
+        mixer.blend('base.State', name='Active')
+        book = mixer.blend('books.Books', title='Old title')
+        BooksAdministration().get_books(cache_request())
+        book.title = 'New title'
+        book.save()
+        response = BooksAdministration().get_books(cache_request())
+        assert response['data'][0]['title'] == 'New title', 'Should read the saved book'
+        book.author.first_name = 'Renamed'
+        book.author.save()
+        response = BooksAdministration().get_books(cache_request())
+        assert 'Renamed' in response['data'][0]['author_name'], 'Should read the saved author'
+
+    def test_delete_invalidates(self):
+        mixer.blend('base.State', name='Active')
+        mixer.blend('books.Books')
+        assert BooksAdministration().get_books(cache_request())['code'] == '100.000.000', 'Should return the book'
+        BookService().filter().first().delete()
+        assert BooksAdministration().get_books(cache_request())['code'] == '300.003.002', 'Should find no books'
+
+    def test_bulk_create_invalidates(self):
+        mixer.blend('base.State', name='Active')
+        category = mixer.blend('books.Category')
+        author = mixer.blend('books.Author')
+        mixer.blend('books.Books', category=category, author=author)
+        BooksAdministration().get_books(cache_request())
+        BookService().bulk_create([{
+            'title': 'Bulk', 'published_date': '2023-04-01', 'edition': '1st', 'isbn': '978-1', 'category': category,
+            'author': author}])
+        assert len(BooksAdministration().get_books(cache_request())['data']) == 2, 'Should read the created book'
+
+    def test_borrow_invalidates_stock(self):
+        book, member = circulation_setup(3, 1)
+        before = BooksAdministration().get_book(circulation_request(), str(book.id))
+        response = BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id))
+        assert response['code'] == '100.000.000', 'Should borrow the book'
+        after = BooksAdministration().get_book(circulation_request(), str(book.id))
+        assert after['data']['available_copies'] == before['data']['available_copies'] - 1, \
+            'Should read the new stock'
+
+    def test_disabled(self, settings, query_budget):
+        settings.RESPONSE_CACHE_ENABLED = False
+        mixer.blend('base.State', name='Active')
+        mixer.blend('books.Books')
+        BooksAdministration().get_books(cache_request())
+        with query_budget(1) as counter:
+            BooksAdministration().get_books(cache_request())
+        assert counter.count == 1, 'Should read the database when the cache is disabled'
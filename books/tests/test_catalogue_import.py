@@ -0,0 +1,108 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.test import RequestFactory, Client
+from mixer.backend.django import mixer
+
+from books.administration.books_administration import BooksAdministration
+from books.backend.catalogue_import import CatalogueImporter, read_rows
+from books.backend.search import get_search_backend
+from books.models import Books
+
+pytestmark = pytest.mark.django_db
+
+
+def catalogue_setup():
+    """ Creates the states, an author and a category the import rows refer to """
+    state = mixer.blend('base.State', name='Active')
+    for name in ('Completed', 'Failed'):
+        mixer.blend('base.State', name=name)
+    mixer.blend('base.TransactionType', name='ImportBooks', state=state)
+    author = mixer.blend('books.Author', first_name='Ngugi', last_name='Thiongo')
+    category = mixer.blend('books.Category', name='Fiction')
+    return author, category
+
+
+CSV_ROWS = (
+    "title,published_date,edition,isbn,author,category,no_of_books\n"
+    "Petals of Blood,1977-01-01,1st,isbn-1,Ngugi Thiongo,Fiction,4\n"
+    "The River Between,1965-01-01,2nd,isbn-2,{author_id},{category_id},\n"
+    "Unknown Author,1965-01-01,1st,isbn-3,Nobody,Fiction,\n"
+    "Bad Date,1965-13-01,1st,isbn-4,Ngugi Thiongo,Fiction,\n"
+    "Duplicate,1977-01-01,1st,isbn-1,Ngugi Thiongo,Fiction,\n"
+    ",1977-01-01,1st,isbn-5,Ngugi Thiongo,Fiction,\n"
+)
+
+
+@pytestmark
+class TestCatalogueImport(object):
+    """
+    Test the bulk catalogue importer
+    """
+
+    def test_import_csv(self):
+        author, category = catalogue_setup()
+        data = CSV_ROWS.format(author_id=author.id, category_id=category.id).encode('utf-8')
+        report = CatalogueImporter(batch_size=2).run(read_rows(io.BytesIO(data), 'csv'))
+        assert report['created'] == 2, 'Should create the valid rows'
+        assert report['failed'] == 4, 'Should report every invalid row'
+        assert sorted(error['row'] for error in report['errors']) == [3, 4, 5, 6], 'Should report the failed rows'
+        assert Books.objects.get(isbn='isbn-1').no_of_books == 4, 'Should set the number of books'
+        assert Books.objects.get(isbn='isbn-2').author_id == author.id, 'Should resolve the author by id'
+        assert get_search_backend().search('petals', limit=10), 'Should index the imported books'
+
+    def test_import_jsonl(self):
+        catalogue_setup()
+        rows = [
+            json.dumps({
+                'title': 'Weep Not Child', 'published_date': '1964-01-01', 'edition': '1st', 'isbn': 'isbn-10',
+                'author': 'Ngugi Thiongo', 'category': 'Fiction'}),
+            '{not json',
+        ]
+        report = CatalogueImporter().run(read_rows(io.StringIO('\n'.join(rows)), 'jsonl'))
+        assert report['created'] == 1, 'Should create the valid row'
+        assert report['failed'] == 1, 'Should report the unparsable row'
+
+    def test_failed_batch_reports_the_bad_row(self):
+        catalogue_setup()
+        data = (
+            "title,published_date,edition,isbn,author,category,no_of_books\n"
+            "Petals of Blood,1977-01-01,1st,isbn-1,Ngugi Thiongo,Fiction,\n"
+            "Too Many,1977-01-01,1st,isbn-2,Ngugi Thiongo,Fiction,99999999999999999999\n"
+            "Weep Not Child,1964-01-01,1st,isbn-3,Ngugi Thiongo,Fiction,\n").encode('utf-8')
+        with transaction.atomic():
+            report = CatalogueImporter().run(read_rows(io.BytesIO(data), 'csv'))
+            assert not transaction.get_rollback(), 'Should leave the surrounding transaction usable'
+        assert report['created'] == 2, 'Should create the other rows of the failed batch'
+        assert report['errors'] == [{'row': 2, 'message': 'Unable to create book record'}], 'Should name the bad row'
+        assert Books.objects.count() == 2, 'Should commit the created rows with the surrounding transaction'
+
+    def test_import_view_reads_the_body_as_a_stream(self, caplog):
+        catalogue_setup()
+        identity = mixer.blend('base.UserIdentity', user=mixer.blend('auth.User'), state=mixer.blend('base.State'))
+        data = CSV_ROWS.format(author_id='x', category_id='y').encode('utf-8')
+        response = Client().post(
+            '/api/books/import_books/', data, content_type='text/csv', HTTP_AUTHORIZATION=f'Bearer {identity.token}')
+        assert response.json()['data']['created'] == 1, 'Should import the posted rows'
+        assert 'get_request_data Exception' not in caplog.text, 'Should not parse the CSV body as JSON'
+
+    def test_import_books_administration(self):
+        catalogue_setup()
+        request = RequestFactory().post('/api/books/import_books/')
+        request.user = None
+        data = CSV_ROWS.format(author_id='x', category_id='y').encode('utf-8')
+        response = BooksAdministration().import_books(request, io.BytesIO(data), 'csv')
+        assert response['code'] == '100.000.000', 'Should import the books'
+        assert response['data']['created'] == 1, 'Should create the valid row'
+        response = BooksAdministration().import_books(request, io.BytesIO(data), 'xml')
+        assert response['code'] == '500.400.006', 'Should reject an unknown format'
+
+    def test_import_catalogue_command(self, tmp_path):
+        catalogue_setup()
+        path = tmp_path / 'catalogue.csv'
+        path.write_text(CSV_ROWS.format(author_id='x', category_id='y'))
+        call_command('import_catalogue', str(path), stdout=io.StringIO(), stderr=io.StringIO())
+        assert Books.objects.filter(isbn='isbn-1').exists(), 'Should import the file'
@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+from django.db import connection, DatabaseError
+from django.test import RequestFactory
+from mixer.backend.django import mixer
+
+from base.models import Transaction
+from books.administration.books_administration import BooksAdministration
+from books.models import BookIssued, BookCopy, MemberFeeBalance
+
+pytestmark = pytest.mark.django_db
+
+
+def circulation_setup(no_of_books=3, no_of_reserve_books=1):
+    """ Creates the states, transaction types and fees borrow/return need and returns a book and member """
+    state = mixer.blend('base.State', name='Active')
+    for name in ('Completed', 'Failed'):
+        mixer.blend('base.State', name=name)
+    for name in ('BorrowBook', 'ReturnBook'):
+        mixer.blend('base.TransactionType', name=name, state=state)
+    mixer.blend('books.BookFees', borrow_fee=50, max_borrow_fee_limit=500)
+    book = mixer.blend('books.Books', no_of_books=no_of_books, no_of_reserve_books=no_of_reserve_books)
+    return book, mixer.blend('members.Members')
+
+
+def in_stock(book):
+    """ Counts the copies of the book which are on the shelf """
+    return BookCopy.objects.filter(book=book, status__in=BookCopy.IN_STOCK).count()
+
+
+def circulation_request():
+    request = RequestFactory().post('/api/books/borrow_book/')
+    request.user = None
+    return request
+
+
+@pytestmark
+class TestCirculation(object):
+    """
+    Test borrowing and returning of books
+    """
+
+    def test_borrow_and_return(self):
+        book, member = circulation_setup()
+        response = BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id))
+        assert response['code'] == '100.000.000', 'Should borrow the book'
+        assert in_stock(book) == 2, 'Should take one copy out of stock'
+        response = BooksAdministration().return_book(circulation_request(), str(book.id), str(member.id))
+        assert response['code'] == '100.000.000', 'Should return the book'
+        assert in_stock(book) == 3, 'Should put the copy back into stock'
+        assert BookIssued.objects.get(book=book).returned, 'Should close the loan'
+        response = BooksAdministration().return_book(circulation_request(), str(book.id), str(member.id))
+        assert response['code'] == '300.003.003', 'Should not return the book twice'
+
+    def test_borrow_respects_reserve(self):
+        book, member = circulation_setup(no_of_books=1, no_of_reserve_books=1)
+        response = BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id))
+        assert response['code'] == '300.003.005', 'Should not lend the reserve copy'
+        assert not BookIssued.objects.exists(), 'Should not issue the book'
+
+    def test_borrow_unknown_book(self):
+        _, member = circulation_setup()
+        response = BooksAdministration().borrow_book(
+            circulation_request(), '0b4ff1c2-9d2e-4d8a-8f3e-2a7c1b0f9e11', str(member.id))
+        assert response['code'] == '300.003.002', 'Should report the book missing'
+
+    def test_failed_audit_rolls_back_the_borrow(self, monkeypatch):
+        book, member = circulation_setup()
+        save = Transaction.save
+
+        def audit_down(self, *args, **kwargs):
+            if kwargs.get('update_fields'):
+                raise DatabaseError('audit table unavailable')
+            return save(self, *args, **kwargs)
+
+        monkeypatch.setattr(Transaction, 'save', audit_down)
+        response = BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id))
+        assert response['code'] == '999.999.999', 'Should fail the borrow'
+        assert not BookIssued.objects.exists() and in_stock(book) == 3, 'Should roll back the loan with its audit'
+        assert not MemberFeeBalance.objects.filter(member=member, balance__gt=0).exists(), 'Should not charge'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_borrows_do_not_oversell():
+    """ Many threads borrowing the same title must never take the stock below the reserve """
+    book, _ = circulation_setup(no_of_books=6, no_of_reserve_books=1)
+    members = [mixer.blend('members.Members') for _ in range(12)]
+    barrier = threading.Barrier(len(members))
+    results = []
+
+    def borrow(member):
+        try:
+            barrier.wait()
+            results.append(BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id)))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=borrow, args=(member,)) for member in members]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    borrowed = len([result for result in results if result['code'] == '100.000.000'])
+    stock = in_stock(book)
+    assert 0 < borrowed <= 5, 'Should never lend more than the copies above the reserve'
+    assert stock == 6 - borrowed, 'Should take exactly one copy per loan'
+    assert BookIssued.objects.filter(book=book).count() == borrowed, 'Should issue exactly one loan per borrow'
+    assert stock >= book.no_of_reserve_books, 'Should keep the reserve copy'
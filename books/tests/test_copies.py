@@ -0,0 +1,83 @@
+import pytest
+from mixer.backend.django import mixer
+
+from books.administration.books_administration import BooksAdministration
+from books.models import BookCopy, BookHold, BookIssued
+from books.tests.test_circulation import circulation_setup, circulation_request, in_stock
+
+pytestmark = pytest.mark.django_db
+
+
+def copy_of(book, status):
+    return BookCopy.objects.filter(book=book, status=status).order_by('barcode').first()
+
+
+@pytestmark
+class TestCopies(object):
+    """
+    Test cataloguing and lending of the physical copies of a book
+    """
+
+    def test_catalogue_on_create(self):
+        book, _ = circulation_setup(3, 1)
+        copies = BookCopy.objects.filter(book=book)
+        assert copies.count() == 3, 'Should catalogue a copy per book'
+        assert copies.filter(status=BookCopy.REFERENCE).count() == 1, 'Should keep one reference copy'
+        assert sorted(copies.values_list('barcode', flat=True)) == [f'{book.isbn}-{n}' for n in (1, 2, 3)], \
+            'Should number the barcodes from the isbn'
+        book.no_of_books = 4
+        book.save()
+        assert copies.filter(status=BookCopy.AVAILABLE).count() == 3, 'Should catalogue the added copy'
+        book.no_of_books = 5
+        book.save_base(raw=True)  # as loaddata saves it
+        assert copies.count() == 4, 'Should not catalogue copies for a loaded fixture'
+
+    def test_borrow_and_return_by_barcode(self):
+        book, member = circulation_setup(3, 1)
+        copy = copy_of(book, BookCopy.AVAILABLE)
+        response = BooksAdministration().borrow_copy(circulation_request(), copy.barcode, str(member.id))
+        assert response['code'] == '100.000.000', 'Should borrow the scanned copy'
+        assert BookIssued.objects.get(book=book).copy_id == copy.id, 'Should lend the scanned copy'
+        assert BookCopy.objects.get(id=copy.id).status == BookCopy.ON_LOAN, 'Should put the copy on loan'
+        assert in_stock(book) == 2, 'Should take one copy out of stock'
+        response = BooksAdministration().return_copy(circulation_request(), copy.barcode)
+        assert response['code'] == '100.000.000', 'Should return the scanned copy'
+        assert BookCopy.objects.get(id=copy.id).status == BookCopy.AVAILABLE, 'Should put the copy back'
+        assert BooksAdministration().return_copy(circulation_request(), copy.barcode)['code'] == '300.003.003', \
+            'Should not return the copy twice'
+
+    def test_reference_and_unknown_copies(self):
+        book, member = circulation_setup(3, 1)
+        reference = copy_of(book, BookCopy.REFERENCE)
+        response = BooksAdministration().borrow_copy(circulation_request(), reference.barcode, str(member.id))
+        assert response['code'] == '300.003.005', 'Should not lend the reference copy'
+        response = BooksAdministration().borrow_copy(circulation_request(), 'missing', str(member.id))
+        assert response['code'] == '300.006.002', 'Should report the copy missing'
+        assert not BookIssued.objects.exists(), 'Should not issue the book'
+
+    def test_copy_on_loan_is_not_lent_again(self):
+        book, member = circulation_setup(3, 1)
+        copy = copy_of(book, BookCopy.AVAILABLE)
+        BooksAdministration().borrow_copy(circulation_request(), copy.barcode, str(member.id))
+        other = mixer.blend('members.Members')
+        response = BooksAdministration().borrow_copy(circulation_request(), copy.barcode, str(other.id))
+        assert response['code'] == '300.003.005', 'Should not lend a copy which is on loan'
+
+    def test_scanning_another_copy_releases_the_held_copy(self):
+        book, borrower = circulation_setup(3, 1)
+        for name in ('PlaceHold', 'CancelHold'):
+            mixer.blend('base.TransactionType', name=name, state=book.status)
+        first = copy_of(book, BookCopy.AVAILABLE)
+        BooksAdministration().borrow_copy(circulation_request(), first.barcode, str(borrower.id))
+        second = copy_of(book, BookCopy.AVAILABLE)
+        other = mixer.blend('members.Members')
+        BooksAdministration().borrow_copy(circulation_request(), second.barcode, str(other.id))
+        member = mixer.blend('members.Members')
+        BooksAdministration().place_hold(circulation_request(), str(book.id), str(member.id))
+        BooksAdministration().return_copy(circulation_request(), first.barcode)
+        assert BookCopy.objects.get(id=first.id).status == BookCopy.ALLOCATED, 'Should allocate the returned copy'
+        BooksAdministration().return_copy(circulation_request(), second.barcode)
+        response = BooksAdministration().borrow_copy(circulation_request(), second.barcode, str(member.id))
+        assert response['code'] == '100.000.000', 'Should lend the scanned copy to the holder'
+        assert BookHold.objects.get(member=member).status == BookHold.FULFILLED, 'Should fulfil the hold'
+        assert BookCopy.objects.get(id=first.id).status == BookCopy.AVAILABLE, 'Should release the held copy'
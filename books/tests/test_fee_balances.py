@@ -0,0 +1,68 @@
+import io
+import threading
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from mixer.backend.django import mixer
+
+from books.administration.books_administration import BooksAdministration
+from books.backend.service import MemberFeeBalanceService
+from books.models import MemberFeeBalance
+from books.tests.test_circulation import circulation_setup, circulation_request
+
+pytestmark = pytest.mark.django_db
+
+
+@pytestmark
+class TestMemberFeeBalance(object):
+    """
+    Test the member fee balances
+    """
+
+    def test_balance_follows_loans(self):
+        book, member = circulation_setup()
+        BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id))
+        BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id))
+        assert MemberFeeBalanceService().balance(member.id) == 100, 'Should charge the borrow fee per loan'
+        BooksAdministration().return_book(circulation_request(), str(book.id), str(member.id))
+        assert MemberFeeBalanceService().balance(member.id) == 50, 'Should settle the fee on return'
+
+    def test_borrow_checks_balance(self):
+        book, member = circulation_setup()
+        MemberFeeBalanceService().adjust(member.id, 500)
+        response = BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id))
+        assert response['code'] == '200.001.007', 'Should refuse a member at the fee limit'
+
+    def test_reconcile_fee_balances(self):
+        book, member = circulation_setup()
+        BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id))
+        MemberFeeBalance.objects.filter(member=member).update(balance=999)
+        other = mixer.blend('members.Members')
+        call_command('reconcile_fee_balances', stdout=io.StringIO())
+        assert MemberFeeBalanceService().balance(member.id) == 50, 'Should rebuild the balance from the loans'
+        assert MemberFeeBalance.objects.get(member=other).balance == 0, 'Should zero members without fees'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_borrows_check_the_balance_once():
+    """ Borrows racing for the last fee headroom of a member must not both pass the eligibility check """
+    book, member = circulation_setup(no_of_books=6)
+    MemberFeeBalanceService().adjust(member.id, 450)
+    barrier = threading.Barrier(4)
+    results = []
+
+    def borrow():
+        try:
+            barrier.wait()
+            results.append(BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id)))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=borrow) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [result['code'] for result in results].count('100.000.000') == 1, 'Should lend up to the fee limit only'
+    assert MemberFeeBalanceService().balance(member.id) == 500, 'Should charge a single borrow fee'
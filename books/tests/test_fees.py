@@ -0,0 +1,69 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from books.administration.books_administration import BooksAdministration
+from books.backend.fees import BookFeesRegistry
+from books.models import BookIssued
+from books.tests.test_circulation import circulation_setup, circulation_request
+
+pytestmark = pytest.mark.django_db
+
+
+@pytestmark
+class TestBookFeesRegistry(object):
+    """
+    Test the in-process fee schedules
+    """
+
+    def test_current_schedule(self):
+        now = timezone.now()
+        past = mixer.blend('books.BookFees', borrow_fee=50, effective_from=now - datetime.timedelta(days=30))
+        current = mixer.blend('books.BookFees', borrow_fee=60, effective_from=now - datetime.timedelta(days=1))
+        mixer.blend('books.BookFees', borrow_fee=70, effective_from=now + datetime.timedelta(days=1))
+        assert BookFeesRegistry.current() == current, 'Should return the latest schedule in effect'
+        assert BookFeesRegistry.current(now - datetime.timedelta(days=10)) == past, \
+            'Should return the schedule in effect at the given time'
+        assert BookFeesRegistry.current(now - datetime.timedelta(days=60)) is None, \
+            'Should return None before the first schedule'
+        assert BookFeesRegistry.current(now + datetime.timedelta(days=2)).borrow_fee == 70, \
+            'Should switch to the upcoming schedule without a save'
+
+    def test_lowest_id_wins_on_equal_dates(self):
+        effective_from = timezone.now() - datetime.timedelta(days=1)
+        first = mixer.blend('books.BookFees', effective_from=effective_from)
+        mixer.blend('books.BookFees', effective_from=effective_from)
+        assert BookFeesRegistry.current() == first, 'Should keep the first schedule in effect'
+
+    def test_cached_until_saved(self, query_budget):
+        fee = mixer.blend('books.BookFees', borrow_fee=50, effective_from=timezone.now() - datetime.timedelta(days=1))
+        BookFeesRegistry.current()
+        with query_budget(0):
+            assert BookFeesRegistry.current().borrow_fee == 50, 'Should serve the schedule from memory'
+        fee.borrow_fee = 80
+        fee.save()
+        assert BookFeesRegistry.current().borrow_fee == 80, 'Should reload the schedule once saved'
+        fee.delete()
+        assert BookFeesRegistry.current() is None, 'Should reload the schedules once deleted'
+
+    def test_reloaded_after_ttl(self, settings, monkeypatch):
+        fee = mixer.blend('books.BookFees', borrow_fee=50, effective_from=timezone.now() - datetime.timedelta(days=1))
+        BookFeesRegistry.current()
+        type(fee).objects.filter(pk=fee.pk).update(borrow_fee=80)  # as if saved by another process
+        assert BookFeesRegistry.current().borrow_fee == 50, 'Should serve the loaded schedule within the TTL'
+        loaded_at = BookFeesRegistry._loaded_at
+        monkeypatch.setattr('books.backend.fees.time.monotonic', lambda: loaded_at + settings.BOOK_FEES_TTL_SECONDS + 1)
+        assert BookFeesRegistry.current().borrow_fee == 80, 'Should reload the schedules once the TTL is over'
+
+    def test_borrow_uses_current_schedule(self):
+        book, member = circulation_setup(3, 1)
+        mixer.blend('books.BookFees', borrow_fee=90, effective_from=timezone.now() + datetime.timedelta(days=1))
+        response = BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id))
+        assert response['code'] == '100.000.000', 'Should borrow the book'
+        assert BookIssued.objects.get(book=book).return_fee == Decimal('50.00'), \
+            'Should not charge the upcoming fee'
+        lookup = BooksAdministration().borrow_fee_lookup()
+        assert lookup['data']['borrow_fee'] == Decimal('50.00'), 'Should look up the fee in effect'
@@ -0,0 +1,102 @@
+import pytest
+from mixer.backend.django import mixer
+
+from books.administration.books_administration import BooksAdministration
+from books.backend.service import BookHoldService
+from books.models import BookHold
+from books.tests.test_circulation import circulation_setup, circulation_request, in_stock
+
+pytestmark = pytest.mark.django_db
+
+
+def holds_setup():
+    """ Creates a book with its only lendable copy on loan, the member who borrowed it and two more members """
+    book, borrower = circulation_setup(2, 1)
+    for name in ('PlaceHold', 'CancelHold'):
+        mixer.blend('base.TransactionType', name=name, state=book.status)
+    response = BooksAdministration().borrow_book(circulation_request(), str(book.id), str(borrower.id))
+    assert response['code'] == '100.000.000', 'Should borrow the last lendable copy'
+    return book, borrower, mixer.blend('members.Members'), mixer.blend('members.Members')
+
+
+def place_hold(book, member, **kwargs):
+    return BooksAdministration().place_hold(circulation_request(), str(book.id), str(member.id), **kwargs)
+
+
+def hold_of(book, member):
+    return BookHold.objects.filter(book=book, member=member).latest('date_created')
+
+
+@pytestmark
+class TestHolds(object):
+    """
+    Test placing, serving and cancelling holds
+    """
+
+    def test_place_hold(self):
+        book, borrower, first, second = holds_setup()
+        response = place_hold(book, first)
+        assert response['code'] == '100.000.000', 'Should place the hold'
+        assert response['data']['position'] == 1, 'Should be first in the queue'
+        assert place_hold(book, second)['data']['position'] == 2, 'Should queue behind the first hold'
+        assert place_hold(book, first)['code'] == '300.005.002', 'Should not hold the same book twice'
+        available = mixer.blend('books.Books', no_of_books=3, no_of_reserve_books=1)
+        assert place_hold(available, first)['code'] == '300.005.003', 'Should not hold an available book'
+        assert place_hold(book, second, priority='high')['code'] == '300.005.008', 'Should reject the priority'
+
+    def test_return_allocates_to_first_hold(self):
+        book, borrower, first, second = holds_setup()
+        place_hold(book, first)
+        place_hold(book, second)
+        response = BooksAdministration().return_book(circulation_request(), str(book.id), str(borrower.id))
+        assert response['code'] == '100.000.000', 'Should return the book'
+        assert hold_of(book, first).status == BookHold.ALLOCATED, 'Should allocate the copy to the first hold'
+        assert hold_of(book, second).status == BookHold.WAITING, 'Should keep the second hold waiting'
+        assert in_stock(book) == 1, 'Should keep the copy out of stock'
+        response = BooksAdministration().borrow_book(circulation_request(), str(book.id), str(second.id))
+        assert response['code'] == '300.003.005', 'Should not lend the allocated copy to another member'
+        response = BooksAdministration().borrow_book(circulation_request(), str(book.id), str(first.id))
+        assert response['code'] == '100.000.000', 'Should lend the allocated copy to its member'
+        assert hold_of(book, first).status == BookHold.FULFILLED, 'Should fulfil the hold'
+        assert in_stock(book) == 1, 'Should not take another copy out of stock'
+
+    def test_priority_is_served_first(self):
+        book, borrower, first, second = holds_setup()
+        place_hold(book, first)
+        assert place_hold(book, second, priority=5)['data']['position'] == 1, 'Should queue ahead of the first'
+        BooksAdministration().return_book(circulation_request(), str(book.id), str(borrower.id))
+        assert hold_of(book, second).status == BookHold.ALLOCATED, 'Should allocate to the higher priority'
+
+    def test_cancel_hold(self):
+        book, borrower, first, second = holds_setup()
+        place_hold(book, first)
+        place_hold(book, second)
+        BooksAdministration().return_book(circulation_request(), str(book.id), str(borrower.id))
+        response = BooksAdministration().cancel_hold(circulation_request(), str(hold_of(book, first).id))
+        assert response['code'] == '100.000.000', 'Should cancel the allocated hold'
+        assert hold_of(book, second).status == BookHold.ALLOCATED, 'Should pass the copy to the next hold'
+        response = BooksAdministration().cancel_hold(circulation_request(), str(hold_of(book, first).id))
+        assert response['code'] == '300.005.006', 'Should not cancel a hold twice'
+        BooksAdministration().cancel_hold(circulation_request(), str(hold_of(book, second).id))
+        assert in_stock(book) == 2, 'Should put the copy back when nobody is waiting'
+
+    def test_get_holds(self):
+        book, borrower, first, second = holds_setup()
+        place_hold(book, first)
+        place_hold(book, second, priority=1)
+        response = BooksAdministration().get_holds(circulation_request(), book_id=str(book.id))
+        assert response['code'] == '100.000.000', 'Should list the holds'
+        assert [hold['member_id'] for hold in response['data']] == [second.id, first.id], \
+            'Should list the holds in queue order'
+        response = BooksAdministration().get_holds(circulation_request(), member_id=str(first.id), limit=1)
+        assert len(response['data']) == 1, 'Should page the holds'
+        assert BooksAdministration().get_holds(circulation_request(), status='Cancelled')['code'] == '300.005.009', \
+            'Should find no cancelled holds'
+
+    def test_allocate_next_walks_the_queue(self):
+        book, borrower, first, second = holds_setup()
+        place_hold(book, first)
+        place_hold(book, second)
+        assert BookHoldService().allocate_next(book.id).member_id == first.id, 'Should allocate the first hold'
+        assert BookHoldService().allocate_next(book.id).member_id == second.id, 'Should allocate the next hold'
+        assert BookHoldService().allocate_next(book.id) is None, 'Should find nobody waiting'
@@ -0,0 +1,79 @@
+import datetime
+import io
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from mixer.backend.django import mixer
+
+from books.backend.late_fees import accrue_late_fees, start_of_day
+from books.backend.service import BookIssuedService, MemberFeeBalanceService
+from books.models import BookIssued
+
+pytestmark = pytest.mark.django_db
+
+RUN_DATE = datetime.date(2024, 3, 10)
+# the fee schedule must be in effect on RUN_DATE
+EFFECTIVE_FROM = start_of_day(datetime.date(2024, 1, 1))
+
+
+def overdue_loan(days_overdue, return_fee=50, **kwargs):
+    """ Creates an open loan that was due days_overdue days before RUN_DATE """
+    loan = mixer.blend('books.BookIssued', return_fee=return_fee, total_fee=return_fee, **kwargs)
+    due = start_of_day(RUN_DATE - datetime.timedelta(days=days_overdue)) + datetime.timedelta(hours=12)
+    BookIssued.objects.filter(id=loan.id).update(return_date=due)
+    return loan
+
+
+@pytestmark
+class TestLateFees(object):
+    """
+    Test the late fee accrual
+    """
+
+    def test_accrue_late_fees(self):
+        mixer.blend('base.State', name='Active')
+        mixer.blend('books.BookFees', borrow_fee=50, late_return_rate=10, max_borrow_fee_limit=100,
+                    effective_from=EFFECTIVE_FROM)
+        three_days = overdue_loan(3)
+        thirty_days = overdue_loan(30)
+        not_due = overdue_loan(0)
+        returned = overdue_loan(5, returned=True)
+        report = accrue_late_fees(run_date=RUN_DATE, chunk_size=1)
+        assert report['updated'] == 2, 'Should only charge the open overdue loans'
+        loan = BookIssued.objects.get(id=three_days.id)
+        assert loan.late_fee == Decimal('15.00'), 'Should charge 10% of the return fee per day'
+        assert loan.total_fee == Decimal('65.00'), 'Should add the late fee to the total fee'
+        assert BookIssued.objects.get(id=thirty_days.id).late_fee == 100, 'Should cap the fee at the limit'
+        assert BookIssued.objects.get(id=not_due.id).late_fee == 0, 'Should not charge a loan due today'
+        assert BookIssued.objects.get(id=returned.id).late_fee == 0, 'Should not charge a returned loan'
+        assert MemberFeeBalanceService().balance(three_days.member_id) == Decimal('65.00'), \
+            'Should refresh the member balance'
+
+    def test_accrue_is_idempotent(self):
+        mixer.blend('base.State', name='Active')
+        mixer.blend('books.BookFees', borrow_fee=50, late_return_rate=10, max_borrow_fee_limit=500,
+                    effective_from=EFFECTIVE_FROM)
+        loan = overdue_loan(2)
+        accrue_late_fees(run_date=RUN_DATE)
+        assert accrue_late_fees(run_date=RUN_DATE)['updated'] == 0, 'Should skip loans accrued for the date'
+        assert BookIssued.objects.get(id=loan.id).total_fee == Decimal('60.00'), 'Should charge once per date'
+        accrue_late_fees(run_date=RUN_DATE + datetime.timedelta(days=1))
+        loan = BookIssued.objects.get(id=loan.id)
+        assert loan.late_fee == Decimal('15.00'), 'Should recompute the fee for the next date'
+        assert loan.total_fee == Decimal('65.00'), 'Should replace the previous late fee in the total'
+
+    def test_overdue(self):
+        mixer.blend('base.State', name='Active')
+        overdue_loan(1)
+        overdue_loan(1, returned=True)
+        assert BookIssuedService().overdue(timezone.now()).count() == 1, 'Should return the open overdue loans'
+
+    def test_accrue_late_fees_command(self):
+        mixer.blend('base.State', name='Active')
+        mixer.blend('books.BookFees', borrow_fee=50, late_return_rate=10, max_borrow_fee_limit=500,
+                    effective_from=EFFECTIVE_FROM)
+        loan = overdue_loan(1)
+        call_command('accrue_late_fees', '--date', RUN_DATE.isoformat(), stdout=io.StringIO())
+        assert BookIssued.objects.get(id=loan.id).late_fee == 5, 'Should accrue the fees'
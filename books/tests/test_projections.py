@@ -0,0 +1,59 @@
+import pytest
+from mixer.backend.django import mixer
+
+from base.backend.querycounter import QueryCounter
+from books.administration.books_administration import BooksAdministration
+from books.tests.test_cache import cache_request
+
+pytestmark = pytest.mark.django_db
+
+
+def changelist_queries(client, url):
+    with QueryCounter() as counter:
+        response = client.get(url)
+    assert response.status_code == 200, 'Should render the changelist'
+    return counter.count
+
+
+@pytestmark
+class TestProjections(object):
+    """
+    Test that the listings cost the same number of queries whatever the number of rows
+    """
+
+    @pytest.mark.parametrize('model, url', [
+        ('books.BookIssued', '/admin/books/bookissued/'),
+        ('books.BookHold', '/admin/books/bookhold/'),
+        ('books.BookCopy', '/admin/books/bookcopy/'),
+        ('books.Books', '/admin/books/books/'),
+        ('books.MemberFeeBalance', '/admin/books/memberfeebalance/'),
+        ('members.Members', '/admin/members/members/'),
+        ('base.Transaction', '/admin/base/transaction/'),
+    ])
+    def test_admin_changelist(self, admin_client, model, url):
+        mixer.blend('base.State', name='Active')
+        mixer.cycle(2).blend(model)
+        few = changelist_queries(admin_client, url)
+        mixer.cycle(8).blend(model)
+        assert changelist_queries(admin_client, url) == few, 'Should not query the related rows per row'
+
+    def test_changelist_reads_the_listed_columns(self, admin_client):
+        mixer.blend('base.State', name='Active')
+        mixer.blend('books.BookIssued')
+        with QueryCounter() as counter:
+            admin_client.get('/admin/books/bookissued/')
+        listing = next(sql for sql in counter.statements if sql.startswith('SELECT "books_bookissued"."id"'))
+        assert '"books_author"."first_name"' in listing, 'Should join the author of the book'
+        assert 'JOIN "base_state"' not in listing, 'Should not join the relations the changelist does not show'
+        assert '"total_fee"' not in listing and '"books_books"."isbn"' not in listing, \
+            'Should not read the columns the changelist does not show'
+
+    def test_issued_books(self, query_budget):
+        mixer.blend('base.State', name='Active')
+        mixer.cycle(2).blend('books.BookIssued')
+        with query_budget(10) as counter:
+            BooksAdministration().Issued_books(cache_request())
+        few = counter.count
+        mixer.cycle(8).blend('books.BookIssued')
+        with query_budget(few):
+            assert len(BooksAdministration().Issued_books(cache_request())['data']) == 10, 'Should list every loan'
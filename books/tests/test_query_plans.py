@@ -0,0 +1,58 @@
+import uuid
+
+import pytest
+from django.db.models import Q
+from django.utils import timezone
+
+from books.backend.service import BookHoldService
+from books.models import Books, BookIssued, MemberFeeBalance, BookCopy
+
+pytestmark = pytest.mark.django_db
+
+
+@pytestmark
+class TestQueryPlans(object):
+    """
+    Test that the circulation and listing lookups are served by an index
+    """
+
+    def test_open_loan_lookup(self, full_scans):
+        queryset = BookIssued.objects.filter(book_id=uuid.uuid4(), member_id=uuid.uuid4(), returned=False)
+        assert full_scans(queryset) == [], 'Should find the open loan through bookissued_loan_idx'
+
+    def test_overdue_lookup(self, full_scans):
+        queryset = BookIssued.objects.filter(returned=False, return_date__lt=timezone.now())
+        assert full_scans(queryset) == [], 'Should find the overdue loans through bookissued_open_due_idx'
+
+    def test_member_fees_lookup(self, full_scans):
+        queryset = BookIssued.objects.filter(
+            member_id__in=[uuid.uuid4(), uuid.uuid4()], fee_paid=False).values('member_id')
+        assert full_scans(queryset) == [], 'Should find the unpaid loans through bookissued_member_fee_idx'
+
+    def test_fee_balance_lookup(self, full_scans):
+        queryset = MemberFeeBalance.objects.filter(pk=uuid.uuid4()).values_list('balance', flat=True)
+        assert full_scans(queryset) == [], 'Should read the balance by primary key'
+
+    def test_books_page(self, full_scans):
+        now = timezone.now()
+        queryset = Books.objects.values().order_by('-date_created', '-id')
+        assert full_scans(queryset[:100]) == [], 'Should walk books_created_idx for the first page'
+        queryset = queryset.filter(Q(date_created__lt=now) | Q(date_created=now, id__lt=uuid.uuid4()))
+        assert full_scans(queryset[:100]) == [], 'Should seek books_created_idx for the next page'
+
+    def test_issued_books_page(self, full_scans):
+        queryset = BookIssued.objects.values().order_by('-issued_date', '-id')[:100]
+        assert full_scans(queryset) == [], 'Should walk bookissued_issued_idx'
+
+    def test_hold_queue(self, full_scans):
+        queryset = BookHoldService().queue(uuid.uuid4())[:1]
+        assert full_scans(queryset) == [], 'Should find the next hold through bookhold_queue_idx'
+        assert 'TEMP B-TREE' not in queryset.explain(), 'Should read the holds in queue order from the index'
+
+    def test_available_copy_pick(self, full_scans):
+        queryset = BookCopy.objects.filter(book_id=uuid.uuid4(), status=BookCopy.AVAILABLE).values_list('id')[:1]
+        assert full_scans(queryset) == [], 'Should pick the copy through bookcopy_book_status_idx'
+
+    def test_loan_by_barcode(self, full_scans):
+        queryset = BookIssued.objects.filter(copy__barcode='978-1-1', returned=False)
+        assert full_scans(queryset) == [], 'Should find the copy by its unique barcode'
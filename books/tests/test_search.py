@@ -0,0 +1,71 @@
+import importlib
+from types import SimpleNamespace
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from mixer.backend.django import mixer
+
+from books.administration.books_administration import BooksAdministration
+from books.backend.search import get_search_backend, IContainsSearchBackend
+
+pytestmark = pytest.mark.django_db
+
+
+@pytestmark
+class TestBookSearch(object):
+    """
+    Test the full-text search index and the search_book administration
+    """
+
+    def test_search_by_title_and_author(self):
+        mixer.blend('base.State', name="Active")
+        author = mixer.blend('books.Author', first_name='Chinua', last_name='Achebe')
+        book = mixer.blend('books.Books', title='Things Fall Apart', author=author)
+        mixer.blend('books.Books', title='Arrow of God')
+        assert get_search_backend().search('things', limit=10) == [book.id], 'Should match on title'
+        assert get_search_backend().search('achebe fall', limit=10) == [book.id], 'Should match on title and author'
+        assert get_search_backend().search('ach', limit=10) == [book.id], 'Should match on a prefix'
+
+    def test_index_follows_changes(self):
+        mixer.blend('base.State', name="Active")
+        author = mixer.blend('books.Author', first_name='Ngugi', last_name='Thiongo')
+        book = mixer.blend('books.Books', title='Weep Not Child', author=author)
+        author.last_name = 'Wa Thiongo'
+        author.save()
+        assert get_search_backend().search('wa thiongo', limit=10) == [book.id], 'Should reindex on author change'
+        book.delete()
+        assert get_search_backend().search('weep', limit=10) == [], 'Should remove deleted books'
+
+    def test_rebuild_command(self, capsys):
+        mixer.blend('base.State', name="Active")
+        mixer.cycle(3).blend('books.Books')
+        call_command('rebuild_search_index')
+        assert 'Indexed 3 books' in capsys.readouterr().out, 'Should index every book'
+
+    def test_migration_indexes_existing_books(self, monkeypatch):
+        migration = importlib.import_module('books.migrations.0010_books_search_index')
+        monkeypatch.setattr(migration, 'CHUNK_SIZE', 2)
+        mixer.blend('base.State', name="Active")
+        author = mixer.blend('books.Author', first_name='Wole', last_name='Soyinka')
+        books = mixer.cycle(3).blend('books.Books', author=author)
+        schema_editor = SimpleNamespace(connection=connection)  # the functions only use its connection
+        migration.drop_search_index(apps, schema_editor)
+        migration.create_search_index(apps, schema_editor)
+        assert sorted(get_search_backend().search('soyinka', limit=10)) == sorted(book.id for book in books), \
+            'Should index the books in chunks'
+
+    def test_icontains_fallback(self):
+        mixer.blend('base.State', name="Active")
+        book = mixer.blend('books.Books', title='The River Between')
+        assert IContainsSearchBackend().search('river', limit=10) == [book.id], 'Should match without an index'
+
+    def test_filter_books_paginates(self):
+        mixer.blend('base.State', name="Active")
+        mixer.cycle(3).blend('books.Books', title='Petals of Blood')
+        response = BooksAdministration().filter_books(None, params='petals', limit=2)
+        assert response['code'] == '100.000.000', 'Should find the books'
+        assert len(response['data']) == 2 and response['next_page'] == 2, 'Should return the first page'
+        response = BooksAdministration().filter_books(None, params='petals', limit=2, page=2)
+        assert len(response['data']) == 1 and response['next_page'] is None, 'Should return the last page'
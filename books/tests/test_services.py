@@ -1,7 +1,10 @@
 import pytest
 from mixer.backend.django import mixer
 
+from books.administration.books_administration import BooksAdministration
+from books.backend.search import get_search_backend
 from books.backend.service import AuthorService, CategoryService, BookService, BookIssuedService
+from books.tests.test_circulation import circulation_setup, circulation_request
 
 pytestmark = pytest.mark.django_db
 
@@ -115,6 +118,17 @@ class TestBookService(object):
         book = BookService().create(**kwargs)
         assert book is not None, 'should return created Book object'
 
+    def test_bulk_create(self):
+        """ Test for bulk_create Book service """
+        mixer.blend('base.State', name="Active")
+        author = mixer.blend('books.Author', first_name='Wole', last_name='Soyinka')
+        category = mixer.blend('books.Category')
+        books = BookService().bulk_create([
+            {'title': f'Ake {i}', 'published_date': '2023-04-01', 'edition': '1st', 'isbn': f'978-{i}',
+             'author': author, 'category': category} for i in range(3)])
+        assert len(books) == 3, 'Should create every Book'
+        assert len(get_search_backend().search('soyinka', limit=10)) == 3, 'Should index the created books'
+
     def test_update(self):
         mixer.blend('base.State', name="Active")
         old_book = mixer.blend('books.Books', title="The Titans")
@@ -165,3 +179,40 @@ class TestBookIssuedService(object):
         book_issued = mixer.blend('books.BookIssued', book=book, member=member)
         updated_book_issued = BookIssuedService().update(book_issued.id, book=book2)
         assert updated_book_issued.book.title == 'Frictionless Birds', 'Should have an updated instance of BookIssued'
+
+
+@pytestmark
+class TestQueryBudgets(object):
+    """
+     Test the number of statements the books endpoints run
+    """
+
+    def test_listing_budgets(self, query_budget):
+        book, member = circulation_setup()
+        mixer.cycle(5).blend('books.Books')
+        BooksAdministration().borrow_book(circulation_request(), str(book.id), str(member.id))
+        with query_budget(1):
+            assert BooksAdministration().get_books(circulation_request())['code'] == '100.000.000'
+        with query_budget(1):
+            assert BooksAdministration().get_books(circulation_request(), limit=2)['code'] == '100.000.000'
+        with query_budget(1):
+            assert BooksAdministration().get_book(circulation_request(), str(book.id))['code'] == '100.000.000'
+        with query_budget(1):
+            assert BooksAdministration().Issued_books(circulation_request())['code'] == '100.000.000'
+        with query_budget(3):
+            assert BooksAdministration().get_stats(circulation_request())['code'] == '100.000.000'
+
+    def test_search_budget(self, query_budget):
+        mixer.blend('base.State', name="Active")
+        mixer.blend('books.Books', title='Things Fall Apart')
+        with query_budget(2):
+            assert BooksAdministration().filter_books(circulation_request(), params='things')['code'] == '100.000.000'
+
+    def test_circulation_budgets(self, query_budget):
+        book, member = circulation_setup()
+        with query_budget(22):
+            assert BooksAdministration().borrow_book(
+                circulation_request(), str(book.id), str(member.id))['code'] == '100.000.000'
+        with query_budget(14):
+            assert BooksAdministration().return_book(
+                circulation_request(), str(book.id), str(member.id))['code'] == '100.000.000'
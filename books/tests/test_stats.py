@@ -0,0 +1,92 @@
+import pytest
+from django.test import RequestFactory
+from mixer.backend.django import mixer
+
+from base.backend.querycounter import QueryCounter
+from books.administration.books_administration import BooksAdministration
+from books.backend.service import CirculationSummaryService
+from books.models import CirculationSummary
+
+pytestmark = pytest.mark.django_db
+
+
+def stats_setup():
+    """ Creates two books in different categories and a member who borrows both """
+    state = mixer.blend('base.State', name='Active')
+    for name in ('Completed', 'Failed'):
+        mixer.blend('base.State', name=name)
+    for name in ('BorrowBook', 'ReturnBook'):
+        mixer.blend('base.TransactionType', name=name, state=state)
+    mixer.blend('books.BookFees', borrow_fee=50, max_borrow_fee_limit=500)
+    books = [
+        mixer.blend('books.Books', no_of_books=3, no_of_reserve_books=1, category=mixer.blend('books.Category'))
+        for _ in range(2)]
+    member = mixer.blend('members.Members')
+    for book in books:
+        response = BooksAdministration().borrow_book(stats_request(), str(book.id), str(member.id))
+        assert response['code'] == '100.000.000', 'Should borrow the book'
+    return books, member
+
+
+def stats_request():
+    request = RequestFactory().get('/api/books/stats/')
+    request.user = None
+    return request
+
+
+@pytestmark
+class TestStats(object):
+    """
+    Test the dashboard statistics
+    """
+
+    def test_get_stats(self):
+        books, member = stats_setup()
+        BooksAdministration().return_book(stats_request(), str(books[0].id), str(member.id))
+        response = BooksAdministration().get_stats(stats_request())
+        assert response['code'] == '100.000.000', 'Should return the totals'
+        assert response['data']['titles'] == 2, 'Should count the titles'
+        assert response['data']['copies'] == 5, 'Should count the copies in stock'
+        assert response['data']['books_on_loan'] == 1, 'Should count the open loans'
+        assert response['data']['outstanding_fees'] == 50, 'Should sum the unpaid fees'
+
+    def test_get_category_stats(self):
+        books, _ = stats_setup()
+        response = BooksAdministration().get_category_stats(stats_request())
+        assert response['code'] == '100.000.000', 'Should return a row per category'
+        assert [row['books_on_loan'] for row in response['data']] == [1, 1], 'Should count the loans per category'
+
+    def test_get_member_stats(self):
+        _, member = stats_setup()
+        response = BooksAdministration().get_member_stats(stats_request())
+        assert response['code'] == '100.000.000', 'Should return the members with fees'
+        assert response['data'][0]['member_id'] == member.id, 'Should return the member'
+        assert response['data'][0]['outstanding_fees'] == 100, 'Should sum the member fees'
+
+    def test_materialized_summary(self, settings):
+        settings.BOOK_STATS_MATERIALIZED = True
+        books, member = stats_setup()
+        BooksAdministration().return_book(stats_request(), str(books[0].id), str(member.id))
+        response = BooksAdministration().get_stats(stats_request())
+        assert response['data']['books_on_loan'] == 1, 'Should read the open loans from the summary'
+        assert response['data']['outstanding_fees'] == 50, 'Should read the unpaid fees from the summary'
+        incremental = sorted(CirculationSummary.objects.values_list('books_on_loan', 'total_loans', 'outstanding_fees'))
+        assert CirculationSummaryService().rebuild() == 2, 'Should rebuild both categories'
+        rebuilt = sorted(CirculationSummary.objects.values_list('books_on_loan', 'total_loans', 'outstanding_fees'))
+        assert incremental == rebuilt, 'Should keep the same counters as a rebuild'
+
+    def test_materialized_reads_skip_the_loan_scan(self, settings):
+        settings.BOOK_STATS_MATERIALIZED = True
+        books, member = stats_setup()
+        BooksAdministration().return_book(stats_request(), str(books[0].id), str(member.id))
+        settings.BOOK_STATS_MATERIALIZED = False
+        scanned = BooksAdministration().get_stats(stats_request())['data']
+        scanned_members = BooksAdministration().get_member_stats(stats_request())['data']
+        settings.BOOK_STATS_MATERIALIZED = True
+        with QueryCounter() as counter:
+            materialized = BooksAdministration().get_stats(stats_request())['data']
+        assert materialized == scanned, 'Should return the same totals'
+        loan_reads = [sql for sql in counter.statements if '"books_bookissued"' in sql]
+        assert len(loan_reads) == 1 and '"return_date" <' in loan_reads[0], 'Should only read the overdue loans'
+        materialized_members = BooksAdministration().get_member_stats(stats_request())['data']
+        assert materialized_members == scanned_members, 'Should return the same member rows'
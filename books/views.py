@@ -1,13 +1,17 @@
 import logging
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse
 from django.urls import re_path
 from django.views.decorators.csrf import csrf_exempt
 
-from base.backend.utils.decorators import user_login_required
-from base.backend.utils.utilities import get_request_data
+from base.backend.utils.codec import JsonResponse
+from base.backend.utils.decorators import user_login_required, async_user_login_required, async_csrf_exempt
+from base.backend.utils.pagination import list_response
+from base.backend.utils.utilities import get_request_data, served_by_asgi
 from books.administration.books_administration import BooksAdministration
+from books.backend.catalogue_import import detect_format, RequestStream
 
 lgr = logging.getLogger(__name__)
 
@@ -41,7 +45,7 @@ def get_all_authors(request):
     try:
         print("ooh we are good")
         kwargs = get_request_data(request)
-        return JsonResponse(BooksAdministration().get_authors(request, **kwargs))
+        return list_response(BooksAdministration().get_authors(request, **kwargs))
     except Exception as e:
         lgr.exception(f"Get authors error {e}")
         return JsonResponse({'code': "500.000.100", "message": "Failure during fetch authors"})
@@ -96,7 +100,7 @@ def get_category(request):
 def get_categories(request):
     try:
         kwargs = get_request_data(request)
-        return JsonResponse(BooksAdministration().get_categories(request, **kwargs))
+        return list_response(BooksAdministration().get_categories(request, **kwargs))
     except Exception as e:
         lgr.exception(f"Get categories error {e}")
         return JsonResponse({'code': "500.000.100", "message": "Failure during fetch categories"})
@@ -135,23 +139,26 @@ def create_book(request):
         return JsonResponse({'code': "500.000.100", "message": "Failure during book creation"})
 
 
-@csrf_exempt
-@user_login_required
-def get_book(request):
+@async_csrf_exempt
+@async_user_login_required
+async def get_book(request):
     try:
         book_id = get_request_data(request).pop('book_id')
-        return JsonResponse(BooksAdministration().get_book(request, book_id))
+        return JsonResponse(await BooksAdministration().aget_book(request, book_id))
     except Exception as e:
         lgr.exception(f"Get book error {e}")
         return JsonResponse({'code': "500.000.100", "message": "Failure during get book"})
 
 
-@csrf_exempt
-@user_login_required
-def get_books(request):
+@async_csrf_exempt
+@async_user_login_required
+async def get_books(request):
     try:
         kwargs = get_request_data(request)
-        return JsonResponse(BooksAdministration().get_books(request, **kwargs))
+        if served_by_asgi(request):
+            return list_response(await BooksAdministration().aget_books(request, **kwargs))
+        # under WSGI a stream from an async iterator would be read whole before it is sent, use the sync iterator
+        return list_response(await sync_to_async(BooksAdministration().get_books)(request, **kwargs))
     except Exception as e:
         lgr.exception(f"Get books error {e}")
         return JsonResponse({'code': "500.000.100", "message": "Failure during fetch books"})
@@ -168,6 +175,21 @@ def update_book(request):
         return JsonResponse({'code': "500.000.100", "message": "Failure during update book"})
 
 
+@csrf_exempt
+@user_login_required
+def import_books(request):
+    try:
+        kwargs = request.GET.dict()
+        kwargs.update(request.POST.dict())
+        upload = request.FILES.get('file')
+        stream = upload.file if upload else RequestStream(request)
+        fmt = kwargs.pop('format', None) or detect_format(
+            getattr(upload, 'name', None), getattr(upload, 'content_type', None) or request.content_type)
+        return JsonResponse(BooksAdministration().import_books(request, stream, fmt, **kwargs))
+    except Exception as e:
+        lgr.exception(f"Import books error {e}")
+        return JsonResponse({'code': "500.000.100", "message": "Failure during books import"})
+
 @csrf_exempt
 @user_login_required
 def delete_book(request):
@@ -212,12 +234,40 @@ def return_book(request):
     except Exception as e:
         lgr.exception(f"Return book error {e}")
         return JsonResponse({'code': "500.000.100", "message": "Failure during return book"})
+
+
+@csrf_exempt
+@user_login_required
+def borrow_copy(request):
+    try:
+        barcode = get_request_data(request).pop('barcode')
+        member_id = get_request_data(request).pop('member_id')
+        return JsonResponse(BooksAdministration().borrow_copy(request, barcode, member_id))
+    except Exception as e:
+        lgr.exception(f"Borrow copy error {e}")
+        return JsonResponse({'code': "500.000.100", "message": "Failure during borrow copy"})
+
+
 @csrf_exempt
 @user_login_required
-def Issued_books(request):
+def return_copy(request):
+    try:
+        barcode = get_request_data(request).pop('barcode')
+        return JsonResponse(BooksAdministration().return_copy(request, barcode))
+    except Exception as e:
+        lgr.exception(f"Return copy error {e}")
+        return JsonResponse({'code': "500.000.100", "message": "Failure during return copy"})
+
+
+@async_csrf_exempt
+@async_user_login_required
+async def Issued_books(request):
     try:
         kwargs = get_request_data(request)
-        return JsonResponse(BooksAdministration().Issued_books(request, **kwargs))
+        if served_by_asgi(request):
+            return list_response(await BooksAdministration().aIssued_books(request, **kwargs))
+        # under WSGI a stream from an async iterator would be read whole before it is sent, use the sync iterator
+        return list_response(await sync_to_async(BooksAdministration().Issued_books)(request, **kwargs))
     except Exception as e:
         lgr.exception(f"Issued book error {e}")
         return JsonResponse({'code': "500.000.100", "message": "Failure during issued book"})
@@ -231,6 +281,42 @@ def borrow_fee_lookup(request):
         lgr.exception(f"borrow fee {e}")
         return JsonResponse({'code': "500.000.100", "message": "Failure during return book"})
 
+
+@csrf_exempt
+@user_login_required
+def place_hold(request):
+    try:
+        kwargs = get_request_data(request)
+        book_id = kwargs.pop('book_id')
+        member_id = kwargs.pop('member_id')
+        return JsonResponse(BooksAdministration().place_hold(request, book_id, member_id, **kwargs))
+    except Exception as e:
+        lgr.exception(f"Place hold error {e}")
+        return JsonResponse({'code': "500.000.100", "message": "Failure during place hold"})
+
+
+@csrf_exempt
+@user_login_required
+def cancel_hold(request):
+    try:
+        hold_id = get_request_data(request).pop('hold_id')
+        return JsonResponse(BooksAdministration().cancel_hold(request, hold_id))
+    except Exception as e:
+        lgr.exception(f"Cancel hold error {e}")
+        return JsonResponse({'code': "500.000.100", "message": "Failure during cancel hold"})
+
+
+@csrf_exempt
+@user_login_required
+def get_holds(request):
+    try:
+        kwargs = get_request_data(request)
+        return list_response(BooksAdministration().get_holds(request, **kwargs))
+    except Exception as e:
+        lgr.exception(f"Get holds error {e}")
+        return JsonResponse({'code': "500.000.100", "message": "Failure during fetch holds"})
+
+
 @csrf_exempt
 @user_login_required
 def filter_books(request):
@@ -242,6 +328,39 @@ def filter_books(request):
         return JsonResponse({'code': "500.000.100", "message": "Failure during search books"})
 
 
+@csrf_exempt
+@user_login_required
+def get_stats(request):
+    try:
+        kwargs = get_request_data(request)
+        return JsonResponse(BooksAdministration().get_stats(request, **kwargs))
+    except Exception as e:
+        lgr.exception(f"stats error {e}")
+        return JsonResponse({'code': "500.000.100", "message": "Failure during fetch stats"})
+
+
+@csrf_exempt
+@user_login_required
+def get_category_stats(request):
+    try:
+        kwargs = get_request_data(request)
+        return JsonResponse(BooksAdministration().get_category_stats(request, **kwargs))
+    except Exception as e:
+        lgr.exception(f"category stats error {e}")
+        return JsonResponse({'code': "500.000.100", "message": "Failure during fetch category stats"})
+
+
+@csrf_exempt
+@user_login_required
+def get_member_stats(request):
+    try:
+        kwargs = get_request_data(request)
+        return JsonResponse(BooksAdministration().get_member_stats(request, **kwargs))
+    except Exception as e:
+        lgr.exception(f"member stats error {e}")
+        return JsonResponse({'code': "500.000.100", "message": "Failure during fetch member stats"})
+
+
 urlpatterns = [
     # author
     re_path(r'^create_author', create_author),
@@ -262,11 +381,24 @@ urlpatterns = [
     re_path(r'^update_book/$', update_book),
     re_path(r'^delete_book/$', delete_book),
     re_path(r'^archive_book/$', archive_book),
+    re_path(r'^import_books/$', import_books),
 
     # logic for borrow book and return book
     re_path(r'^borrow_book/$', borrow_book),
     re_path(r'^return_book/$', return_book),
+    re_path(r'^borrow_copy/$', borrow_copy),
+    re_path(r'^return_copy/$', return_copy),
     re_path(r'^issued_books/$', Issued_books),
     re_path(r'^borrow_fee_lookup/$', borrow_fee_lookup),
     re_path(r'^search_book/$', filter_books),
+
+    # holds
+    re_path(r'^place_hold/$', place_hold),
+    re_path(r'^cancel_hold/$', cancel_hold),
+    re_path(r'^holds/$', get_holds),
+
+    # stats
+    re_path(r'^stats/$', get_stats),
+    re_path(r'^stats/categories/$', get_category_stats),
+    re_path(r'^stats/members/$', get_member_stats),
 ]
@@ -0,0 +1,69 @@
+import re
+from contextlib import contextmanager
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+
+from base.backend.querycounter import QueryCounter
+from base.backend.stateregistry import StateRegistry
+from base.backend.tokencache import TokenCache
+from books.backend.fees import BookFeesRegistry
+from members.backend.membership_numbers import MembershipNumberAllocator
+
+# the pooled backend subclasses the PostgreSQL backend, which cannot be imported without psycopg installed
+# (requirements-postgresql.txt), keep it out of pytest --doctest-modules, base/tests/test_postgresql_pool.py
+# covers it when psycopg is installed
+collect_ignore = ['base/backend/postgresql_pool']
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """
+    Each test runs in its own rolled back transaction, so states, tokens, membership numbers, fees and
+    responses cached by a previous test are stale
+    """
+    StateRegistry.invalidate()
+    TokenCache.clear()
+    MembershipNumberAllocator.reset()
+    BookFeesRegistry.invalidate()
+    cache.clear()
+    yield
+    StateRegistry.invalidate()
+    TokenCache.clear()
+    MembershipNumberAllocator.reset()
+    BookFeesRegistry.invalidate()
+    cache.clear()
+
+
+@pytest.fixture
+def full_scans():
+    """
+    Returns a function listing the tables a queryset reads with a full table scan, taken from SQLite's
+    EXPLAIN QUERY PLAN. Scans that walk an index e.g. for ORDER BY ... LIMIT are not reported.
+    """
+    if connection.vendor != 'sqlite':
+        pytest.skip('query plans are checked on SQLite')
+
+    def scans(queryset):
+        plan = queryset.explain()
+        return [line.split('SCAN ', 1)[1] for line in plan.splitlines() if re.search(r'\bSCAN \S+$', line.strip())]
+
+    return scans
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Returns a context manager failing the test when the block runs more than max_queries statements
+    e.g. with query_budget(3): BooksAdministration().get_books(request)
+    """
+
+    @contextmanager
+    def budget(max_queries, using=None):
+        with QueryCounter(using=using) as counter:
+            yield counter
+        assert counter.count <= max_queries, \
+            f'Should run at most {max_queries} queries, ran {counter.count}: {list(counter.statements)}'
+
+    return budget
@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+Served with uvicorn, e.g.
+    uvicorn library_manager.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+The listing views are async, a slow client holds no thread while its request is read or its response sent.
+The async ORM of Django 4.2 still runs the queries on a thread.
 """
 
 import os
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 
+from library_manager.database import database_config, replica_config, sqlite_pragmas
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -56,6 +58,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'base.backend.middleware.MetricsMiddleware',
+    'base.backend.middleware.QueryCountMiddleware',
+    'base.backend.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,12 +94,20 @@ WSGI_APPLICATION = 'library_manager.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# read from DATABASE_URL and the DATABASE_* variables, see library_manager/database.py. Connections are kept
+# for DATABASE_CONN_MAX_AGE seconds instead of being opened on every request
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(base_dir=BASE_DIR),
 }
+# read-only administration methods read from the replica when DATABASE_REPLICA_URL is set, see
+# base/backend/dbrouter.py
+READ_REPLICA_ALIAS = 'replica'
+replica = replica_config(base_dir=BASE_DIR)
+if replica:
+    DATABASES[READ_REPLICA_ALIAS] = replica
+DATABASE_ROUTERS = ['base.backend.dbrouter.ReplicaRouter']
+# set on every new SQLite connection, see base/signals.py
+SQLITE_PRAGMAS = sqlite_pragmas()
 
 
 # Password validation
@@ -145,3 +158,68 @@ STATICFILES_DIRS = [
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 TOKEN_EXPIRY_SECONDS = 120
+# validated tokens are cached in-process for TOKEN_CACHE_TTL_SECONDS, the expiry is only extended
+# once TOKEN_EXTEND_THRESHOLD of the token lifetime has passed
+TOKEN_CACHE_TTL_SECONDS = 30
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_EXTEND_THRESHOLD = 0.5
+
+# Transaction audit log. When TRANSACTION_LOG_ASYNC is set transactions are queued in memory and
+# written in batches by a background thread, see base/backend/transactionlogwriter.py
+TRANSACTION_LOG_ASYNC = False
+TRANSACTION_LOG_BATCH_SIZE = 200
+TRANSACTION_LOG_FLUSH_INTERVAL = 2.0
+TRANSACTION_LOG_SPILL_DIR = BASE_DIR / 'transaction_spill'
+TRANSACTION_LOG_SPILL_FSYNC = False
+# flushes a record may fail before it is moved to the dead-letter file in TRANSACTION_LOG_SPILL_DIR
+TRANSACTION_LOG_MAX_ATTEMPTS = 3
+
+# listing endpoints, see base/backend/utils/pagination.py
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 2000
+
+# search_book backend: auto (by database vendor), sqlite (FTS5), postgresql (tsvector) or icontains
+BOOK_SEARCH_BACKEND = 'auto'
+
+# membership numbers reserved per process and round-trip, numbers left unused when a process exits are skipped
+MEMBERSHIP_NO_BLOCK_SIZE = 1
+
+# catalogue import, see books/backend/catalogue_import.py
+CATALOGUE_IMPORT_BATCH_SIZE = 1000
+CATALOGUE_IMPORT_MAX_ERRORS = 1000
+
+# keep the per category circulation summary up to date on borrow/return and serve the stats endpoints from it,
+# run manage.py rebuild_circulation_summary when turning it on
+BOOK_STATS_MATERIALIZED = False
+
+# rows changed per UPDATE by the late fee accrual, see books/backend/late_fees.py
+LATE_FEE_CHUNK_SIZE = 5000
+
+# per request SQL statement counts, see base/backend/middleware.py
+QUERY_COUNT_HEADERS = True
+QUERY_COUNT_WARN = 50
+
+# request metrics served at /api/metrics, see base/backend/metrics.py. Each worker process writes its
+# figures to METRICS_DIR so that they can be summed, set it to None for a single process
+METRICS_DIR = BASE_DIR / 'metrics'
+METRICS_FLUSH_INTERVAL = 5.0
+
+# Cache of the catalogue read responses, see base/backend/responsecache.py. locmem is per process, point
+# RESPONSE_CACHE_ALIAS at a shared backend (FileBasedCache, RedisCache) when running several workers since
+# invalidation is done through the shared model versions
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'library-manager',
+    },
+}
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300
+# seconds after a change during which responses read from the read replica are not cached, see responsecache.py
+REPLICA_LAG_SECONDS = 5
+
+# seconds the fee schedules are kept in memory, a change saved in another process is picked up through the
+# response cache versions when the cache is shared and after at most this long otherwise, see books/backend/fees.py
+BOOK_FEES_TTL_SECONDS = 60
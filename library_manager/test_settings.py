@@ -1,8 +1,20 @@
+import os
+import tempfile
 
 from library_manager.settings import *
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:'
-    }
+    },
+    # stand-in for a read replica, a separate SQLite file only used by the tests asking for it
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.gettempdir(), 'library_manager_replica.sqlite3'),
+        'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'test_library_manager_replica.sqlite3')},
+    },
 }
+# reads are routed to the replica only by the tests turning it on
+READ_REPLICA_ALIAS = None
+
+METRICS_DIR = None
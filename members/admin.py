@@ -1,11 +1,12 @@
 from django.contrib import admin
 
-from members.models import Members
+from base.backend.projections import ProjectedAdmin
+from members.models import Members, MemberNumberSequence
 
 
 # Register your models here.
 @admin.register(Members)
-class MemberAdmin(admin.ModelAdmin):
+class MemberAdmin(ProjectedAdmin):
     """
     member admin site
     """
@@ -13,3 +14,12 @@ class MemberAdmin(admin.ModelAdmin):
                     'membership_no', 'state', 'date_modified', 'date_created')
     search_fields = ('national_id', 'membership_no')
     list_filter = ('state__name', 'date_created')
+    list_select_related = ('state',)
+
+
+@admin.register(MemberNumberSequence)
+class MemberNumberSequenceAdmin(ProjectedAdmin):
+    """
+    membership number sequence admin site
+    """
+    list_display = ('name', 'last_value', 'date_modified')
@@ -2,8 +2,12 @@ import logging
 
 from django.db.models import F
 
+from base.backend.dbrouter import read_replica
 from base.backend.service import StateService
+from base.backend.serviceregistry import get_service
+from base.backend.stateregistry import StateRegistry
 from base.backend.transactionlogbase import TransactionLogBase
+from base.backend.utils.pagination import is_paginated, page_response, apage_response
 from base.backend.utils.utilities import validate_name, validate_uuid4
 from members.backend.service import MemberService
 from django.forms.models import model_to_dict
@@ -36,7 +40,7 @@ class MembersAdministration(TransactionLogBase):
             if not validate_name(last_name):
                 self.mark_transaction_failed(transaction, message="Invalid last name")
                 return {'code': '500.400.003', 'message': 'Invalid last name'}
-            member = MemberService().create(**kwargs)
+            member = get_service(MemberService).create(**kwargs)
             if not member:
                 self.mark_transaction_failed(
                     transaction, message='Failed to create member', response_code='200.001.003')
@@ -48,6 +52,7 @@ class MembersAdministration(TransactionLogBase):
             self.mark_transaction_failed(transaction, response=str(e))
             return {'code': '999.999.999', 'message': 'Error occurred during creation of member'}
 
+    @read_replica
     def get_member(self, request, member_id):
         """
         handle fetching of one member
@@ -58,7 +63,7 @@ class MembersAdministration(TransactionLogBase):
         try:
             if not validate_uuid4(member_id):
                 return {'code': '500.004.004', 'message': 'Invalid identifier'}
-            member = MemberService().filter(id=member_id).annotate(state_name=F('state__name')).values().first()
+            member = self.__member_query(member_id).first()
             if not member:
                 return {'code': '200.002.002', 'message': 'Member record not found'}
             return {'code': '100.000.000', 'data': member}
@@ -66,6 +71,30 @@ class MembersAdministration(TransactionLogBase):
             lgr.exception(f"Error retrieving member: {e}")
             return {'code': '999.999.999', 'message': 'Error occurred during fetch member'}
 
+    @read_replica
+    async def aget_member(self, request, member_id):
+        """
+        Async variant of get_member for the async views
+        :param request: original request as received
+        :param member_id: the unique identifier of the member
+        :return: dict response with the member data
+        """
+        try:
+            if not validate_uuid4(member_id):
+                return {'code': '500.004.004', 'message': 'Invalid identifier'}
+            member = await self.__member_query(member_id).afirst()
+            if not member:
+                return {'code': '200.002.002', 'message': 'Member record not found'}
+            return {'code': '100.000.000', 'data': member}
+        except Exception as e:
+            lgr.exception(f"Error retrieving member async: {e}")
+            return {'code': '999.999.999', 'message': 'Error occurred during fetch member'}
+
+    @staticmethod
+    def __member_query(member_id):
+        return get_service(MemberService).filter(id=member_id).annotate(state_name=F('state__name')).values()
+
+    @read_replica
     def get_members(self, request, **kwargs):
         """
         Handles fetching of multiple user, either with added conditions
@@ -75,9 +104,9 @@ class MembersAdministration(TransactionLogBase):
         :return: dict response of a list of all user based on conditions provided
         """
         try:
-            members = MemberService().filter().annotate(
-                state_name=F('state__name')).values(
-                'id', 'first_name', 'last_name', 'national_id', 'mobile_no', 'gender', 'membership_no', 'state_name')
+            members = self.__members_query()
+            if is_paginated(**kwargs):
+                return page_response(members, {'code': '200.001.002', 'message': 'Members not found'}, **kwargs)
             if not members:
                 return {'code': '200.001.002', 'message': 'Members not found'}
             return {'code': '100.000.000', 'data': list(members)}
@@ -85,6 +114,33 @@ class MembersAdministration(TransactionLogBase):
             lgr.exception(f"Error occurred during fetch of members : {e}")
             return {'code': '999.999.999', 'message': 'Error occurred during retrieval of members'}
 
+    @read_replica
+    async def aget_members(self, request, **kwargs):
+        """
+        Async variant of get_members for the async views
+        :param request: original request received
+        :param kwargs: limit, cursor and stream select a page or a stream of the members
+        :return: dict response of the members
+        """
+        try:
+            members = self.__members_query()
+            if is_paginated(**kwargs):
+                return await apage_response(members, {'code': '200.001.002', 'message': 'Members not found'}, **kwargs)
+            data = [member async for member in members]
+            if not data:
+                return {'code': '200.001.002', 'message': 'Members not found'}
+            return {'code': '100.000.000', 'data': data}
+        except Exception as e:
+            lgr.exception(f"Error occurred during async fetch of members : {e}")
+            return {'code': '999.999.999', 'message': 'Error occurred during retrieval of members'}
+
+    @staticmethod
+    def __members_query():
+        return get_service(MemberService).filter().annotate(
+            state_name=F('state__name')).values(
+            'id', 'first_name', 'last_name', 'national_id', 'mobile_no', 'gender', 'membership_no', 'state_name',
+            'date_created')
+
     def update_member(self, request, member_id, **kwargs):
         """
         Handles updating of members personal information or
@@ -104,11 +160,11 @@ class MembersAdministration(TransactionLogBase):
                 self.mark_transaction_failed(
                     transaction, message='Invalid member identifier', response_code='500.400.004')
                 return {'code': '500.400.004', 'message': 'Invalid member identifier'}
-            member = MemberService().get(id=member_id)
+            member = get_service(MemberService).get(id=member_id)
             if not member:
                 self.mark_transaction_failed(transaction, message='Member not found', response_code='200.001.002')
                 return {'code': '200.001.002', 'message': 'Member not found'}
-            updated_member = MemberService().update(member.id, **kwargs)
+            updated_member = get_service(MemberService).update(member.id, **kwargs)
             if not updated_member:
                 self.mark_transaction_failed(
                     transaction, message='Member details not update', response_code='200.001.003')
@@ -138,36 +194,37 @@ class MembersAdministration(TransactionLogBase):
                 self.mark_transaction_failed(
                     transaction, message='Invalid member identifier', response_code='500.400.004')
                 return {'code': '500.400.004', 'message': 'Invalid member identifier'}
-            member = MemberService().get(id=member_id)
+            member = get_service(MemberService).get(id=member_id)
             if not member:
                 self.mark_transaction_failed(transaction, message='Member not found', response_code='200.001.002')
                 return {'code': '200.001.002', 'message': 'Member not found'}
             # check for action to be performed
             state = ""
+            current_state = getattr(StateRegistry.get(pk=member.state_id), 'name', None)
             if action == "Delete":
                 # check current member state
-                if member.state.name == 'Deleted':
+                if current_state == 'Deleted':
                     self.mark_transaction_failed(transaction, message='Member already deleted',
                                                  response_code='100.000.001')
                     return {'code': '100.000.001', 'message': 'Cannot deleted member, record was already deleted'}
-                state = StateService().get(name='Deleted')
+                state = get_service(StateService).get(name='Deleted')
             elif action == 'Enable':
-                if member.state.name == 'Active':
+                if current_state == 'Active':
                     self.mark_transaction_failed(
                         transaction, message='Member already activated', response_code='100.000.002')
                     return {'code': '100.000.002', 'message': 'Member already activated'}
-                state = StateService().get(name='Active')
+                state = get_service(StateService).get(name='Active')
             elif action == 'Disable':
-                if member.state.name in tuple(['Disabled', 'Deleted']):
+                if current_state in tuple(['Disabled', 'Deleted']):
                     self.mark_transaction_failed(
                         transaction, message='Member already Disabled', response_code='100.000.003')
                     return {'code': '100.000.003', 'message': 'Member already Disabled'}
-                state = StateService().get(name='Disabled')
+                state = get_service(StateService).get(name='Disabled')
             else:
                 self.mark_transaction_failed(
                     transaction, message='Wrong action', response_code='100.000.003')
                 return {'code': '300.300.003', 'message': 'No action to be performed'}
-            update_member = MemberService().update(member.id, state=state)
+            update_member = get_service(MemberService).update(member.id, state=state)
             if not update_member:
                 self.mark_transaction_failed(
                     transaction, message=f'Failed to {action} Member', response_code='200.001.007')
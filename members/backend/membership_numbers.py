@@ -0,0 +1,115 @@
+"""
+Allocation of LBxxxx membership numbers from a counter row instead of scanning Members
+"""
+import logging
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import F
+
+lgr = logging.getLogger(__name__)
+
+MEMBERSHIP_NO_PREFIX = 'LB'
+MEMBERSHIP_NO_WIDTH = 4
+MEMBERSHIP_NO_SEQUENCE = 'membership_no'
+
+
+def format_membership_no(number):
+    """
+    :param number: the sequence value
+    :return: the membership number e.g. LB0042
+    :rtype: str
+    """
+    return f"{MEMBERSHIP_NO_PREFIX}{str(number).zfill(MEMBERSHIP_NO_WIDTH)}"
+
+
+def highest_membership_no(members_model=None):
+    """
+    Finds the highest number already handed out, used to seed the counter row
+    :param members_model: the Members model, a historical model when called from a migration
+    :return: the highest numeric suffix or 0
+    :rtype: int
+    """
+    if members_model is None:
+        from members.models import Members as members_model
+    highest = 0
+    numbers = members_model.objects.filter(membership_no__startswith=MEMBERSHIP_NO_PREFIX).values_list(
+        'membership_no', flat=True)
+    for membership_no in numbers.iterator():
+        match = re.search(r'[0-9]+$', membership_no)
+        if match:
+            highest = max(highest, int(match.group()))
+    return highest
+
+
+class MembershipNumberAllocator(object):
+    """
+    Hands out membership numbers from the MemberNumberSequence counter row. Each process reserves
+    MEMBERSHIP_NO_BLOCK_SIZE numbers per round-trip; numbers left in a block when the process exits
+    are skipped, so use a block size of 1 to keep the numbers gap free.
+    """
+    _lock = threading.Lock()
+    _pid = None
+    _next = 0
+    _end = 0
+
+    @classmethod
+    def allocate(cls):
+        """
+        @return: the next free membership number
+        @rtype: str
+        """
+        return cls.allocate_many(1)[0]
+
+    @classmethod
+    def allocate_many(cls, count):
+        """
+        Allocates count membership numbers, e.g. for bulk onboarding
+        @param count: how many numbers to allocate
+        @type count: int
+        @return: list of membership numbers in increasing order
+        @rtype: list
+        """
+        numbers = []
+        with cls._lock:
+            if cls._pid != os.getpid():
+                cls._pid, cls._next, cls._end = os.getpid(), 0, 0
+            while len(numbers) < count:
+                if cls._next >= cls._end:
+                    size = max(getattr(settings, 'MEMBERSHIP_NO_BLOCK_SIZE', 1), count - len(numbers))
+                    cls._next, cls._end = cls._reserve(size)
+                take = min(cls._end - cls._next, count - len(numbers))
+                numbers.extend(range(cls._next, cls._next + take))
+                cls._next += take
+        return [format_membership_no(number) for number in numbers]
+
+    @classmethod
+    def reset(cls):
+        """ Drops the numbers reserved by this process """
+        with cls._lock:
+            cls._next, cls._end = 0, 0
+
+    @staticmethod
+    def _reserve(size):
+        """
+        Moves the counter forward by size. The counter is incremented before it is read, so the
+        database row lock serializes concurrent reservations.
+        :return: (first number, end of the block exclusive)
+        :rtype: tuple
+        """
+        from members.models import MemberNumberSequence
+        sequence = MemberNumberSequence.objects.filter(name=MEMBERSHIP_NO_SEQUENCE)
+        with transaction.atomic():
+            if not sequence.update(last_value=F('last_value') + size):
+                try:
+                    with transaction.atomic():
+                        MemberNumberSequence.objects.create(
+                            name=MEMBERSHIP_NO_SEQUENCE, last_value=highest_membership_no())
+                except IntegrityError:
+                    lgr.info('MembershipNumberAllocator sequence created concurrently')
+                sequence.update(last_value=F('last_value') + size)
+            end = sequence.values_list('last_value', flat=True).get() + 1
+        return end - size, end
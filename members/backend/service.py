@@ -1,7 +1,18 @@
 from base.backend.servicebase import ServiceBase
+from members.backend.membership_numbers import MembershipNumberAllocator
 from members.models import Members
 
 
 class MemberService(ServiceBase):
     """ members model CRUD operations """
     manager = Members.objects
+
+    def _build(self, objs):
+        """
+        Bulk writes skip Members.save, so the membership numbers are allocated here in one reservation
+        """
+        members = super(MemberService, self)._build(objs)
+        missing = [member for member in members if not member.membership_no]
+        for member, membership_no in zip(missing, MembershipNumberAllocator.allocate_many(len(missing))):
+            member.membership_no = membership_no
+        return members
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.2 on 2026-10-18 18:53
+
+from django.db import migrations, models
+import re
+import uuid
+
+# frozen copies of members.backend.membership_numbers as of this migration
+MEMBERSHIP_NO_PREFIX = 'LB'
+MEMBERSHIP_NO_SEQUENCE = 'membership_no'
+
+
+def highest_membership_no(members, alias):
+    highest = 0
+    numbers = members.objects.using(alias).filter(membership_no__startswith=MEMBERSHIP_NO_PREFIX).values_list(
+        'membership_no', flat=True)
+    for membership_no in numbers.iterator():
+        match = re.search(r'[0-9]+$', membership_no)
+        if match:
+            highest = max(highest, int(match.group()))
+    return highest
+
+
+def seed_membership_no_sequence(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    members = apps.get_model('members', 'Members')
+    apps.get_model('members', 'MemberNumberSequence').objects.using(alias).create(
+        name=MEMBERSHIP_NO_SEQUENCE, last_value=highest_membership_no(members, alias))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0005_alter_members_membership_no'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberNumberSequence',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(seed_membership_no_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.2 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0006_membernumbersequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='members',
+            index=models.Index(fields=['date_created', 'id'], name='members_created_idx'),
+        ),
+    ]
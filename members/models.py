@@ -1,6 +1,4 @@
 # code 200
-import re
-
 from django.db import models
 
 from base.models import BaseModel, gender, State
@@ -20,15 +18,27 @@ class Members(BaseModel):
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    class Meta(object):
+        indexes = [models.Index(fields=['date_created', 'id'], name='members_created_idx')]
+
     def save(self, *args, **kwargs):
         """
             Override save method  to ensure valid member have been saved.
+            New members get the next membership number, existing members keep theirs.
         """
-        if Members.objects.filter(membership_no=self.membership_no):
-            super(Members, self).save(*args, **kwargs)
-        else:
-            last_member_no = Members.objects.filter().order_by("-date_created").first()
-            member_no = last_member_no.membership_no if last_member_no else "LB0000"
-            ref = re.sub(r'[0-9]+$', lambda x: f"{str(int(x.group()) + 1).zfill(len(x.group()))}", member_no)
-            self.membership_no = ref
-            super(Members, self).save(*args, **kwargs)
+        if self._state.adding or not self.membership_no:
+            from members.backend.membership_numbers import MembershipNumberAllocator
+            self.membership_no = MembershipNumberAllocator.allocate()
+        super(Members, self).save(*args, **kwargs)
+
+
+#002
+class MemberNumberSequence(BaseModel):
+    """
+    counter rows used to allocate membership numbers, see MembershipNumberAllocator
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} {self.last_value}"
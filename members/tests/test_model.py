@@ -1,10 +1,16 @@
 """
 This to test members  module
 """
+import threading
+
 import pytest
 #
+from django.db import connection, IntegrityError
 from mixer.backend.django import mixer
 
+from members.backend.membership_numbers import MembershipNumberAllocator
+from members.models import Members, MemberNumberSequence
+
 #
 # # nonspection SpellCheckingInspection
 #
@@ -20,3 +26,63 @@ class TestMembersModels(object):
         assert member is not None, 'Should return a member object'
         assert member.__str__() == f"{member.first_name} {member.last_name}",\
             "'Should have a Member object string  representation'"
+
+    def test_membership_numbers_are_sequential(self):
+        mixer.blend('base.State', name='Active')
+        first = mixer.blend('members.Members')
+        second = mixer.blend('members.Members')
+        assert first.membership_no == 'LB0001', 'Should allocate the first membership number'
+        assert second.membership_no == 'LB0002', 'Should allocate the next membership number'
+
+    def test_membership_number_kept_on_update(self, django_assert_num_queries):
+        mixer.blend('base.State', name='Active')
+        member = mixer.blend('members.Members')
+        member.mobile_no = '254700000000'
+        with django_assert_num_queries(1):
+            member.save()
+        assert Members.objects.get(id=member.id).membership_no == member.membership_no, \
+            'Should keep the membership number'
+
+    def test_sequence_seeded_from_existing_members(self):
+        mixer.blend('base.State', name='Active')
+        member = mixer.blend('members.Members')
+        Members.objects.filter(id=member.id).update(membership_no='LB0041')
+        MemberNumberSequence.objects.all().delete()
+        MembershipNumberAllocator.reset()
+        assert mixer.blend('members.Members').membership_no == 'LB0042', 'Should continue after the highest number'
+
+    def test_block_allocation(self, settings):
+        settings.MEMBERSHIP_NO_BLOCK_SIZE = 10
+        mixer.blend('base.State', name='Active')
+        assert MembershipNumberAllocator.allocate_many(3) == ['LB0001', 'LB0002', 'LB0003'], \
+            'Should allocate from the reserved block'
+        assert MemberNumberSequence.objects.get().last_value == 10, 'Should reserve a whole block at once'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_registrations_get_unique_numbers():
+    """ Members registered in parallel must never collide on the membership number """
+    mixer.blend('base.State', name='Active')
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def register():
+        try:
+            barrier.wait()
+            for _ in range(5):
+                mixer.blend('members.Members')
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=register) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    numbers = list(Members.objects.values_list('membership_no', flat=True))
+    # the in-memory test database may refuse some parallel writes with a table lock, never with a duplicate
+    assert not [e for e in errors if isinstance(e, IntegrityError) or 'UNIQUE' in str(e)], \
+        'Should never collide on the membership number'
+    assert numbers and len(numbers) == len(set(numbers)), 'Should allocate unique membership numbers'
@@ -0,0 +1,20 @@
+import pytest
+
+from members.models import Members
+
+pytestmark = pytest.mark.django_db
+
+
+@pytestmark
+class TestQueryPlans(object):
+    """
+    Test that the member lookups are served by an index
+    """
+
+    def test_members_page(self, full_scans):
+        queryset = Members.objects.values().order_by('-date_created', '-id')[:100]
+        assert full_scans(queryset) == [], 'Should walk members_created_idx'
+
+    def test_membership_no_lookup(self, full_scans):
+        queryset = Members.objects.filter(membership_no='LB0001')
+        assert full_scans(queryset) == [], 'Should find the member through the membership number'
@@ -46,3 +46,11 @@ class TestMemberService(object):
         old_member = mixer.blend('members.Members', first_name="John", last_name="Kamau")
         updated_member = MemberService().update(old_member.id, mobile_no='2547045345678')
         assert updated_member.mobile_no == '2547045345678', 'Should have an updated instance of Member'
+
+    def test_bulk_create(self):
+        """ Test for bulk_create Member Model service """
+        mixer.blend('base.State', name="Active")
+        members = MemberService().bulk_create([
+            {'first_name': 'John', 'last_name': 'Kamau', 'national_id': str(i), 'gender': 'M'} for i in range(3)])
+        assert [member.membership_no for member in members] == ['LB0001', 'LB0002', 'LB0003'], \
+            'Should allocate membership numbers to bulk created members'
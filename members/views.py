@@ -1,10 +1,13 @@
-from django.http import HttpResponse, JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
 from django.shortcuts import render
 from django.urls import re_path
 from django.views.decorators.csrf import csrf_exempt
 
-from base.backend.utils.decorators import user_login_required
-from base.backend.utils.utilities import get_request_data
+from base.backend.utils.codec import JsonResponse
+from base.backend.utils.decorators import user_login_required, async_user_login_required, async_csrf_exempt
+from base.backend.utils.pagination import list_response
+from base.backend.utils.utilities import get_request_data, served_by_asgi
 from members.administration.members_administration import MembersAdministration
 
 
@@ -20,22 +23,25 @@ def create_member(request):
         return JsonResponse({'code': '200.201.500', 'message': str(e)})
 
 
-@csrf_exempt
-@user_login_required
-def get_member(request):
+@async_csrf_exempt
+@async_user_login_required
+async def get_member(request):
     try:
         return JsonResponse(
-            MembersAdministration().get_member(request, member_id=get_request_data(request).pop('member_id')))
+            await MembersAdministration().aget_member(request, member_id=get_request_data(request).pop('member_id')))
     except Exception as e:
         return JsonResponse({'code': '200.200.500', 'message': str(e)})
 
 
-@csrf_exempt
-@user_login_required
-def get_members(request):
+@async_csrf_exempt
+@async_user_login_required
+async def get_members(request):
     try:
         kwargs = get_request_data(request)
-        return JsonResponse(MembersAdministration().get_members(request, **kwargs))
+        if served_by_asgi(request):
+            return list_response(await MembersAdministration().aget_members(request, **kwargs))
+        # under WSGI a stream from an async iterator would be read whole before it is sent, use the sync iterator
+        return list_response(await sync_to_async(MembersAdministration().get_members)(request, **kwargs))
     except Exception as e:
         return JsonResponse({'code': '200.200.500', 'message': str(e)})
 